@@ -0,0 +1,32 @@
+"""
+Latency of the evaluation of a single sample with `hgc.evaluate_sample`, compared with
+a one-row DataFrame. Run with ``asv run`` (or ``asv dev`` for a quick run) from the root
+of the repository.
+"""
+import logging
+
+import pandas as pd
+
+import hgc
+
+SAMPLE = {'ph': 7.6, 'temp': 11.4, 'Ca': 48., 'Mg': 2.5, 'Na': 15., 'K': 1.3, 'Fe': 0.2, 'Mn': 0.05,
+          'NH4': 0.1, 'Cl': 27., 'SO4': 14., 'NO3': 0.5, 'alkalinity': 156.}
+OUTPUTS = ['si_Calcite', 'sc']
+
+
+class TimeEvaluateSample:
+    def setup(self):
+        logging.getLogger().setLevel(logging.WARNING)
+        # the first call loads the database in an engine of the pool
+        hgc.evaluate_sample(SAMPLE, outputs=OUTPUTS)
+
+    def time_evaluate_sample(self):
+        hgc.evaluate_sample(SAMPLE, outputs=OUTPUTS)
+
+    def time_evaluate_sample_database(self):
+        hgc.evaluate_sample(SAMPLE, outputs=OUTPUTS, database='phreeqc.dat')
+
+    def time_dataframe(self):
+        df = pd.DataFrame([SAMPLE])
+        df.hgc.get_saturation_index('Calcite', inplace=False)
+        df.hgc.get_specific_conductance(inplace=False)
@@ -0,0 +1,11 @@
+"""
+Import time of hgc, measured in a new Python process.
+"""
+
+
+def timeraw_import_hgc():
+    return "import hgc"
+
+
+def timeraw_import_samples_frame():
+    return "from hgc.samples_frame import SamplesFrame"
@@ -0,0 +1,52 @@
+"""
+Reading a lab export in an Excel workbook with `hgc.read_lab_workbook`, compared with the
+pandas route (read_excel with usecols, renaming and unit conversion by hand).
+"""
+import logging
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+import hgc
+
+N_ROWS = 5000
+# the lab export has many columns, of which a few are used
+HEADERS = ['labcode', 'pH', 'EC', 'HCO3', 'Ca', 'Mg', 'Na', 'K', 'Cl', 'SO4', 'Mn', 'P'] + \
+          [f'other {i}' for i in range(40)]
+MAPPING = {'labcode': 'labcode', 'pH': 'ph', 'EC': 'ec', 'HCO3': 'alkalinity', 'Ca': 'Ca', 'Mg': 'Mg', 'Na': 'Na',
+           'K': 'K', 'Cl': 'Cl', 'SO4': 'SO4', 'Mn': ('Mn', 'ug/L'), 'P': ('PO4', 'ug/L')}
+
+
+class TimeReadLabWorkbook:
+    timeout = 300
+
+    def setup_cache(self):
+        rng = np.random.default_rng(0)
+        path = Path(tempfile.mkdtemp()) / 'lab_export.xlsx'
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = 'labab'
+        sheet.append(['Lab export'])
+        sheet.append(HEADERS)
+        sheet.append(['units'] * len(HEADERS))
+        values = rng.uniform(0.1, 100., (N_ROWS, len(HEADERS) - 1)).round(3)
+        for i, row in enumerate(values):
+            sheet.append([f'sample {i}'] + row.tolist())
+        workbook.save(path)
+        return str(path)
+
+    def setup(self, path):
+        logging.getLogger().setLevel(logging.WARNING)
+
+    def time_read_lab_workbook(self, path):
+        hgc.read_lab_workbook(path, MAPPING, sheet_name='labab', skiprows=[0, 2], index_col='labcode')
+
+    def time_read_excel(self, path):
+        df = pd.read_excel(path, sheet_name='labab', skiprows=[0, 2], usecols=list(MAPPING))
+        df = df.set_index('labcode')
+        df.Mn = df.Mn / 1000
+        df.P = df.P / 1000
+        df.rename(columns={'pH': 'ph', 'EC': 'ec', 'HCO3': 'alkalinity', 'P': 'PO4'})
@@ -0,0 +1,136 @@
+"""
+Time and peak memory of the `SamplesFrame` methods at 1k, 100k and 1M rows. Run with
+``asv run`` from the root of the repository, e.g. ``asv run --bench SamplesFrame``.
+"""
+from hgc.samples_frame import SamplesFrame
+
+from .common import (CONSOLIDATE_KWARGS, PHREEQC_ROWS, ROWS, consolidated_samples, quiet, raw_samples,
+                     valid_samples)
+
+
+class TimeCleaning:
+    """ make_valid and consolidate, they change the DataFrame so every call gets a new copy """
+    params = ROWS
+    param_names = ['rows']
+    number = 1
+    repeat = 5
+    timeout = 600
+
+    def setup(self, n_rows):
+        quiet()
+        self.df_raw = raw_samples(n_rows)
+        self.df_valid = valid_samples(n_rows)
+
+    def time_make_valid(self, n_rows):
+        self.df_raw.hgc.make_valid()
+
+    def peakmem_make_valid(self, n_rows):
+        self.df_raw.hgc.make_valid()
+
+    def time_consolidate(self, n_rows):
+        self.df_valid.hgc.consolidate(**CONSOLIDATE_KWARGS)
+
+    def time_is_valid(self, n_rows):
+        self.df_valid.hgc.is_valid
+
+
+class TimeAnalytic:
+    """ The vectorized (pandas) methods """
+    params = ROWS
+    param_names = ['rows']
+    timeout = 600
+
+    def setup(self, n_rows):
+        quiet()
+        self.df = consolidated_samples(n_rows)
+
+    def time_get_ratios(self, n_rows):
+        self.df.hgc.get_ratios(inplace=False)
+
+    def time_get_sum_anions(self, n_rows):
+        self.df.hgc.get_sum_anions(inplace=False)
+
+    def time_get_sum_cations(self, n_rows):
+        self.df.hgc.get_sum_cations(inplace=False)
+
+    def time_get_ion_balance(self, n_rows):
+        self.df.hgc.get_ion_balance(inplace=False)
+
+    def time_get_bex(self, n_rows):
+        self.df.hgc.get_bex(inplace=False)
+
+    def time_get_dominant_anions(self, n_rows):
+        self.df.hgc.get_dominant_anions(inplace=False)
+
+    def time_get_dominant_cations(self, n_rows):
+        self.df.hgc.get_dominant_cations(inplace=False)
+
+    def time_get_stuyfzand_water_type(self, n_rows):
+        self.df.hgc.get_stuyfzand_water_type(inplace=False)
+
+    def peakmem_get_stuyfzand_water_type(self, n_rows):
+        self.df.hgc.get_stuyfzand_water_type(inplace=False)
+
+    def time_get_specific_conductance_vectorized(self, n_rows):
+        self.df.hgc.get_specific_conductance(use_phreeqc=False, inplace=False)
+
+
+class TimePhreeqc:
+    """ The PHREEQC-backed methods, see `common` for the number of rows """
+    params = PHREEQC_ROWS
+    param_names = ['rows']
+    number = 1
+    repeat = 1
+    timeout = 7200
+
+    def setup(self, n_rows):
+        quiet()
+        self.df = consolidated_samples(n_rows)
+        self.other = self.df.iloc[[0]]
+
+    def time_get_phreeqpython_solutions(self, n_rows):
+        self.df.hgc.get_phreeqpython_solutions(inplace=False)
+
+    def time_get_saturation_index(self, n_rows):
+        self.df.hgc.get_saturation_index('Calcite', inplace=False)
+
+    def peakmem_get_saturation_index(self, n_rows):
+        self.df.hgc.get_saturation_index('Calcite', inplace=False)
+
+    def time_get_partial_pressure(self, n_rows):
+        self.df.hgc.get_partial_pressure('CO2(g)', inplace=False)
+
+    def time_get_specific_conductance(self, n_rows):
+        self.df.hgc.get_specific_conductance(inplace=False)
+
+    def time_get_ionic_strength(self, n_rows):
+        self.df.hgc.get_ionic_strength(inplace=False)
+
+    def time_get_species(self, n_rows):
+        self.df.hgc.get_species(['Ca+2', 'HCO3-'], wide=True)
+
+    def time_equilibrate_phases(self, n_rows):
+        self.df.hgc.equilibrate_phases({'Calcite': 0.})
+
+    def time_mix_sweep(self, n_rows):
+        self.df.hgc.mix_sweep(self.other, fractions=[0., 0.5, 1.])
+
+    def time_fillna_ec(self, n_rows):
+        self.df.drop(columns='ec').hgc.fillna_ec()
+
+
+class TimeAccessor:
+    """ Construction of the accessor, which happens once per DataFrame """
+    params = ROWS
+    param_names = ['rows']
+
+    def setup(self, n_rows):
+        quiet()
+        self.df = valid_samples(n_rows)
+
+    def time_accessor_construction(self, n_rows):
+        SamplesFrame(self.df)
+
+    def time_hgc_cols(self, n_rows):
+        # a new accessor, such that the columns are not cached
+        SamplesFrame(self.df).hgc_cols
@@ -0,0 +1,60 @@
+"""
+Samples for the benchmarks, generated with `hgc.testing.generate_samples`: realistic groundwater
+samples with values below the detection limit, missing values and total N and P next to the
+nitrogen and phosphate ions.
+
+The PHREEQC-backed methods take about 1 ms per sample, so they are only benchmarked at
+1M rows if the environment variable HGC_BENCHMARK_FULL is set.
+"""
+import logging
+import os
+from functools import lru_cache
+
+import hgc  # noqa: F401, registers the hgc accessor
+from hgc.testing import generate_samples
+
+ROWS = [1000, 100000, 1000000]
+PHREEQC_ROWS = ROWS if os.environ.get('HGC_BENCHMARK_FULL') else ROWS[:2]
+
+# the arguments of consolidate for the generated samples
+CONSOLIDATE_KWARGS = {'use_so4': None}
+
+
+def quiet():
+    """ Hide the info messages of hgc, they would dominate the timings """
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+@lru_cache(maxsize=None)
+def _raw_samples(n_rows):
+    return generate_samples(n_rows, seed=0)
+
+
+def raw_samples(n_rows):
+    """ Return `n_rows` samples as read from a lab export (not valid yet) """
+    return _raw_samples(n_rows).copy()
+
+
+@lru_cache(maxsize=None)
+def _valid_samples(n_rows):
+    quiet()
+    df = raw_samples(n_rows)
+    df.hgc.make_valid()
+    return df
+
+
+def valid_samples(n_rows):
+    """ Return `n_rows` samples after make_valid """
+    return _valid_samples(n_rows).copy()
+
+
+@lru_cache(maxsize=None)
+def _consolidated_samples(n_rows):
+    df = valid_samples(n_rows)
+    df.hgc.consolidate(**CONSOLIDATE_KWARGS)
+    return df
+
+
+def consolidated_samples(n_rows):
+    """ Return `n_rows` samples after make_valid and consolidate """
+    return _consolidated_samples(n_rows).copy()
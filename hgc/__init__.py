@@ -2,6 +2,9 @@
 # all dataframes created afterwards are extended with the
 # hgc namespace
 from hgc.samples_frame import SamplesFrame
+from hgc.evaluate import evaluate_sample
+from hgc.io import read_lab_workbook, read_parquet
+from hgc import testing
 
 name = "hgc"
 
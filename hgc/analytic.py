@@ -0,0 +1,520 @@
+"""
+Vectorized (NumPy) speciation of the major ions in water samples, the saturation
+indices of common carbonate and sulfate minerals and the specific conductance. It is a
+fast alternative for the PHREEQC backend that is used when `use_phreeqc=False` is passed
+to `SamplesFrame.get_saturation_index` or `SamplesFrame.get_specific_conductance`.
+
+The model solves the mass balances of the major cations and sulfate and the alkalinity
+balance for carbonate with a fixed point iteration on all samples at once. Activity
+coefficients follow the WATEQ Debye-Hückel equation (Davies for species without ion size
+parameters) and all thermodynamic data are taken from `vitens.dat`, the default database of
+phreeqpython. Like PHREEQC, the pe is assumed to be 4 to distribute iron over Fe(2) and Fe(3).
+
+Other acid-base systems (e.g. aluminium, phosphate, silica, organic acids) are not part of
+the model. When the alkalinity is dominated by carbonate, the saturation indices agree with
+PHREEQC within 0.01 for gypsum, 0.1 for calcite, aragonite, siderite, rhodochrosite and
+CO2(g) and 0.2 for dolomite (typically within 0.03, tested for groundwater with an ionic
+strength up to ~0.2). Samples with a low alkalinity and high concentrations of the ions
+that are not modelled deviate more.
+"""
+import functools
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+from hgc.constants.constants import mw
+
+Reaction = namedtuple('Reaction', ['log_k', 'delta_h', 'analytic'])
+Species = namedtuple('Species', ['charge', 'gamma', 'reactions', 'stoichiometry'])
+Phase = namedtuple('Phase', ['reaction', 'stoichiometry', 'h2o'])
+
+# Gas constant in kJ/(mol K) and Faraday constant in C/mol
+R = 8.314462618e-3
+F = 96485.33212
+KCAL_TO_KJ = 4.184
+
+# reactions and their log_k at 25 °C, delta_h (kcal/mol) and analytic expression as in vitens.dat
+REACTIONS = {
+    'H2O = OH- + H+': Reaction(-14.0, None, (293.29227, 0.1360833, -10576.913, -123.73158, 0, -6.996455e-5)),
+    'CO3-2 + H+ = HCO3-': Reaction(10.329, -3.561, (107.8871, 0.03252849, -5151.79, -38.92561, 563713.9)),
+    'CO3-2 + 2 H+ = CO2 + H2O': Reaction(16.681, -5.738, (464.1965, 0.09344813, -26986.16, -165.75951, 2248628.9)),
+    'SO4-2 + H+ = HSO4-': Reaction(1.988, 3.85, (-56.889, 0.006473, 2307.9, 19.8858)),
+    'Ca+2 + CO3-2 = CaCO3': Reaction(3.224, 3.545, (-1228.732, -0.299440, 35512.75, 485.818)),
+    'Ca+2 + CO3-2 + H+ = CaHCO3+': Reaction(11.435, -0.871, (1317.0071, 0.34546894, -39916.84, -517.70761, 563713.9)),
+    'Ca+2 + SO4-2 = CaSO4': Reaction(2.25, 1.325, None),
+    'Mg+2 + CO3-2 = MgCO3': Reaction(2.98, 2.713, (0.9910, 0.00667)),
+    'Mg+2 + H+ + CO3-2 = MgHCO3+': Reaction(11.399, -2.771, (48.6721, 0.03252849, -2614.335, -18.00263, 563713.9)),
+    'Mg+2 + SO4-2 = MgSO4': Reaction(2.37, 4.550, None),
+    'Na+ + CO3-2 = NaCO3-': Reaction(1.27, 8.91, None),
+    'Na+ + HCO3- = NaHCO3': Reaction(-0.25, -1, None),
+    'Na+ + SO4-2 = NaSO4-': Reaction(0.7, 1.120, None),
+    'K+ + SO4-2 = KSO4-': Reaction(0.85, 2.250, (3.106, 0.0, -673.6)),
+    'Fe+2 + CO3-2 = FeCO3': Reaction(4.38, None, None),
+    'Fe+2 + HCO3- = FeHCO3+': Reaction(2.0, None, None),
+    'Fe+2 + SO4-2 = FeSO4': Reaction(2.25, 3.230, None),
+    'Fe+2 + H2O = FeOH+ + H+': Reaction(-9.5, 13.20, None),
+    'Fe+2 = Fe+3 + e-': Reaction(-13.02, 9.680, None),
+    'Fe+3 + H2O = FeOH+2 + H+': Reaction(-2.19, 10.4, None),
+    'Fe+3 + 2 H2O = Fe(OH)2+ + 2 H+': Reaction(-5.67, 17.1, None),
+    'Fe+3 + 3 H2O = Fe(OH)3 + 3 H+': Reaction(-12.56, 24.8, None),
+    'Fe+3 + 4 H2O = Fe(OH)4- + 4 H+': Reaction(-21.6, 31.9, None),
+    'Fe+3 + SO4-2 = FeSO4+': Reaction(4.04, 3.91, None),
+    'Mn+2 + CO3-2 = MnCO3': Reaction(4.9, None, None),
+    'Mn+2 + HCO3- = MnHCO3+': Reaction(1.95, None, None),
+    'Mn+2 + SO4-2 = MnSO4': Reaction(2.25, 3.370, None),
+    # phases
+    'CaCO3 = CO3-2 + Ca+2 (calcite)': Reaction(-8.48, -2.297, (-171.9065, -0.077993, 2839.319, 71.595)),
+    'CaCO3 = CO3-2 + Ca+2 (aragonite)': Reaction(-8.336, -2.589, (-171.9773, -0.077993, 2903.293, 71.595)),
+    'CaMg(CO3)2 = Ca+2 + Mg+2 + 2 CO3-2': Reaction(-17.09, -9.436, None),
+    'CaSO4:2H2O = Ca+2 + SO4-2 + 2 H2O': Reaction(-4.58, -0.109, (68.2401, 0.0, -3221.51, -25.0627)),
+    'FeCO3 = Fe+2 + CO3-2': Reaction(-10.89, -2.480, None),
+    'MnCO3 = Mn+2 + CO3-2': Reaction(-11.13, -1.430, None),
+    'CO2(g) = CO2': Reaction(-1.468, -4.776, (109.534, 1.9913e-2, -6986.04, -40.83, 669370)),
+}
+
+# components (master species) of the model; the activities of H+ and e- are fixed by pH and pe
+COMPONENTS = ('H+', 'e-', 'Ca+2', 'Mg+2', 'Na+', 'K+', 'Fe+2', 'Mn+2', 'NH4+', 'CO3-2', 'SO4-2', 'Cl-', 'NO3-')
+
+# aqueous species: charge, (a, b) of the WATEQ Debye-Hückel equation (None for Davies),
+# the formation reaction(s) from the components and the stoichiometry of the components.
+SPECIES = {
+    'H+': Species(1, (9.0, 0), (), {'H+': 1}),
+    'e-': Species(-1, None, (), {'e-': 1}),
+    'Ca+2': Species(2, (5.0, 0.165), (), {'Ca+2': 1}),
+    'Mg+2': Species(2, (5.5, 0.20), (), {'Mg+2': 1}),
+    'Na+': Species(1, (4.08, 0.082), (), {'Na+': 1}),
+    'K+': Species(1, (3.5, 0.015), (), {'K+': 1}),
+    'Fe+2': Species(2, (6.0, 0), (), {'Fe+2': 1}),
+    'Mn+2': Species(2, (6.0, 0), (), {'Mn+2': 1}),
+    'NH4+': Species(1, (2.5, 0), (), {'NH4+': 1}),
+    'CO3-2': Species(-2, (5.4, 0), (), {'CO3-2': 1}),
+    'SO4-2': Species(-2, (5.0, -0.04), (), {'SO4-2': 1}),
+    'Cl-': Species(-1, (3.63, 0.017), (), {'Cl-': 1}),
+    'NO3-': Species(-1, (3.0, 0), (), {'NO3-': 1}),
+    'OH-': Species(-1, (3.5, 0), ('H2O = OH- + H+',), {'H+': -1}),
+    'HCO3-': Species(-1, (5.4, 0), ('CO3-2 + H+ = HCO3-',), {'CO3-2': 1, 'H+': 1}),
+    'CO2': Species(0, None, ('CO3-2 + 2 H+ = CO2 + H2O',), {'CO3-2': 1, 'H+': 2}),
+    'HSO4-': Species(-1, None, ('SO4-2 + H+ = HSO4-',), {'SO4-2': 1, 'H+': 1}),
+    'CaCO3': Species(0, None, ('Ca+2 + CO3-2 = CaCO3',), {'Ca+2': 1, 'CO3-2': 1}),
+    'CaHCO3+': Species(1, (6.0, 0), ('Ca+2 + CO3-2 + H+ = CaHCO3+',), {'Ca+2': 1, 'CO3-2': 1, 'H+': 1}),
+    'CaSO4': Species(0, None, ('Ca+2 + SO4-2 = CaSO4',), {'Ca+2': 1, 'SO4-2': 1}),
+    'MgCO3': Species(0, None, ('Mg+2 + CO3-2 = MgCO3',), {'Mg+2': 1, 'CO3-2': 1}),
+    'MgHCO3+': Species(1, (4.0, 0), ('Mg+2 + H+ + CO3-2 = MgHCO3+',), {'Mg+2': 1, 'CO3-2': 1, 'H+': 1}),
+    'MgSO4': Species(0, None, ('Mg+2 + SO4-2 = MgSO4',), {'Mg+2': 1, 'SO4-2': 1}),
+    'NaCO3-': Species(-1, None, ('Na+ + CO3-2 = NaCO3-',), {'Na+': 1, 'CO3-2': 1}),
+    'NaHCO3': Species(0, None, ('Na+ + HCO3- = NaHCO3', 'CO3-2 + H+ = HCO3-'), {'Na+': 1, 'CO3-2': 1, 'H+': 1}),
+    'NaSO4-': Species(-1, (5.4, 0), ('Na+ + SO4-2 = NaSO4-',), {'Na+': 1, 'SO4-2': 1}),
+    'KSO4-': Species(-1, (5.4, 0), ('K+ + SO4-2 = KSO4-',), {'K+': 1, 'SO4-2': 1}),
+    'FeCO3': Species(0, None, ('Fe+2 + CO3-2 = FeCO3',), {'Fe+2': 1, 'CO3-2': 1}),
+    'FeHCO3+': Species(1, None, ('Fe+2 + HCO3- = FeHCO3+', 'CO3-2 + H+ = HCO3-'), {'Fe+2': 1, 'CO3-2': 1, 'H+': 1}),
+    'FeSO4': Species(0, None, ('Fe+2 + SO4-2 = FeSO4',), {'Fe+2': 1, 'SO4-2': 1}),
+    'FeOH+': Species(1, (5.0, 0), ('Fe+2 + H2O = FeOH+ + H+',), {'Fe+2': 1, 'H+': -1}),
+    'Fe+3': Species(3, (9.0, 0), ('Fe+2 = Fe+3 + e-',), {'Fe+2': 1, 'e-': -1}),
+    'FeOH+2': Species(2, (5.0, 0), ('Fe+2 = Fe+3 + e-', 'Fe+3 + H2O = FeOH+2 + H+'),
+                      {'Fe+2': 1, 'e-': -1, 'H+': -1}),
+    'Fe(OH)2+': Species(1, (5.4, 0), ('Fe+2 = Fe+3 + e-', 'Fe+3 + 2 H2O = Fe(OH)2+ + 2 H+'),
+                        {'Fe+2': 1, 'e-': -1, 'H+': -2}),
+    'Fe(OH)3': Species(0, None, ('Fe+2 = Fe+3 + e-', 'Fe+3 + 3 H2O = Fe(OH)3 + 3 H+'),
+                       {'Fe+2': 1, 'e-': -1, 'H+': -3}),
+    'Fe(OH)4-': Species(-1, (5.4, 0), ('Fe+2 = Fe+3 + e-', 'Fe+3 + 4 H2O = Fe(OH)4- + 4 H+'),
+                        {'Fe+2': 1, 'e-': -1, 'H+': -4}),
+    'FeSO4+': Species(1, (5.0, 0), ('Fe+2 = Fe+3 + e-', 'Fe+3 + SO4-2 = FeSO4+'),
+                      {'Fe+2': 1, 'e-': -1, 'SO4-2': 1}),
+    'MnCO3': Species(0, None, ('Mn+2 + CO3-2 = MnCO3',), {'Mn+2': 1, 'CO3-2': 1}),
+    'MnHCO3+': Species(1, (5.0, 0), ('Mn+2 + HCO3- = MnHCO3+', 'CO3-2 + H+ = HCO3-'),
+                       {'Mn+2': 1, 'CO3-2': 1, 'H+': 1}),
+    'MnSO4': Species(0, None, ('Mn+2 + SO4-2 = MnSO4',), {'Mn+2': 1, 'SO4-2': 1}),
+}
+
+# diffusion coefficients (m2/s) at 25 °C of the ions that conduct current, as in vitens.dat
+DIFFUSION_COEFFICIENTS = {
+    'H+': 9.31e-9, 'OH-': 5.27e-9,
+    'Ca+2': 0.793e-9, 'Mg+2': 0.705e-9, 'Na+': 1.33e-9, 'K+': 1.96e-9, 'Fe+2': 0.719e-9,
+    'Mn+2': 0.688e-9, 'NH4+': 1.98e-9,
+    'CO3-2': 0.955e-9, 'HCO3-': 1.18e-9, 'SO4-2': 1.07e-9, 'HSO4-': 1.33e-9, 'Cl-': 2.03e-9,
+    'NO3-': 1.9e-9,
+    'CaHCO3+': 5.06e-10, 'MgHCO3+': 4.78e-10, 'NaCO3-': 5.85e-10, 'NaSO4-': 6.18e-10, 'KSO4-': 7.46e-10,
+}
+
+# phases: the dissolution reaction and the stoichiometry of the aqueous species in it
+PHASES = {
+    'Calcite': Phase('CaCO3 = CO3-2 + Ca+2 (calcite)', {'Ca+2': 1, 'CO3-2': 1}, 0),
+    'Aragonite': Phase('CaCO3 = CO3-2 + Ca+2 (aragonite)', {'Ca+2': 1, 'CO3-2': 1}, 0),
+    'Dolomite': Phase('CaMg(CO3)2 = Ca+2 + Mg+2 + 2 CO3-2', {'Ca+2': 1, 'Mg+2': 1, 'CO3-2': 2}, 0),
+    'Gypsum': Phase('CaSO4:2H2O = Ca+2 + SO4-2 + 2 H2O', {'Ca+2': 1, 'SO4-2': 1}, 2),
+    'Siderite': Phase('FeCO3 = Fe+2 + CO3-2', {'Fe+2': 1, 'CO3-2': 1}, 0),
+    'Rhodochrosite': Phase('MnCO3 = Mn+2 + CO3-2', {'Mn+2': 1, 'CO3-2': 1}, 0),
+    'CO2(g)': Phase('CO2(g) = CO2', {'CO2': 1}, 0),
+}
+
+# SamplesFrame columns used by the model and the component they define (with the
+# molar weight to convert mg/L to mol/L)
+INPUT_COLUMNS = {
+    'Ca': ('Ca+2', mw('Ca')),
+    'Mg': ('Mg+2', mw('Mg')),
+    'Na': ('Na+', mw('Na')),
+    'K': ('K+', mw('K')),
+    'Fe': ('Fe+2', mw('Fe')),
+    'Mn': ('Mn+2', mw('Mn')),
+    'NH4': ('NH4+', mw('N') + 4 * mw('H')),
+    'SO4': ('SO4-2', mw('SO4')),
+    'Cl': ('Cl-', mw('Cl')),
+    'NO3': ('NO3-', mw('NO3')),
+    'alkalinity': ('CO3-2', mw('HCO3')),
+    'ph': (None, None),
+    'temp': (None, None),
+}
+
+# value that PHREEQC returns as saturation index of phases of which an element is absent
+SI_ABSENT = -999.999
+
+
+def log_k(reaction, temp):
+    """
+    Return the log K of a reaction at temperature `temp` (°C). The analytic expression
+    is used when it is available, otherwise the van 't Hoff equation with delta_h.
+    """
+    reaction = REACTIONS[reaction]
+    tk = np.asarray(temp, dtype=np.float64) + 273.15
+    if reaction.analytic is not None:
+        a = tuple(reaction.analytic) + (0,) * (6 - len(reaction.analytic))
+        return a[0] + a[1] * tk + a[2] / tk + a[3] * np.log10(tk) + a[4] / tk**2 + a[5] * tk**2
+    elif reaction.delta_h is not None:
+        delta_h = reaction.delta_h * KCAL_TO_KJ
+        return reaction.log_k - delta_h / (np.log(10) * R) * (1. / tk - 1. / 298.15)
+    else:
+        return reaction.log_k + np.zeros_like(tk)
+
+
+def debye_huckel_constants(temp):
+    """ Return the Debye-Hückel constants A and B (1/Å) of water at temperature `temp` (°C) """
+    temp = np.asarray(temp, dtype=np.float64)
+    tk = temp + 273.15
+    # dielectric constant (Malmberg and Maryott, 1956) and density of water (Thiesen)
+    eps = 87.740 - 0.40008 * temp + 9.398e-4 * temp**2 - 1.410e-6 * temp**3
+    rho = 1 - (temp + 288.9414) / (508929.2 * (temp + 68.12963)) * (temp - 3.9863)**2
+    a = 1.82483e6 * np.sqrt(rho) / (eps * tk)**1.5
+    b = 50.2916 * np.sqrt(rho) / np.sqrt(eps * tk)
+    return a, b
+
+
+@functools.lru_cache()
+def _gamma_parameters(species):
+    """
+    Return the unique combinations of ion size (0 for the Davies equation) and charge of
+    `species`, the index of the combination of each species and the coefficient of the
+    term linear in the ionic strength of each species.
+    """
+    charges = [SPECIES[s].charge for s in species]
+    sizes = [SPECIES[s].gamma[0] if SPECIES[s].gamma else 0. for s in species]
+    b = np.array([SPECIES[s].gamma[1] if SPECIES[s].gamma else 0.1 * (z == 0) for s, z in zip(species, charges)])
+    size_charges, i_size_charge = np.unique(list(zip(sizes, np.square(charges))), axis=0, return_inverse=True)
+    return size_charges, i_size_charge.ravel(), b
+
+
+def log_gammas(species, ionic_strength, a_dh, b_dh):
+    """
+    Return the log10 of the activity coefficients of `species` (species x samples).
+    Uncharged species get 0.1 * I, charged species without ion size parameters
+    follow the Davies equation and the others the WATEQ Debye-Hückel equation.
+    """
+    size_charges, i_size_charge, b = _gamma_parameters(tuple(species))
+    sqrt_i = np.sqrt(ionic_strength)
+    # the Debye-Hückel term is calculated once per combination of ion size and charge
+    dh_terms = np.empty((len(size_charges), len(ionic_strength)))
+    for i, (size, charge_squared) in enumerate(size_charges):
+        if size == 0:
+            dh_terms[i] = -a_dh * charge_squared * (sqrt_i / (1 + sqrt_i) - 0.3 * ionic_strength)
+        else:
+            dh_terms[i] = -a_dh * charge_squared * sqrt_i / (1 + b_dh * size * sqrt_i)
+    log_g = dh_terms[i_size_charge]
+    for i in np.flatnonzero(b):
+        log_g[i] += b[i] * ionic_strength
+    return log_g
+
+
+class Speciation(object):
+    """
+    Result of `speciate`: molalities and activities of all species in `SPECIES`
+    for all samples.
+
+    Attributes
+    ----------
+    species : list
+        Names of the species (rows of `log_activities` and `molalities`).
+    log_activities : numpy.ndarray
+        log10 of the activities (species x samples).
+    molalities : numpy.ndarray
+        Molalities in mol/kgw (species x samples).
+    ionic_strength : numpy.ndarray
+        Ionic strength of each sample.
+    temp : numpy.ndarray
+        Temperature (°C) of each sample.
+    log_a_h2o : numpy.ndarray
+        log10 of the activity of water of each sample.
+    totals : dict
+        Total concentration (mol/L) of each component, and alkalinity (eq/L).
+    """
+    def __init__(self, log_activities, molalities, ionic_strength, temp, log_a_h2o, totals):
+        self.species = list(SPECIES)
+        self.log_activities = log_activities
+        self.molalities = molalities
+        self.ionic_strength = ionic_strength
+        self.temp = temp
+        self.log_a_h2o = log_a_h2o
+        self.totals = totals
+
+    def log_activity(self, species):
+        """ log10 of the activity of `species` for all samples """
+        return self.log_activities[self.species.index(species)]
+
+    def molality(self, species):
+        """ molality (mol/kgw) of `species` for all samples """
+        return self.molalities[self.species.index(species)]
+
+
+def speciate(df_in, pe=4., max_iterations=100, tolerance=1e-6, chunksize=10000):
+    """
+    Calculate the speciation of the major ions in all samples at once.
+
+    Parameters
+    ----------
+    df_in : pandas.DataFrame
+        DataFrame with the columns in `INPUT_COLUMNS` (in the units of the `SamplesFrame`,
+        with 0 for absent compounds).
+    pe : float, default 4.
+        pe of the samples, which determines the ratio of Fe(3) to Fe(2).
+    max_iterations : int, default 100
+        Maximum number of iterations.
+    tolerance : float, default 1e-6
+        Relative change in the activities of the components at which the iteration is stopped.
+    chunksize : int, default 10000
+        Number of samples that are solved together. Chunks keep the intermediate
+        arrays small enough to stay in the CPU cache.
+
+    Returns
+    -------
+    Speciation
+    """
+    chunks = [_speciate(df_in.iloc[start:start + chunksize], pe, max_iterations, tolerance)
+              for start in range(0, max(len(df_in), 1), chunksize)]
+    if len(chunks) == 1:
+        return chunks[0]
+    return Speciation(np.concatenate([c.log_activities for c in chunks], axis=1),
+                      np.concatenate([c.molalities for c in chunks], axis=1),
+                      np.concatenate([c.ionic_strength for c in chunks]),
+                      np.concatenate([c.temp for c in chunks]),
+                      np.concatenate([c.log_a_h2o for c in chunks]),
+                      {k: np.concatenate([c.totals[k] for c in chunks]) for k in chunks[0].totals})
+
+
+def _speciate(df_in, pe, max_iterations, tolerance):
+    """ Speciation of the samples in `df_in`, see `speciate` """
+    n_samples = len(df_in)
+    temp = df_in['temp'].values.astype(np.float64)
+    a_dh, b_dh = debye_huckel_constants(temp)
+
+    species = list(SPECIES)
+    components = list(COMPONENTS)
+    i_h = components.index('H+')
+    i_e = components.index('e-')
+    i_co3 = components.index('CO3-2')
+
+    # stoichiometry matrix (species x components) and log K (species x samples)
+    stoichiometry = np.zeros((len(species), len(components)))
+    log_ks = np.zeros((len(species), n_samples))
+    charges = np.array([SPECIES[s].charge for s in species], dtype=np.float64)
+    for i, name in enumerate(species):
+        for component, coefficient in SPECIES[name].stoichiometry.items():
+            stoichiometry[i, components.index(component)] = coefficient
+        for reaction in SPECIES[name].reactions:
+            log_ks[i] += log_k(reaction, temp)
+
+    # alkalinity of the species: only carbonate species, OH- and H+ contribute
+    is_carbonate = stoichiometry[:, i_co3] > 0
+    alkalinity_species = np.where(is_carbonate, 2 * stoichiometry[:, i_co3] - stoichiometry[:, i_h], 0)
+    alkalinity_species[species.index('OH-')] = 1
+    alkalinity_species[species.index('H+')] = -1
+    # species that take part in the mass balances (e- is not an aqueous species)
+    is_aqueous = np.array([s != 'e-' for s in species])
+
+    totals = np.zeros((len(components), n_samples))
+    for col, (component, molar_weight) in INPUT_COLUMNS.items():
+        if component is not None:
+            totals[components.index(component)] = df_in[col].values.astype(np.float64) / molar_weight / 1000.
+    alkalinity = totals[i_co3].copy()
+
+    log_a = np.full((len(components), n_samples), -99.)
+    with np.errstate(divide='ignore'):
+        log_a[:] = np.where(totals > 0, np.log10(totals), -99.)
+    log_a[i_h] = -df_in['ph'].values.astype(np.float64)
+    log_a[i_e] = -pe
+    # first guess of the carbonate activity: all alkalinity as HCO3-
+    log_a[i_co3] = np.where(alkalinity > 0,
+                            np.log10(np.maximum(alkalinity, 1e-99)) - log_k('CO3-2 + H+ = HCO3-', temp) - log_a[i_h],
+                            -99.)
+    has_carbon = alkalinity > 0
+
+    ionic_strength = 0.5 * (totals * np.array([SPECIES[c].charge for c in components])[:, None]**2).sum(axis=0)
+    # components of which the free activity follows from a mass balance
+    balanced = [c for c in components if c not in ('H+', 'e-', 'CO3-2')]
+    i_balanced = [components.index(c) for c in balanced]
+    has_component = totals[i_balanced] > 0
+
+    # the iteration works on copies of the arrays that are compacted to the samples that have not
+    # converged yet, once these are less than 3/4 of the samples (the others just iterate along)
+    active = np.arange(n_samples)
+    w_log_a, w_log_ks, w_totals, w_has_component = log_a, log_ks, totals[i_balanced], has_component
+    w_alkalinity, w_has_carbon, w_a_dh, w_b_dh = alkalinity, has_carbon, a_dh, b_dh
+    w_ionic_strength = ionic_strength
+    for iteration in range(max_iterations):
+        # molalities of all species, calculated in place to limit the number of temporary arrays
+        molalities = stoichiometry @ w_log_a
+        molalities += w_log_ks
+        molalities -= log_gammas(species, w_ionic_strength, w_a_dh, w_b_dh)
+        molalities *= np.log(10)
+        np.exp(molalities, out=molalities)
+        molalities[~is_aqueous] = 0.
+
+        log_a_new = w_log_a.copy()
+        # mass balances of the cations and anions
+        calculated_totals = stoichiometry[:, i_balanced].T @ molalities
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_a_new[i_balanced] += np.where(w_has_component, np.log10(w_totals / calculated_totals), 0.)
+        # alkalinity balance for carbonate, the carbonate alkalinity is proportional to a(CO3-2)
+        non_carbonate_alkalinity = (alkalinity_species * ~is_carbonate) @ molalities
+        carbonate_alkalinity = (alkalinity_species * is_carbonate) @ molalities
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_a_new[i_co3] = np.where(w_has_carbon,
+                                        w_log_a[i_co3] +
+                                        np.log10((w_alkalinity - non_carbonate_alkalinity) / carbonate_alkalinity),
+                                        -99.)
+        w_ionic_strength = 0.5 * (molalities * charges[:, None]**2).sum(axis=0)
+
+        # samples of which the change is NaN (inconsistent alkalinity) are not iterated further
+        with np.errstate(invalid='ignore'):
+            is_converged = ~(np.abs(log_a_new - w_log_a) >= tolerance / np.log(10)).any(axis=0)
+        w_log_a = log_a_new
+
+        n_converged = is_converged.sum()
+        if n_converged == len(active) or n_converged > len(active) / 4:
+            log_a[:, active] = w_log_a
+            ionic_strength[active] = w_ionic_strength
+            keep = ~is_converged
+            active = active[keep]
+            if len(active) == 0:
+                break
+            w_log_a, w_log_ks, w_totals = w_log_a[:, keep], w_log_ks[:, keep], w_totals[:, keep]
+            w_has_component, w_alkalinity, w_has_carbon = w_has_component[:, keep], w_alkalinity[keep], w_has_carbon[keep]
+            w_a_dh, w_b_dh, w_ionic_strength = w_a_dh[keep], w_b_dh[keep], w_ionic_strength[keep]
+    else:
+        log_a[:, active] = w_log_a
+        ionic_strength[active] = w_ionic_strength
+        logging.info(f'Analytic speciation of {len(active)} sample(s) did not converge ' +
+                     f'within {max_iterations} iterations.')
+
+    # samples with less alkalinity than the free H+ cannot be in equilibrium
+    is_invalid = has_carbon & ~np.isfinite(log_a[i_co3])
+    if any(is_invalid):
+        logging.warning(f'Alkalinity of {is_invalid.sum()} sample(s) is not consistent with their pH. ' +
+                        'Their carbonate species are set to NaN')
+        log_a[i_co3, is_invalid] = np.nan
+
+    log_g = log_gammas(species, ionic_strength, a_dh, b_dh)
+    log_activities = log_ks + stoichiometry @ log_a
+    molalities = np.where(is_aqueous[:, None], 10**(log_activities - log_g), 0.)
+    # absent species
+    is_absent = (stoichiometry[:, i_balanced] > 0).astype(int) @ (~has_component).astype(int) > 0
+    is_absent |= is_carbonate[:, None] & ~has_carbon
+    log_activities[is_absent] = -np.inf
+    molalities[is_absent] = 0.
+
+    log_a_h2o = np.log10(1 - 0.017 * molalities[is_aqueous].sum(axis=0))
+    totals = {c: totals[i] for i, c in enumerate(components) if c not in ('H+', 'e-', 'CO3-2')}
+    totals['alkalinity'] = alkalinity
+    return Speciation(log_activities, molalities, ionic_strength, temp, log_a_h2o, totals)
+
+
+def saturation_index(speciation, phase):
+    """
+    Calculate the saturation index of `phase` for all samples in `speciation`.
+
+    Parameters
+    ----------
+    speciation : Speciation
+        Result of `speciate`.
+    phase : str
+        One of the phases in `PHASES` (case insensitive).
+
+    Returns
+    -------
+    numpy.ndarray
+        The saturation index (log10 of the partial pressure for gases) of each sample.
+        Samples that do not contain one of the elements of the phase get -999.999, like in PHREEQC.
+    """
+    phases_lower = {p.lower(): p for p in PHASES}
+    try:
+        phase = PHASES[phases_lower[phase.lower()]]
+    except KeyError:
+        raise ValueError(f"Phase {phase} is not supported by the analytic model. " +
+                         f"Supported phases are {', '.join(PHASES)}. Use use_phreeqc=True for other phases.")
+
+    log_iap = phase.h2o * speciation.log_a_h2o
+    for species, coefficient in phase.stoichiometry.items():
+        log_iap = log_iap + coefficient * speciation.log_activity(species)
+    si = log_iap - log_k(phase.reaction, speciation.temp)
+    return np.where(np.isneginf(si), SI_ABSENT, si)
+
+
+def water_viscosity(temp):
+    """
+    Return the viscosity (mPa s) of pure water at temperature `temp` (°C), with the equations
+    of Kestin et al. (1978) below and above 20 °C.
+    """
+    temp = np.asarray(temp, dtype=np.float64)
+    dt = temp - 20.
+    log_ratio = np.where(temp < 20.,
+                         1301. / (998.333 + 8.1855 * dt + 0.00585 * dt**2) - 1.30223,
+                         (-1.3272 * dt - 0.001053 * dt**2) / (temp + 105.))
+    return 1.002 * 10**log_ratio
+
+
+def specific_conductance(speciation, reference_temp=None):
+    """
+    Calculate the specific conductance of all samples in `speciation`, like PHREEQC does.
+
+    The contribution of each ion follows from its diffusion coefficient (Nernst-Einstein),
+    decreased with its activity coefficient to account for the ionic strength. The temperature
+    dependence is that of the viscosity of water.
+
+    Parameters
+    ----------
+    speciation : Speciation
+        Result of `speciate`.
+    reference_temp : float, optional
+        Temperature (°C) to which the specific conductance is compensated, e.g. 20 or 25.
+        If None (the default), the specific conductance at the temperature of the sample is returned.
+
+    Returns
+    -------
+    numpy.ndarray
+        The specific conductance (μS/cm) of each sample.
+    """
+    species = list(DIFFUSION_COEFFICIENTS)
+    i_species = [speciation.species.index(s) for s in species]
+    charges = np.abs([SPECIES[s].charge for s in species]).astype(np.float64)[:, None]
+    diffusion_coefficients = np.array(list(DIFFUSION_COEFFICIENTS.values()))[:, None]
+
+    a_dh, b_dh = debye_huckel_constants(speciation.temp)
+    log_g = log_gammas(species, speciation.ionic_strength, a_dh, b_dh)
+    # at low ionic strength the activity correction of the conductivity is
+    # gamma**(0.6 / sqrt(z)), at high ionic strength gamma**(sqrt(I) / z)
+    exponent = np.where(speciation.ionic_strength < 0.36 * charges,
+                        0.6 / np.sqrt(charges), np.sqrt(speciation.ionic_strength) / charges)
+    conductivity = (speciation.molalities[i_species] * charges**2 * diffusion_coefficients *
+                    10**(exponent * log_g)).sum(axis=0)
+    # S/m at 25 °C to μS/cm at the temperature of the sample (or the reference temperature)
+    sc = conductivity * 1e3 * F**2 / (R * 1e3 * 298.15) * 1e4
+    temp = speciation.temp if reference_temp is None else reference_temp
+    return sc * water_viscosity(25.) / water_viscosity(temp)
@@ -0,0 +1,198 @@
+"""
+File-based batch processing of large tables of samples on several machines with a shared
+filesystem, without a scheduler. The work is done in three steps:
+
+1. `split` writes the samples in chunk files to a job directory.
+2. `run` processes chunks with a pipeline (see `hgc.pipeline`). Any number of workers, on any
+   machine that can access the job directory, can run at the same time: a worker claims a
+   chunk by creating its lock file, which is atomic, also on network filesystems.
+3. `merge` concatenates the outputs of the chunks in the order of the input.
+
+The job directory contains::
+
+    job.json                 the pipeline and the number of chunks
+    chunks/chunk_00000.csv   the input of the chunks
+    locks/chunk_00000.lock   the chunks that are claimed by a worker
+    output/chunk_00000.csv   the processed chunks
+"""
+import json
+import logging
+import os
+import socket
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from hgc import pipeline as hgc_pipeline
+
+_JOB_FILE = 'job.json'
+
+
+def _chunk_name(i):
+    return f'chunk_{i:05d}'
+
+
+def split(samples, directory, chunksize=10000, pipeline=None):
+    """
+    Write the samples in chunks to the job `directory`.
+
+    Parameters
+    ----------
+    samples : pandas.DataFrame, str or pathlib.Path
+        The samples or the file with the samples (see `hgc.pipeline.read_samples`).
+    directory : str or pathlib.Path
+        The job directory. It should not contain a job yet.
+    chunksize : int, default 10000
+        Number of samples per chunk.
+    pipeline : list, str or pathlib.Path, optional
+        The pipeline that the workers apply to the chunks, see `hgc.pipeline.parse_pipeline`.
+
+    Returns
+    -------
+    int
+        The number of chunks.
+    """
+    if chunksize < 1:
+        raise ValueError(f'chunksize should be a positive integer, not {chunksize}.')
+    directory = Path(directory)
+    if (directory / _JOB_FILE).exists():
+        raise ValueError(f'Directory {directory} already contains a job.')
+    steps = hgc_pipeline.parse_pipeline(pipeline)
+    if not isinstance(samples, pd.DataFrame):
+        samples = hgc_pipeline.read_samples(samples)
+
+    for subdirectory in ('chunks', 'locks', 'output'):
+        (directory / subdirectory).mkdir(parents=True, exist_ok=True)
+    n_chunks = -(-len(samples) // chunksize)
+    for i in range(n_chunks):
+        samples.iloc[i * chunksize:(i + 1) * chunksize].to_csv(
+            directory / 'chunks' / f'{_chunk_name(i)}.csv', index=False)
+    # the job file is written last, such that workers do not start on a partial job
+    job = {'n_chunks': n_chunks, 'pipeline': [{'method': method, 'kwargs': kwargs} for method, kwargs in steps]}
+    _write_atomic(directory / _JOB_FILE, json.dumps(job, indent=2))
+    logging.info(f'Split {len(samples)} samples in {n_chunks} chunks in {directory}')
+    return n_chunks
+
+
+def run(directory, stale_after=None, max_chunks=None):
+    """
+    Process chunks of the job in `directory` until all chunks are claimed.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The job directory, see `split`.
+    stale_after : float, optional
+        Time (s) after which the lock of a chunk without output is considered stale (e.g. because
+        the worker crashed), such that the chunk is processed again. By default locks are never stale.
+        If the original worker is still running, both workers process the chunk, which results in the
+        same output.
+    max_chunks : int, optional
+        Maximum number of chunks to process by this worker.
+
+    Returns
+    -------
+    list of int
+        The chunks that were processed by this worker.
+    """
+    directory = Path(directory)
+    job = _read_job(directory)
+    processed = []
+    for i in range(job['n_chunks']):
+        if max_chunks is not None and len(processed) >= max_chunks:
+            break
+        name = _chunk_name(i)
+        output = directory / 'output' / f'{name}.csv'
+        if output.exists() or not _claim(directory / 'locks' / f'{name}.lock', stale_after):
+            continue
+        if output.exists():
+            # finished by another worker between the check and the claim
+            continue
+        start = time.perf_counter()
+        df = pd.read_csv(directory / 'chunks' / f'{name}.csv')
+        hgc_pipeline.run_pipeline(df, job['pipeline'])
+        _write_atomic(output, df.to_csv(index=False))
+        logging.info(f'Processed {name} ({len(df)} samples) in {time.perf_counter() - start:.1f} s')
+        processed.append(i)
+    return processed
+
+
+def merge(directory, output=None):
+    """
+    Concatenate the outputs of all chunks of the job in `directory` in the order of the input.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        The job directory, see `split`.
+    output : str or pathlib.Path, optional
+        File to write the result to (see `hgc.pipeline.write_samples`).
+
+    Returns
+    -------
+    pandas.DataFrame
+        The processed samples.
+
+    Raises
+    ------
+    ValueError
+        If not all chunks have been processed.
+    """
+    directory = Path(directory)
+    job = _read_job(directory)
+    paths = [directory / 'output' / f'{_chunk_name(i)}.csv' for i in range(job['n_chunks'])]
+    missing = [path.stem for path in paths if not path.exists()]
+    if missing:
+        raise ValueError(f"{len(missing)} of {len(paths)} chunks have not been processed yet: {', '.join(missing[:10])}")
+    df = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+    if output is not None:
+        hgc_pipeline.write_samples(df, output)
+    return df
+
+
+def status(directory):
+    """ Return the number of chunks of the job in `directory` that are 'total', 'claimed' and 'done' """
+    directory = Path(directory)
+    job = _read_job(directory)
+    return {'total': job['n_chunks'],
+            'claimed': len(list((directory / 'locks').glob('*.lock'))),
+            'done': len(list((directory / 'output').glob('*.csv')))}
+
+
+def _read_job(directory):
+    path = directory / _JOB_FILE
+    if not path.exists():
+        raise ValueError(f'Directory {directory} does not contain a job, use split first.')
+    return json.loads(path.read_text())
+
+
+def _claim(lock, stale_after=None):
+    """ Create the file `lock` and return True, or return False if it exists and is not stale """
+    try:
+        fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        if stale_after is None:
+            return False
+        try:
+            age = time.time() - lock.stat().st_mtime
+        except FileNotFoundError:
+            age = 0.
+        if age < stale_after:
+            return False
+        logging.warning(f'Lock {lock} is stale (age {age:.0f} s), it is claimed again')
+        try:
+            lock.unlink()
+        except FileNotFoundError:
+            pass
+        return _claim(lock)
+    with os.fdopen(fd, 'w') as f:
+        f.write(f'{socket.gethostname()} {os.getpid()}\n')
+    return True
+
+
+def _write_atomic(path, content):
+    """ Write `content` to a temporary file and move it to `path`, such that `path` is never incomplete """
+    tmp = path.with_name(f'.{path.name}.{socket.gethostname()}.{os.getpid()}.tmp')
+    tmp.write_text(content)
+    os.replace(tmp, path)
@@ -0,0 +1,160 @@
+"""
+Checkpointing of (long-running) `SamplesFrame` calculations. Results are
+written per row to a local SQLite file, keyed by the index labels (with their type) and
+a hash of the input columns of that row. A calculation that is restarted with
+the same checkpoint file only computes the rows that are still missing.
+"""
+import logging
+import sqlite3
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def hash_rows(df):
+    """
+    Return a hash for every row of `df`, based on the values of the row only (not the index).
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame of which the rows are hashed.
+
+    Returns
+    -------
+    numpy.ndarray
+        int64 array with one hash per row of `df`.
+    """
+    # sort the columns such that the hash does not depend on the column order
+    df = df[sorted(df.columns)]
+    return pd.util.hash_pandas_object(df, index=False).values.view(np.int64)
+
+
+def _index_keys(index):
+    """ Return the key of every label of `index`, which includes its type (e.g. 1 and '1' differ) """
+    return pd.Index([repr(_python_scalar(label)) for label in index.tolist()])
+
+
+def _python_scalar(label):
+    if isinstance(label, tuple):
+        return tuple(_python_scalar(level) for level in label)
+    # numpy scalars have a version dependent repr
+    return label.item() if isinstance(label, np.generic) else label
+
+
+class Checkpoint(object):
+    """
+    Local SQLite store with the results of `SamplesFrame` methods per row.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path of the SQLite file. It is created if it does not exist.
+    flush_every : int, default 100
+        Number of rows that are computed before the results are written to file.
+
+    Examples
+    --------
+    Calculate the saturation index of calcite, which can be resumed after a crash::
+
+        df.hgc.get_saturation_index('Calcite', checkpoint='si_calcite.sqlite')
+
+        # or with more control on the number of rows computed between writes
+        from hgc.checkpoint import Checkpoint
+        checkpoint = Checkpoint('si_calcite.sqlite', flush_every=1000)
+        df.hgc.get_saturation_index('Calcite', checkpoint=checkpoint)
+    """
+    _TABLE = 'results'
+
+    def __init__(self, path, flush_every=100):
+        if flush_every < 1:
+            raise ValueError(f'flush_every should be a positive integer, got {flush_every}')
+        self.path = Path(path)
+        self.flush_every = int(flush_every)
+        with self._connect() as con:
+            con.execute(f"CREATE TABLE IF NOT EXISTS {self._TABLE} ("
+                        "key TEXT NOT NULL, "
+                        "col TEXT NOT NULL, "
+                        "idx TEXT NOT NULL, "
+                        "row_hash INTEGER NOT NULL, "
+                        "value, "
+                        "PRIMARY KEY (key, col, idx))")
+
+    @contextmanager
+    def _connect(self):
+        """ Connection that commits (or rolls back on an error) and is closed at the end of the with-block """
+        with closing(sqlite3.connect(self.path)) as con, con:
+            yield con
+
+    def load(self, key, index, row_hashes):
+        """
+        Load the stored results of calculation `key` for the rows in `index`.
+
+        Parameters
+        ----------
+        key : str
+            Identifier of the calculation (method and its arguments).
+        index : pandas.Index
+            Index of the rows for which the results are requested.
+        row_hashes : numpy.ndarray
+            Hash of the input of each row in `index` (see `hash_rows`).
+
+        Returns
+        -------
+        tuple of (pandas.DataFrame, numpy.ndarray, numpy.ndarray)
+            The stored results (a column per result column, NaN for rows
+            that are not stored), a boolean array indicating which rows are
+            missing and a boolean array indicating which rows are stored, but
+            with a different hash than `row_hashes` (i.e. their input has changed).
+        """
+        with self._connect() as con:
+            df_stored = pd.read_sql_query(
+                f"SELECT col, idx, row_hash, value FROM {self._TABLE} WHERE key = ?",
+                con, params=(key,))
+
+        index_keys = _index_keys(index)
+        if df_stored.empty:
+            results = pd.DataFrame(index=index)
+            is_missing = np.ones(len(index), dtype=bool)
+            is_changed = np.zeros(len(index), dtype=bool)
+            return results, is_missing, is_changed
+
+        stored_hashes = (df_stored.drop_duplicates('idx').set_index('idx')['row_hash']
+                         .reindex(index_keys))
+        is_missing = stored_hashes.isna().values
+        is_changed = ~is_missing & (stored_hashes.values != row_hashes)
+
+        results = (df_stored.pivot(index='idx', columns='col', values='value')
+                   .reindex(index_keys)
+                   .infer_objects())
+        results.index = index
+        results.columns.name = None
+        return results, is_missing, is_changed
+
+    def store(self, key, results, row_hashes):
+        """
+        Write the results of calculation `key` to the checkpoint file.
+
+        Parameters
+        ----------
+        key : str
+            Identifier of the calculation (method and its arguments).
+        results : pandas.DataFrame
+            Results with a column per result column and the index of the `SamplesFrame`.
+        row_hashes : numpy.ndarray
+            Hash of the input of each row in `results`.
+        """
+        index_keys = _index_keys(results.index)
+        records = []
+        for col in results.columns:
+            values = results[col].astype(object).where(results[col].notna(), None)
+            records.extend(zip([key] * len(results), [str(col)] * len(results),
+                               index_keys, row_hashes.tolist(), values))
+
+        with self._connect() as con:
+            con.executemany(f"INSERT OR REPLACE INTO {self._TABLE} "
+                            "(key, col, idx, row_hash, value) VALUES (?, ?, ?, ?, ?)",
+                            records)
+        logging.debug(f'Wrote {len(results)} rows of {key} to checkpoint {self.path}')
@@ -0,0 +1,106 @@
+"""
+Command line interface of HGC, installed as the command ``hgc``. Run ``hgc --help`` for the
+available commands.
+"""
+import argparse
+import json
+import logging
+
+from hgc import batch
+from hgc.pipeline import process_file, read_samples
+
+
+def _run(args):
+    read_kwargs = {'skiprows': args.skiprows} if args.skiprows else {}
+    stats = process_file(args.input, args.output, pipeline=args.pipeline, n_jobs=args.jobs,
+                         chunksize=args.chunksize, **read_kwargs)
+    logging.info(f"Processed {stats['rows']} samples in {stats['seconds']:.2f} s "
+                 f"({stats['rows_per_second']:.0f} rows/s)")
+    total = sum(stats['timings'].values())
+    for stage, seconds in stats['timings'].items():
+        logging.info(f"  {stage:<32} {seconds:9.2f} s {100 * seconds / total if total else 0.:5.1f} %")
+
+
+def _batch_split(args):
+    read_kwargs = {'skiprows': args.skiprows} if args.skiprows else {}
+    samples = read_samples(args.input, **read_kwargs)
+    batch.split(samples, args.directory, chunksize=args.chunksize, pipeline=args.pipeline)
+
+
+def _batch_run(args):
+    processed = batch.run(args.directory, stale_after=args.stale_after, max_chunks=args.max_chunks)
+    logging.info(f'Processed {len(processed)} chunk(s)')
+
+
+def _batch_merge(args):
+    batch.merge(args.directory, args.output)
+
+
+def _batch_status(args):
+    print(json.dumps(batch.status(args.directory)))
+
+
+def build_parser():
+    """ Return the argparse.ArgumentParser of the ``hgc`` command """
+    parser = argparse.ArgumentParser(prog='hgc', description='Correction, validation and analysis of '
+                                                             'ground water quality samples.')
+    parser.add_argument('-v', '--verbose', action='store_true', help='show debug messages')
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    run = commands.add_parser('run', help='apply a pipeline to a file with samples',
+                              description='Apply a pipeline of SamplesFrame methods to the samples in a file. The '
+                                          'samples are read, processed and written in chunks. The throughput and '
+                                          'the time per stage (summed over the processes) are reported at the end.')
+    run.add_argument('input', help='file with samples (.csv, .xlsx, .xls or .parquet)')
+    run.add_argument('output', help='output file (.csv, .xlsx or .parquet)')
+    run.add_argument('--pipeline', help='JSON file or string with the pipeline (default: hgc.pipeline.DEFAULT_PIPELINE)')
+    run.add_argument('-j', '--jobs', type=int, default=1,
+                     help='number of processes, negative values count back from the number of CPUs (default 1)')
+    run.add_argument('--chunksize', type=int, default=10000, help='number of samples per chunk (default 10000)')
+    run.add_argument('--skiprows', type=int, nargs='*', help='rows of the input to skip, e.g. a row with units')
+    run.set_defaults(function=_run)
+
+    batch_parser = commands.add_parser('batch', help='process a large table of samples with several workers',
+                                       description=batch.__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    batch_commands = batch_parser.add_subparsers(dest='batch_command', metavar='step', required=True)
+
+    split = batch_commands.add_parser('split', help='split the samples in chunks in a job directory')
+    split.add_argument('input', help='file with samples (.csv, .xlsx, .xls or .parquet)')
+    split.add_argument('directory', help='job directory')
+    split.add_argument('--chunksize', type=int, default=10000, help='number of samples per chunk (default 10000)')
+    split.add_argument('--pipeline', help='JSON file or string with the pipeline (default: hgc.pipeline.DEFAULT_PIPELINE)')
+    split.add_argument('--skiprows', type=int, nargs='*', help='rows of the input to skip, e.g. a row with units')
+    split.set_defaults(function=_batch_split)
+
+    batch_run = batch_commands.add_parser('run', help='process chunks until all chunks are claimed')
+    batch_run.add_argument('directory', help='job directory')
+    batch_run.add_argument('--stale-after', type=float,
+                           help='time (s) after which the lock of an unfinished chunk is stale')
+    batch_run.add_argument('--max-chunks', type=int, help='maximum number of chunks to process')
+    batch_run.set_defaults(function=_batch_run)
+
+    merge = batch_commands.add_parser('merge', help='concatenate the processed chunks')
+    merge.add_argument('directory', help='job directory')
+    merge.add_argument('output', help='output file (.csv, .xlsx or .parquet)')
+    merge.set_defaults(function=_batch_merge)
+
+    status = batch_commands.add_parser('status', help='show the number of claimed and processed chunks')
+    status.add_argument('directory', help='job directory')
+    status.set_defaults(function=_batch_status)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    try:
+        args.function(args)
+    except (ValueError, FileNotFoundError) as error:
+        logging.error(error)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
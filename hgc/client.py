@@ -0,0 +1,101 @@
+"""
+Client of the local compute server `hgc.server`. The methods of the client mirror the phreeqc
+methods of the `SamplesFrame`, with the DataFrame as first argument, and return the result
+(like inplace=False) with the index of the DataFrame.
+"""
+import http.client
+import json
+import math
+import socket
+from urllib.parse import urlparse
+
+import hgc  # noqa: F401, registers the hgc accessor
+from hgc.server import decode_result
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """ HTTPConnection over a Unix socket """
+    def __init__(self, socket_path, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class Client(object):
+    """
+    Client of a running `hgc.server`.
+
+    Parameters
+    ----------
+    url : str, default 'http://127.0.0.1:8765'
+        Address of the server.
+    socket_path : str or pathlib.Path, optional
+        Path of the Unix socket of the server. If given, `url` is ignored.
+    timeout : float, default 60
+        Timeout (s) of a request.
+
+    Examples
+    --------
+    ::
+
+        client = hgc.client.Client()
+        si_calcite = client.get_saturation_index(df, 'Calcite')
+    """
+    def __init__(self, url='http://127.0.0.1:8765', socket_path=None, timeout=60):
+        self.url = urlparse(url)
+        self.socket_path = None if socket_path is None else str(socket_path)
+        self.timeout = timeout
+
+    def _connection(self):
+        if self.socket_path is not None:
+            return _UnixHTTPConnection(self.socket_path, self.timeout)
+        return http.client.HTTPConnection(self.url.hostname, self.url.port, timeout=self.timeout)
+
+    def _request(self, method, path, content=None):
+        connection = self._connection()
+        try:
+            body = None if content is None else json.dumps(content)
+            connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            result = json.loads(response.read())
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise ValueError(f"The hgc server could not handle the request: {result.get('error')}")
+        return result
+
+    def health(self):
+        """ Return the status of the server, as dict with 'status' and the number of calculated 'batches' """
+        return self._request('GET', '/health')
+
+    def _call(self, method_name, df, **kwargs):
+        df_in = df[df.hgc.hgc_cols]
+        samples = [{col: (None if isinstance(value, float) and math.isnan(value) else value)
+                    for col, value in sample.items()}
+                   for sample in df_in.to_dict(orient='records')]
+        result = self._request('POST', f'/{method_name}', {'samples': samples, 'kwargs': kwargs})
+        return decode_result(result['result'], df.index)
+
+    def get_saturation_index(self, df, mineral_or_gas, **kwargs):
+        """ Return the saturation index of the samples in `df`, see `SamplesFrame.get_saturation_index` """
+        return self._call('get_saturation_index', df, mineral_or_gas=mineral_or_gas, **kwargs)
+
+    def get_partial_pressure(self, df, gas, **kwargs):
+        """ Return the partial pressure of the samples in `df`, see `SamplesFrame.get_partial_pressure` """
+        return self._call('get_partial_pressure', df, gas=gas, **kwargs)
+
+    def get_specific_conductance(self, df, **kwargs):
+        """ Return the specific conductance of the samples in `df`, see `SamplesFrame.get_specific_conductance` """
+        return self._call('get_specific_conductance', df, **kwargs)
+
+    def get_ionic_strength(self, df, **kwargs):
+        """ Return the ionic strength of the samples in `df`, see `SamplesFrame.get_ionic_strength` """
+        return self._call('get_ionic_strength', df, **kwargs)
+
+    def equilibrate_phases(self, df, phases, **kwargs):
+        """ Return the samples in `df` after equilibration, see `SamplesFrame.equilibrate_phases` """
+        return self._call('equilibrate_phases', df, phases=phases, **kwargs)
@@ -0,0 +1,124 @@
+"""
+Resolution of the columns of a DataFrame to HGC-columns ("features"): the atoms, ions and
+properties of `hgc.constants`. The list of HGC-columns and their order are computed once.
+Lab exports often use other headers (e.g. 'pH', 'EC', 'HCO3' or 'Calcium'), which are mapped
+to HGC-columns with an alias table, see `resolve_columns` and `SamplesFrame.resolve_aliases`.
+"""
+import re
+from functools import lru_cache
+
+from hgc.constants import constants
+
+# aliases of HGC-columns. The aliases are matched case-insensitive and without a unit between brackets
+# at the end, e.g. 'Calcium (mg/l)' matches 'calcium'. Extend the table with `add_aliases`.
+DEFAULT_ALIASES = {
+    'ph': 'ph', 'zuurgraad': 'ph',
+    'ec': 'ec', 'egv': 'ec', 'conductivity': 'ec', 'electrical conductivity': 'ec', 'geleidbaarheid': 'ec',
+    'temperature': 'temp', 'temperatuur': 'temp', 'temp': 'temp',
+    'hco3': 'alkalinity', 'bicarbonate': 'alkalinity', 'waterstofcarbonaat': 'alkalinity',
+    'alkalinity': 'alkalinity', 'alkaliniteit': 'alkalinity',
+    'calcium': 'Ca', 'magnesium': 'Mg', 'sodium': 'Na', 'natrium': 'Na', 'potassium': 'K', 'kalium': 'K',
+    'iron': 'Fe', 'ijzer': 'Fe', 'manganese': 'Mn', 'mangaan': 'Mn',
+    'ammonium': 'NH4', 'nh4+': 'NH4', 'chloride': 'Cl', 'cl-': 'Cl',
+    'sulfate': 'SO4', 'sulphate': 'SO4', 'sulfaat': 'SO4',
+    'nitrate': 'NO3', 'nitraat': 'NO3', 'nitrite': 'NO2', 'nitriet': 'NO2',
+    'phosphate': 'PO4', 'fosfaat': 'PO4', 'fluoride': 'F', 'silica': 'SiO2', 'silicate': 'SiO2',
+    'oxygen': 'O2', 'dissolved oxygen': 'O2', 'zuurstof': 'O2', 'methane': 'CH4', 'methaan': 'CH4',
+    'doc': 'doc', 'toc': 'toc',
+}
+
+_aliases = dict(DEFAULT_ALIASES)
+
+# a unit between brackets at the end of a header, e.g. ' (mg/l)' or ' [uS/cm]'
+_UNIT_PATTERN = re.compile(r'\s*[(\[][^)\]]*[)\]]\s*$')
+
+
+@lru_cache(maxsize=None)
+def hgc_columns():
+    """ Return the HGC-columns (atoms, ions and properties, without duplicates) as tuple """
+    return tuple(dict.fromkeys(list(constants.atoms) + list(constants.ions) + list(constants.properties)))
+
+
+@lru_cache(maxsize=None)
+def column_index():
+    """ Return the HGC-columns as dict {column: position}, for fast lookups in the order of `hgc_columns` """
+    return {col: i for i, col in enumerate(hgc_columns())}
+
+
+def select_hgc_columns(columns):
+    """ Return the HGC-columns in `columns` (e.g. a pandas.Index) as list, in the order of `hgc_columns` """
+    index = column_index()
+    return sorted((col for col in columns if isinstance(col, str) and col in index), key=index.__getitem__)
+
+
+def normalize_header(header):
+    """ Return the header in the form of the keys of the alias table: lower case, without a unit at the end """
+    return _UNIT_PATTERN.sub('', str(header)).strip().lower()
+
+
+def aliases():
+    """ Return a copy of the alias table {alias: HGC-column} """
+    return dict(_aliases)
+
+
+def add_aliases(mapping):
+    """
+    Add aliases to the alias table (or replace them).
+
+    Parameters
+    ----------
+    mapping : dict
+        {alias: HGC-column}, e.g. {'Ca2+': 'Ca', 'Bicarbonaat': 'alkalinity'}.
+
+    Raises
+    ------
+    ValueError
+        If a column is not an HGC-column.
+    """
+    _aliases.update(_validated(mapping))
+
+
+def reset_aliases():
+    """ Restore the alias table to `DEFAULT_ALIASES` """
+    _aliases.clear()
+    _aliases.update(DEFAULT_ALIASES)
+
+
+def _validated(mapping):
+    index = column_index()
+    invalid = [col for col in mapping.values() if col not in index]
+    if invalid:
+        raise ValueError(f"Invalid HGC-column(s) {', '.join(map(str, invalid))} in aliases.")
+    return {normalize_header(alias): col for alias, col in mapping.items()}
+
+
+def resolve_columns(columns, aliases=None):
+    """
+    Map the columns of a DataFrame to HGC-columns.
+
+    Parameters
+    ----------
+    columns : iterable of str
+        The columns, e.g. `df.columns`.
+    aliases : dict, optional
+        Aliases {alias: HGC-column} in addition to the alias table.
+
+    Returns
+    -------
+    dict
+        {column: HGC-column} of the columns that are an HGC-column or an alias of one. An alias
+        is not used if the HGC-column is in `columns` itself or is the alias of an earlier column.
+    """
+    index = column_index()
+    table = {**_aliases, **_validated(aliases)} if aliases else _aliases
+    columns = list(columns)
+    resolved = {col: col for col in columns if isinstance(col, str) and col in index}
+    used = set(resolved.values())
+    for col in columns:
+        if col in resolved:
+            continue
+        feature = table.get(normalize_header(col))
+        if feature is not None and feature not in used:
+            resolved[col] = feature
+            used.add(feature)
+    return resolved
@@ -0,0 +1,122 @@
+"""
+PhreeqPython instances ("engines") per thermodynamic database. Loading a database takes
+time, so the engines are kept in a pool and reused. Every engine is used by one thread
+at a time; engines of different databases (or several engines of the same database) can
+run concurrently, since phreeqc releases the GIL while it calculates.
+
+The asynchronous methods of the `SamplesFrame` (e.g. `aget_saturation_index`) run in a
+bounded thread pool, see `executor`.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import phreeqpython
+from phreeqpython import PhreeqPython
+
+# the database that PhreeqPython uses by default
+DEFAULT_DATABASE = 'vitens.dat'
+DATABASE_DIRECTORY = Path(phreeqpython.__file__).parent / 'database'
+
+
+def database_path(database=None):
+    """
+    Return the path of a phreeqc database.
+
+    Parameters
+    ----------
+    database : str or pathlib.Path, optional
+        Name of a database that comes with phreeqpython (e.g. 'phreeqc.dat'), or the path of
+        a database file. By default `DEFAULT_DATABASE`.
+
+    Returns
+    -------
+    pathlib.Path
+    """
+    if database is None:
+        database = DEFAULT_DATABASE
+    path = Path(database)
+    if not path.is_file():
+        path = DATABASE_DIRECTORY / database
+    if not path.is_file():
+        available = ', '.join(sorted(p.name for p in DATABASE_DIRECTORY.glob('*.dat')))
+        raise FileNotFoundError(f'Database {database} not found. It should be the path of a database file or '
+                                f'one of the databases of phreeqpython: {available}.')
+    return path.resolve()
+
+
+def new_engine(database=None):
+    """ Return a new PhreeqPython instance with `database` (see `database_path`) """
+    path = database_path(database)
+    pp = PhreeqPython(database=path.name, database_directory=path.parent)
+    # phreeqpython does not check whether the database could be loaded
+    if pp.ip.phc_database_error_count:
+        raise ValueError(f'Database {path} could not be loaded by phreeqc: {pp.ip.get_error_string()}')
+    return pp
+
+
+class EnginePool(object):
+    """
+    Thread-safe pool of PhreeqPython instances per database.
+
+    Examples
+    --------
+    ::
+
+        with pool.engine('phreeqc.dat') as pp:
+            solution = pp.add_solution({'Ca': 1, 'Alkalinity': 2})
+            si_calcite = solution.si('Calcite')
+            solution.forget()
+
+    Solutions should be forgotten before the engine is returned to the pool.
+    """
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def engine(self, database=None):
+        """ Context manager that takes an engine with `database` from the pool and returns it afterwards """
+        path = database_path(database)
+        with self._lock:
+            idle = self._idle.setdefault(path, [])
+            pp = idle.pop() if idle else None
+        if pp is None:
+            pp = new_engine(path)
+        try:
+            yield pp
+        finally:
+            with self._lock:
+                self._idle[path].append(pp)
+
+
+# pool that is shared by all SamplesFrames
+pool = EnginePool()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """
+    Return the thread pool in which the asynchronous `SamplesFrame` methods run. It has
+    one thread per CPU, unless changed with `set_max_workers`.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(os.cpu_count() or 1, thread_name_prefix='hgc')
+        return _executor
+
+
+def set_max_workers(max_workers):
+    """ Replace the thread pool of `executor` by one with `max_workers` threads """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            # running calculations are finished in the old pool
+            _executor.shutdown(wait=False)
+        _executor = ThreadPoolExecutor(max_workers, thread_name_prefix='hgc')
@@ -0,0 +1,129 @@
+"""
+Evaluation of a single sample without pandas, for applications with low latency
+requirements (e.g. a web service that evaluates one sample per request). The phreeqc
+input is built from column metadata that is computed once, and the PhreeqPython
+instance comes from the pool in `hgc.engine`, so a call only costs the phreeqc
+calculation itself.
+"""
+import math
+from functools import lru_cache
+
+from hgc import engine
+from hgc.constants import constants
+
+# outputs that are properties of the phreeqpython solution
+_SOLUTION_PROPERTIES = {
+    'ph': lambda solution: solution.pH,
+    'sc': lambda solution: solution.sc,
+    'ionic_strength': lambda solution: solution.I,
+}
+
+# columns that define the same element, in order of preference (see SamplesFrame.select_phreeq_columns)
+_DUPLICATE_COLUMNS = (('N', 'NO2', 'NO3'), ('P', 'PO4'))
+
+
+@lru_cache(maxsize=None)
+def phreeqc_inputs():
+    """
+    Return the phreeqc input of every HGC-column that is passed to phreeqc, as dict
+    {column: (phreeqc name, unit and 'as' string)}, like `SamplesFrame.get_phreeqpython_solutions`.
+    """
+    inputs = {}
+    for col, property_ in constants.properties.items():
+        inputs[col] = (property_.phreeq_name, '')
+    for col, ion in constants.ions.items():
+        inputs[col] = (ion.phreeq_name, f"{ion.unit} {ion.phreeq_concentration_as or ''}")
+    for col, atom in constants.atoms.items():
+        inputs[col] = (atom.feature, atom.unit)
+    # phreeqc cannot cope with μ, so replace with u
+    return {col: (name.strip(), unit_as.replace('μ', 'u').strip())
+            for col, (name, unit_as) in inputs.items() if name is not None}
+
+
+def evaluate_sample(sample, outputs=('si_Calcite', 'sc'), database=None, equilibrate_with=None):
+    """
+    Calculate properties of a single sample with phreeqc.
+
+    Parameters
+    ----------
+    sample : dict
+        Values of the HGC-columns of the sample (e.g. {'ph': 7.5, 'temp': 10, 'Ca': 40, ...}),
+        in the units of the `SamplesFrame`. Keys that are not HGC-columns and values that are
+        None, NaN or zero are ignored (like in `SamplesFrame.get_phreeqpython_solutions`).
+        The keys 'ph' and 'temp' are required.
+    outputs : sequence of str, default ('si_Calcite', 'sc')
+        Properties to calculate: 'ph', 'sc', 'ionic_strength', and 'si_<phase>' or 'pp_<gas>' for the
+        saturation index of a mineral or the partial pressure of a gas (the name of the phase as in
+        the database, e.g. 'si_Calcite' or 'pp_CO2(g)').
+    database : str or pathlib.Path, optional
+        Name or path of the phreeqc database, see `hgc.engine.database_path`.
+    equilibrate_with : str, optional
+        Name (as in phreeqc, e.g. 'Na' or 'Cl') of the ion that is adjusted for charge balance.
+
+    Returns
+    -------
+    dict
+        The value of each of the `outputs`.
+
+    Examples
+    --------
+    ::
+
+        result = hgc.evaluate_sample({'ph': 7.6, 'temp': 11, 'Ca': 48, 'alkalinity': 156, 'Na': 15, 'Cl': 27},
+                                     outputs=['si_Calcite', 'pp_CO2(g)', 'sc'])
+    """
+    for output in outputs:
+        if output not in _SOLUTION_PROPERTIES and not output.startswith(('si_', 'pp_')):
+            raise ValueError(f"Invalid output {output}. Outputs should be one of {', '.join(_SOLUTION_PROPERTIES)} "
+                             "or start with si_ or pp_.")
+
+    with engine.pool.engine(database) as pp:
+        solution = pp.add_solution(_solution_input(sample, equilibrate_with))
+        try:
+            return {output: (_SOLUTION_PROPERTIES[output](solution) if output in _SOLUTION_PROPERTIES
+                             else solution.si(output[3:]))
+                    for output in outputs}
+        finally:
+            solution.forget()
+
+
+def _solution_input(sample, equilibrate_with=None):
+    """ Return the phreeqpython input of `sample`, see `evaluate_sample` """
+    inputs = phreeqc_inputs()
+    values = {}
+    temp = None
+    for col, value in sample.items():
+        if col not in inputs or value is None:
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'Invalid value {value!r} for {col}, only numeric values are allowed.')
+        if value < 0 and (col in constants.atoms or col in constants.ions):
+            raise ValueError(f'Negative concentration {value} for {col}.')
+        if col == 'temp':
+            temp = value
+        if value > 0 and not math.isnan(value):
+            values[col] = value
+
+    if 'ph' not in values:
+        raise ValueError('The sample should have a non-zero value for ph.')
+    if temp is None or math.isnan(temp):
+        # otherwise phreeqc silently uses its default temperature
+        raise ValueError('The sample should have a value for temp.')
+    values['temp'] = temp
+    for cols in _DUPLICATE_COLUMNS:
+        # only the preferred column of an element is used
+        present = [col for col in cols if col in values]
+        for col in present[1:]:
+            del values[col]
+
+    _sol = {'units': 'mg/l'}
+    for col, value in values.items():
+        phreeq_name, unit_as = inputs[col]
+        _sol[phreeq_name] = f"{value} {unit_as}".strip()
+    if equilibrate_with is not None:
+        # like SamplesFrame._charge_balanced, with the measured concentration as initial guess
+        measured, *unit_as = _sol.get(equilibrate_with, '20').split(maxsplit=1)
+        _sol[equilibrate_with] = f"{measured} {unit_as[0] if unit_as else 'mg/L'} charge"
+    return _sol
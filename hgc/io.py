@@ -0,0 +1,335 @@
+"""
+Reading and writing of samples in Parquet files, and reading of lab exports in Excel workbooks
+(see `read_lab_workbook`). In Parquet files the HGC-columns are stored with a tight dtype, and
+the units of the HGC-columns, the values that were below or above the detection limit
+(censoring, see `SamplesFrame.make_valid`) and the choices of `SamplesFrame.consolidate` are
+stored in the metadata of the Arrow schema under the key ``hgc``.
+
+Parquet support requires pyarrow (``pip install hgc[parquet]``).
+"""
+import json
+import logging
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from hgc.columns import select_hgc_columns
+from hgc.constants import constants
+
+# key of the HGC metadata in the Arrow schema
+METADATA_KEY = b'hgc'
+METADATA_VERSION = 1
+
+
+def _import_pyarrow():
+    """ Return the pyarrow module, or raise an ImportError with installation instructions """
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('Parquet support of hgc requires pyarrow, install it with pip install hgc[parquet] '
+                          'or pip install pyarrow.')
+    return pyarrow
+
+
+def _import_pyarrow_parquet():
+    _import_pyarrow()
+    import pyarrow.parquet
+    return pyarrow.parquet
+
+
+def hgc_metadata(df):
+    """
+    Return the HGC metadata of the samples in `df`: the units of the HGC-columns and the
+    censoring and consolidation that are recorded in `df.attrs` by `SamplesFrame.make_valid` and
+    `SamplesFrame.consolidate`. The censored values are given by the positions of their rows in `df`.
+    """
+    attrs = df.attrs.get('hgc', {})
+    censoring = {col: col_censoring for col, col_censoring in attrs.get('censoring', {}).items() if col in df.columns}
+    if censoring and not df.index.is_unique:
+        logging.warning('The censoring of the samples is dropped, since the index of the samples is not unique.')
+        censoring = {}
+    return {
+        'version': METADATA_VERSION,
+        'units': {col: constants.units(col) for col in select_hgc_columns(df.columns)},
+        # the censoring refers to index labels, rows that are not in df (anymore) are left out
+        'censoring': {col: {key: [int(position) for position in np.flatnonzero(df.index.isin(value))]
+                            if key in ('below', 'above') else value
+                            for key, value in col_censoring.items()}
+                      for col, col_censoring in censoring.items()},
+        'consolidation': dict(attrs.get('consolidation', {})),
+    }
+
+
+def to_table(df, float_dtype='float32', preserve_index=None):
+    """
+    Return the samples in `df` as pyarrow.Table with the HGC metadata (see `hgc_metadata`).
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The samples.
+    float_dtype : str or None, default 'float32'
+        Dtype of the numeric HGC-columns. Lab measurements rarely have more than 4 significant
+        digits, so float32 halves the size without loss of information. Use None to keep the dtypes.
+    preserve_index : bool, optional
+        Store the index, see pyarrow.Table.from_pandas.
+    """
+    pa = _import_pyarrow()
+    if float_dtype is not None:
+        cols = [col for col in select_hgc_columns(df.columns) if pd.api.types.is_numeric_dtype(df[col])]
+        if cols:
+            df = df.astype({col: float_dtype for col in cols})
+    table = pa.Table.from_pandas(df, preserve_index=preserve_index)
+    metadata = dict(table.schema.metadata or {})
+    metadata[METADATA_KEY] = json.dumps(hgc_metadata(df)).encode()
+    return table.replace_schema_metadata(metadata)
+
+
+def to_parquet(df, path, float_dtype='float32', compression='zstd', preserve_index=None, **kwargs):
+    """
+    Write the samples in `df` to a Parquet file with the HGC metadata.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The samples.
+    path : str or pathlib.Path
+        The Parquet file.
+    float_dtype : str or None, default 'float32'
+        Dtype of the numeric HGC-columns, see `to_table`.
+    compression : str, default 'zstd'
+        Compression of the Parquet file.
+    preserve_index : bool, optional
+        Store the index, see pyarrow.Table.from_pandas.
+    **kwargs :
+        Passed to pyarrow.parquet.write_table.
+    """
+    pq = _import_pyarrow_parquet()
+    pq.write_table(to_table(df, float_dtype=float_dtype, preserve_index=preserve_index), path,
+                   compression=compression, **kwargs)
+
+
+def read_parquet(path, columns=None, filters=None, hgc_columns=False):
+    """
+    Read samples from a Parquet file. Only the requested columns and the row groups that match
+    `filters` are read from the file.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The Parquet file.
+    columns : list of str, optional
+        Columns to read. By default all columns.
+    filters : list of tuples, optional
+        Filters on the rows, e.g. [('ph', '>', 7)], see pyarrow.parquet.read_table.
+    hgc_columns : bool, default False
+        Read the HGC-columns (in addition to `columns`, if given).
+
+    Returns
+    -------
+    pandas.DataFrame
+        The samples, with the HGC metadata in `df.attrs['hgc']`. The censoring is dropped when
+        `filters` are used, since it refers to the positions of the rows in the file.
+    """
+    pq = _import_pyarrow_parquet()
+    if hgc_columns:
+        names = pq.read_schema(path).names
+        columns = list(dict.fromkeys((columns or []) + select_hgc_columns(names)))
+    table = pq.read_table(path, columns=columns, filters=filters, use_pandas_metadata=True)
+    df = table.to_pandas()
+
+    metadata = (table.schema.metadata or {}).get(METADATA_KEY)
+    if metadata is not None:
+        metadata = json.loads(metadata)
+        censoring = {col: col_censoring for col, col_censoring in metadata.get('censoring', {}).items()
+                     if col in df.columns}
+        if filters is not None and censoring:
+            logging.info('The censoring of the samples is dropped, since the rows are filtered.')
+            censoring = {}
+        # the positions of the censored rows in the file to index labels, like make_valid records them
+        censoring = {col: {key: df.index[np.asarray(value, dtype=int)] if key in ('below', 'above') else value
+                           for key, value in col_censoring.items()}
+                     for col, col_censoring in censoring.items()}
+        df.attrs['hgc'] = {'units': {col: unit for col, unit in metadata.get('units', {}).items() if col in df.columns},
+                           'censoring': censoring,
+                           'consolidation': metadata.get('consolidation', {})}
+    return df
+
+
+# units per quantity, as factor of the first unit. The units are compared case-insensitive with u for μ.
+_UNIT_FACTORS = (
+    {'mg/l': 1., 'g/l': 1e3, 'ug/l': 1e-3, 'ng/l': 1e-6, 'ppm': 1., 'ppb': 1e-3},
+    {'us/cm': 1., 'ms/cm': 1e3, 'ms/m': 10., 's/m': 1e4},
+    {'mmol/l': 1., 'mol/l': 1e3, 'umol/l': 1e-3},
+)
+
+
+def _normalize_unit(unit):
+    return unit.strip().replace('μ', 'u').replace('µ', 'u').lower()
+
+
+def unit_factor(unit, col):
+    """
+    Return the factor that converts values in `unit` (e.g. 'ug/L') to the unit of the HGC-column
+    `col` (see `hgc.constants.constants.units`).
+
+    Raises
+    ------
+    ValueError
+        If `unit` cannot be converted to the unit of `col`.
+    """
+    target = constants.units(col)
+    # the unit can be followed by the compound it is expressed as, e.g. 'mg/L NO3'
+    target = _normalize_unit(target.split()[0]) if target.strip() else target
+    unit = _normalize_unit(unit)
+    if unit == target:
+        return 1.
+    for factors in _UNIT_FACTORS:
+        if unit in factors and target in factors:
+            return factors[unit] / factors[target]
+    raise ValueError(f'Unit {unit} cannot be converted to the unit {constants.units(col)} of column {col}.')
+
+
+def read_lab_workbook(path, mapping, sheet_name=0, header=0, skiprows=None, index_col=None):
+    """
+    Read the samples of a lab export in an Excel workbook. The sheet is read row by row (in
+    read-only mode for .xlsx files), only the columns in `mapping` are kept, they are renamed
+    to HGC-columns and converted to the units of HGC.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The workbook (.xlsx, .xlsm or .xls).
+    mapping : dict
+        The columns to read, as {header in the sheet: column} or {header in the sheet: (column, unit)}.
+        Values of HGC-columns with a unit are converted to the unit of HGC (see `unit_factor`),
+        including detection limits like '<5'.
+    sheet_name : str or int, default 0
+        Name or position of the sheet.
+    header : int, default 0
+        Row (0-indexed, after `skiprows`) with the headers.
+    skiprows : list of int, optional
+        Rows (0-indexed) to skip, e.g. rows with units or detection limits.
+    index_col : str, optional
+        Column (after renaming) to use as index.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The samples, to be validated with `SamplesFrame.make_valid`.
+
+    Examples
+    --------
+    ::
+
+        df = hgc.read_lab_workbook('analyse_bas.xls', sheet_name='labab', skiprows=[0, 1, 3],
+                                   mapping={'labcode': 'labcode', 'pH': 'ph', 'EC': 'ec', 'HCO3': 'alkalinity',
+                                            'Ca': 'Ca', 'Mn': ('Mn', 'ug/L'), 'P': ('PO4', 'ug/L')},
+                                   index_col='labcode')
+    """
+    columns, factors = {}, {}
+    for source, target in mapping.items():
+        if isinstance(target, (tuple, list)):
+            target, unit = target
+            factors[target] = unit_factor(unit, target)
+        columns[source] = target
+
+    skiprows = set(skiprows or [])
+    with _open_sheet(path, sheet_name) as iter_rows:
+        # the header is read first, such that only the columns up to the last mapped column are read
+        rows = ((i, row) for i, row in enumerate(iter_rows()) if i not in skiprows)
+        for _ in range(header):
+            next(rows, None)
+        header_row, headers = next(rows, (None, None))
+        rows.close()
+        if headers is None:
+            raise ValueError(f'Sheet {sheet_name} of {path} has no header row.')
+        headers = [None if value is None else str(value).strip() for value in headers]
+        missing = [source for source in columns if source not in headers]
+        if missing:
+            raise ValueError(f"Column(s) {', '.join(map(str, missing))} not found in the headers of sheet "
+                             f"{sheet_name} of {path}.")
+        positions = [headers.index(source) for source in columns]
+        data = _read_columns(iter_rows(min_row=header_row + 1, max_col=max(positions) + 1), positions,
+                             skiprows, header_row + 1, list(columns.values()),
+                             factors)
+
+    df = pd.DataFrame(data)
+    if index_col is not None:
+        df = df.set_index(index_col)
+    return df
+
+
+def _read_columns(rows, positions, skiprows, first_row, targets, factors):
+    """ Return the values at `positions` of `rows` (starting at row `first_row`) as {target: list of values} """
+    data = {target: [] for target in targets}
+    for i, row in enumerate(rows, start=first_row):
+        if i in skiprows:
+            continue
+        values = [row[position] if position < len(row) else None for position in positions]
+        if all(value is None or value == '' for value in values):
+            continue
+        for target, value in zip(targets, values):
+            if value == '':
+                value = None
+            elif target in factors and factors[target] != 1. and value is not None:
+                value = _scale(value, factors[target])
+            data[target].append(value)
+    return data
+
+
+def _scale(value, factor):
+    """ Return `value` (a number, a detection limit like '<5' or another string) multiplied by `factor` """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value * factor
+    text = str(value).strip()
+    sign = text[0] if text[:1] in ('<', '>') else ''
+    try:
+        return f'{sign}{float(text[len(sign):].strip()) * factor:g}' if sign else float(text) * factor
+    except ValueError:
+        # invalid values are handled by make_valid
+        return value
+
+
+def _xls_value(cell, datemode):
+    """ Return the value of an xlrd cell like openpyxl: None if empty, int for integral numbers """
+    import xlrd
+    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK):
+        return None
+    if cell.ctype == xlrd.XL_CELL_DATE:
+        return xlrd.xldate.xldate_as_datetime(cell.value, datemode)
+    if cell.ctype == xlrd.XL_CELL_NUMBER and cell.value.is_integer():
+        return int(cell.value)
+    return cell.value
+
+
+@contextmanager
+def _open_sheet(path, sheet_name):
+    """
+    Context manager that opens a sheet of a workbook and returns a function iter_rows(min_row=0, max_col=None)
+    that iterates over the rows (from `min_row`, 0-indexed) as tuples of values.
+    """
+    if str(path).lower().endswith('.xls'):
+        import xlrd
+        book = xlrd.open_workbook(path, on_demand=True)
+        sheet = book.sheet_by_name(sheet_name) if isinstance(sheet_name, str) else book.sheet_by_index(sheet_name)
+
+        def iter_rows(min_row=0, max_col=None):
+            for i in range(min_row, sheet.nrows):
+                yield tuple(_xls_value(cell, book.datemode) for cell in sheet.row_slice(i, 0, max_col))
+        try:
+            yield iter_rows
+        finally:
+            book.release_resources()
+    else:
+        import openpyxl
+        book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        sheet = book[sheet_name] if isinstance(sheet_name, str) else book.worksheets[sheet_name]
+
+        def iter_rows(min_row=0, max_col=None):
+            return sheet.iter_rows(min_row=min_row + 1, max_col=max_col, values_only=True)
+        try:
+            yield iter_rows
+        finally:
+            book.close()
@@ -0,0 +1,269 @@
+"""
+Precomputed lookup tables of saturation indices for fast, approximate screening of large
+data sets. A table is calculated once with PHREEQC on a regular grid of master variables
+(temperature, pH, Ca, alkalinity, SO4 and ionic strength) and saved as a NumPy file that can
+be memory mapped. Saturation indices of samples are then obtained by multilinear interpolation
+in this table, see the argument `lookup_table` of `SamplesFrame.get_saturation_index`.
+
+The ionic strength is represented by the background ionic strength: the ionic strength of the
+total concentrations of the major ions (without complexation) other than Ca, alkalinity and SO4.
+On the grid, it is set with NaCl. Concentrations are interpolated on a logarithmic scale, the
+background ionic strength on a square root scale and temperature and pH on a linear scale.
+
+The error bound that is estimated when the table is built only applies to the interpolation.
+Samples also differ from the grid solutions by ions that are not in the master variables
+(e.g. complexation of carbonate with Mg), which adds an error that is typically below 0.05
+for fresh groundwater.
+"""
+import itertools
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from hgc import analytic, engine
+from hgc.constants.constants import mw
+
+# the master variables of the table, in the units of the SamplesFrame (mol/L for the
+# ionic strength), and the scale on which they are interpolated
+MASTER_VARIABLES = {
+    'temp': 'linear',
+    'ph': 'linear',
+    'Ca': 'log',
+    'alkalinity': 'log',
+    'SO4': 'log',
+    'background_ionic_strength': 'sqrt',
+}
+
+DEFAULT_GRID = {
+    'temp': np.linspace(0., 30., 7),
+    'ph': np.linspace(5., 9.5, 10),
+    'Ca': np.logspace(0., 2.7, 7),
+    'alkalinity': np.logspace(0., 3., 7),
+    'SO4': np.logspace(-1., 3., 7),
+    'background_ionic_strength': np.linspace(0., np.sqrt(0.2), 6)**2,
+}
+
+# charge of the major ions for the ionic strength of the total concentrations
+_CHARGES = {'Ca': 2, 'Mg': 2, 'Na': 1, 'K': 1, 'Fe': 2, 'Mn': 2, 'NH4': 1,
+            'SO4': 2, 'Cl': 1, 'NO3': 1, 'alkalinity': 1}
+
+
+def background_ionic_strength(df_in):
+    """
+    Return the ionic strength (mol/L) of the total concentrations of the major ions in `df_in`
+    (without complexation), except Ca, alkalinity and SO4. Absent columns count as zero.
+    """
+    total = np.zeros(len(df_in))
+    for col, charge in _CHARGES.items():
+        if col in df_in and col not in MASTER_VARIABLES:
+            molar_weight = analytic.INPUT_COLUMNS[col][1]
+            total = total + df_in[col].values.astype(np.float64) / molar_weight / 1000. * charge**2
+    return 0.5 * total
+
+
+class SaturationIndexTable(object):
+    """
+    Saturation indices of phases on a regular grid of master variables.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Saturation indices with shape (number of phases, *shape of the grid). NaN for grid
+        points at which PHREEQC did not converge; points in cells with such a corner are
+        treated as outside the grid.
+    phases : list of str
+        Names of the phases.
+    grid : dict
+        Grid points (1-D increasing arrays) of each of the `MASTER_VARIABLES`.
+    error_bound : dict, optional
+        Maximum interpolation error of each phase, estimated when the table was built.
+    database : str, optional
+        Name of the phreeqc database of the saturation indices, `hgc.engine.DEFAULT_DATABASE` by default.
+
+    Examples
+    --------
+    Build a table once (which takes a few minutes for the default grid) and save it::
+
+        from hgc.lookup import SaturationIndexTable
+        table = SaturationIndexTable.build(phases=['Calcite', 'Gypsum'])
+        table.save('si_table')
+
+    and use it for a large DataFrame::
+
+        table = SaturationIndexTable.load('si_table')
+        df.hgc.get_saturation_index('Calcite', lookup_table=table)
+    """
+    _CHUNKSIZE = 32768
+
+    def __init__(self, values, phases, grid, error_bound=None, database=None):
+        self.values = values
+        self.phases = list(phases)
+        self.grid = {var: np.asarray(grid[var], dtype=np.float64) for var in MASTER_VARIABLES}
+        self.error_bound = dict(error_bound) if error_bound is not None else {}
+        self.database = database or engine.DEFAULT_DATABASE
+
+    @classmethod
+    def build(cls, phases=('Calcite', 'Gypsum'), grid=None, n_validation=200, seed=0, database=None):
+        """
+        Calculate the saturation indices of `phases` with PHREEQC on all points of `grid`.
+
+        Parameters
+        ----------
+        phases : list of str, default ('Calcite', 'Gypsum')
+            Names of the phases as in the PHREEQC database.
+        grid : dict, optional
+            Grid points of each of the `MASTER_VARIABLES`, `DEFAULT_GRID` by default.
+        n_validation : int, default 200
+            Number of random points in the grid at which the interpolation is compared with
+            PHREEQC to estimate the error bound.
+        seed : int, default 0
+            Seed of the random validation points.
+        database : str or pathlib.Path, optional
+            The phreeqc database (see `hgc.engine.database_path`), by default `hgc.engine.DEFAULT_DATABASE`.
+
+        Returns
+        -------
+        SaturationIndexTable
+        """
+        grid = {var: np.asarray((grid or DEFAULT_GRID)[var], dtype=np.float64) for var in MASTER_VARIABLES}
+        pp = engine.new_engine(database)
+        points = pd.DataFrame(list(itertools.product(*grid.values())), columns=list(MASTER_VARIABLES))
+        logging.info(f'Calculating saturation indices of {len(points)} grid points with phreeqc')
+        shape = tuple(len(axis) for axis in grid.values())
+        values = _phreeqc_saturation_indices(pp, points, phases).reshape((len(phases),) + shape)
+        table = cls(values.astype(np.float32), phases, grid, database=engine.database_path(database).name)
+
+        if n_validation:
+            # random points in the grid, uniformly distributed on the interpolation scale
+            rng = np.random.default_rng(seed)
+            points = pd.DataFrame({
+                var: _from_scale(rng.uniform(*_to_scale(grid[var][[0, -1]], scale), n_validation), scale)
+                for var, scale in MASTER_VARIABLES.items()})
+            si_phreeqc = _phreeqc_saturation_indices(pp, points, phases)
+            for i, phase in enumerate(phases):
+                si_table, _ = table.interpolate(points, phase)
+                error = np.abs(si_table - si_phreeqc[i])
+                table.error_bound[phase] = float(np.nanmax(error, initial=0.))
+            logging.info(f'Estimated interpolation error bound: {table.error_bound}')
+        return table
+
+    def save(self, path):
+        """
+        Write the table to `path` with suffix .npy (the saturation indices) and .json (grid and metadata).
+        """
+        path = Path(path)
+        np.save(path.with_suffix('.npy'), self.values)
+        metadata = {
+            'phases': self.phases,
+            'grid': {var: axis.tolist() for var, axis in self.grid.items()},
+            'error_bound': self.error_bound,
+            'database': self.database,
+        }
+        path.with_suffix('.json').write_text(json.dumps(metadata, indent=2))
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Read a table that was written with `save`.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path of the table, with or without suffix.
+        mmap_mode : {None, 'r', 'r+', 'c'}, default 'r'
+            Memory map mode of the saturation indices, see `numpy.load`.
+        """
+        path = Path(path)
+        metadata = json.loads(path.with_suffix('.json').read_text())
+        values = np.load(path.with_suffix('.npy'), mmap_mode=mmap_mode)
+        # tables without a database were built with the default database
+        return cls(values, metadata['phases'], metadata['grid'], metadata['error_bound'], metadata.get('database'))
+
+    def interpolate(self, points, phase):
+        """
+        Interpolate the saturation index of `phase` at `points`.
+
+        Parameters
+        ----------
+        points : pandas.DataFrame or dict
+            Values of the `MASTER_VARIABLES` (columns) of the points.
+        phase : str
+            Name of the phase (case insensitive).
+
+        Returns
+        -------
+        tuple of (numpy.ndarray, numpy.ndarray)
+            The interpolated saturation indices and a boolean array indicating which points
+            are in the grid. The saturation index of points outside the grid is NaN.
+        """
+        phases_lower = [p.lower() for p in self.phases]
+        if phase.lower() not in phases_lower:
+            raise ValueError(f'Phase {phase} is not in the lookup table. Phases in the table are {", ".join(self.phases)}.')
+        values = self.values[phases_lower.index(phase.lower())]
+
+        n_points = len(next(iter(points.values()))) if isinstance(points, dict) else len(points)
+        columns = {var: np.asarray(points[var], dtype=np.float64) for var in MASTER_VARIABLES}
+        axes = {var: _to_scale(self.grid[var], scale) for var, scale in MASTER_VARIABLES.items()}
+
+        # offsets of all corners of a cell in the flattened table, the first dimension varying slowest
+        strides = [stride // values.itemsize for stride in values.strides]
+        offsets = np.array([sum(corner) for corner in itertools.product(*[(0, stride) for stride in strides])])
+        flat_values = np.asarray(values).ravel()
+
+        si = np.empty(n_points)
+        is_in_grid = np.ones(n_points, dtype=bool)
+        for start in range(0, n_points, self._CHUNKSIZE):
+            chunk = slice(start, start + self._CHUNKSIZE)
+            base, fractions = 0, []
+            for (var, scale), stride in zip(MASTER_VARIABLES.items(), strides):
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    x = _to_scale(columns[var][chunk], scale)
+                axis = axes[var]
+                is_in_grid[chunk] &= (x >= axis[0]) & (x <= axis[-1])
+                i = np.clip(np.searchsorted(axis, x, side='right') - 1, 0, len(axis) - 2)
+                base = base + i * stride
+                fractions.append(np.clip((x - axis[i]) / np.diff(axis)[i], 0., 1.).astype(values.dtype))
+
+            # values at the corners, reduced by linear interpolation along one dimension at a time
+            corners = flat_values[offsets[:, np.newaxis] + base]
+            for fraction in fractions:
+                lower, upper = corners[:len(corners) // 2], corners[len(corners) // 2:]
+                corners = lower + fraction * (upper - lower)
+            si[chunk] = corners[0]
+        si[~is_in_grid] = np.nan
+        return si, is_in_grid & ~np.isnan(si)
+
+
+def _to_scale(x, scale):
+    return {'linear': lambda x: x, 'log': np.log10, 'sqrt': np.sqrt}[scale](x)
+
+
+def _from_scale(x, scale):
+    return {'linear': lambda x: x, 'log': lambda x: 10**x, 'sqrt': np.square}[scale](x)
+
+
+def _phreeqc_saturation_indices(pp, points, phases):
+    """ Return the saturation indices (phases x points) of the solutions defined by the master variables in `points` """
+    si = np.full((len(phases), len(points)), np.nan)
+    for i, point in enumerate(points.itertuples(index=False)):
+        # NaCl for the background ionic strength
+        try:
+            solution = pp.add_solution({
+                'units': 'mg/l',
+                'temp': point.temp,
+                'pH': point.ph,
+                'Ca': point.Ca,
+                'Alkalinity': f'{point.alkalinity} as HCO3',
+                'S(6)': f'{point.SO4} as SO4',
+                'Na': point.background_ionic_strength * mw('Na') * 1000.,
+                'Cl': point.background_ionic_strength * mw('Cl') * 1000.,
+            })
+        except Exception:
+            # no convergence, e.g. high alkalinity at low pH: the cell is left out of the table
+            continue
+        si[:, i] = [solution.si(phase) for phase in phases]
+        solution.forget()
+    return si
@@ -0,0 +1,75 @@
+"""
+Parallel execution of `SamplesFrame` methods. The rows of the DataFrame are split in chunks
+that are processed in separate processes. Every process has its own PhreeqPython instance,
+since phreeqc solutions cannot be shared between processes.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+def effective_n_jobs(n_jobs):
+    """
+    Return the number of processes for `n_jobs`. Negative values count back from the
+    number of CPUs, e.g. -1 uses all CPUs and -2 all but one.
+    """
+    if not n_jobs:
+        raise ValueError(f'n_jobs should be a positive or negative integer, not {n_jobs}.')
+    if n_jobs < 0:
+        return max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+    return n_jobs
+
+
+def map_chunks(df, method_name, n_jobs=-1, chunksize=None, aligned=None, database=None, **kwargs):
+    """
+    Call `df.hgc.<method_name>(**kwargs)` for chunks of rows of `df` in parallel processes
+    and concatenate the results.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        DataFrame with HGC-columns.
+    method_name : str
+        Name of the `SamplesFrame` method. The method should return a pandas object with
+        the rows of the chunk (so inplace=False should be passed if applicable).
+    n_jobs : int, default -1
+        Number of processes, see `effective_n_jobs`.
+    chunksize : int, optional
+        Number of rows per chunk. By default the rows are divided evenly over the processes.
+    aligned : dict, optional
+        Keyword arguments of the method with a pandas object with the same rows as `df`,
+        which is split in the same chunks.
+    database : str or pathlib.Path, optional
+        The phreeqc database of the processes (see `hgc.engine.database_path`), by default the
+        default database of PhreeqPython.
+    **kwargs :
+        Other keyword arguments of the method, passed to all chunks.
+
+    Returns
+    -------
+    pandas.Series or pandas.DataFrame
+        The concatenated results of the chunks, in the order of the rows of `df`.
+    """
+    n_jobs = effective_n_jobs(n_jobs)
+    aligned = aligned or {}
+    if chunksize is None:
+        chunksize = max(-(-len(df) // n_jobs), 1)
+
+    if database is not None:
+        # the processes do not share the engine of the SamplesFrame, they get one for the database from their pool
+        kwargs['database'] = database
+    if n_jobs == 1 or len(df) <= chunksize:
+        return _call_method(df, method_name, {**kwargs, **aligned})
+
+    with ProcessPoolExecutor(n_jobs) as executor:
+        futures = []
+        for start in range(0, len(df), chunksize):
+            chunk = slice(start, start + chunksize)
+            chunk_kwargs = {**kwargs, **{key: value.iloc[chunk] for key, value in aligned.items()}}
+            futures.append(executor.submit(_call_method, df.iloc[chunk], method_name, chunk_kwargs))
+        return pd.concat([future.result() for future in futures])
+
+
+def _call_method(df, method_name, kwargs):
+    return getattr(df.hgc, method_name)(**kwargs)
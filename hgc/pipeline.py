@@ -0,0 +1,290 @@
+"""
+Pipelines of `SamplesFrame` methods. A pipeline is a list of steps that are applied to a
+DataFrame in order, which can be stored as JSON, e.g.::
+
+    [
+        "make_valid",
+        {"method": "consolidate", "kwargs": {"use_so4": null}},
+        {"method": "get_saturation_index", "kwargs": {"mineral_or_gas": "Calcite"}},
+        "get_specific_conductance",
+        "get_stuyfzand_water_type"
+    ]
+
+A step is the name of a method or a dict with the name of the method and its keyword
+arguments. Pipelines are used by the command line interface (see `hgc.cli`), which applies
+them to a file with `process_file`.
+"""
+import json
+import logging
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+import hgc  # noqa: F401, registers the hgc accessor
+from hgc import io as hgc_io
+from hgc import parallel
+
+# methods that can be used in a pipeline, they modify the DataFrame in place
+PIPELINE_METHODS = (
+    'make_valid', 'consolidate', 'fillna_concentrations', 'fillna_ec',
+    'get_bex', 'get_ratios', 'get_stuyfzand_water_type', 'get_dominant_cations', 'get_dominant_anions',
+    'get_ion_balance', 'get_sum_anions', 'get_sum_cations',
+    'get_saturation_index', 'get_partial_pressure', 'get_specific_conductance', 'get_ionic_strength',
+)
+
+DEFAULT_PIPELINE = [
+    'make_valid',
+    {'method': 'consolidate', 'kwargs': {'use_ph': 'field', 'use_ec': 'lab', 'use_so4': None, 'use_o2': None,
+                                         'use_temp': None}},
+    {'method': 'get_saturation_index', 'kwargs': {'mineral_or_gas': 'Calcite'}},
+    'get_specific_conductance',
+    'get_stuyfzand_water_type',
+]
+
+
+def parse_pipeline(pipeline=None):
+    """
+    Return the steps of a pipeline as list of tuples (method name, kwargs).
+
+    Parameters
+    ----------
+    pipeline : list, str or pathlib.Path, optional
+        The steps of the pipeline, a JSON string of the steps, or the path of a JSON file
+        with the steps. By default `DEFAULT_PIPELINE`.
+
+    Raises
+    ------
+    ValueError
+        If a step is invalid or uses a method that is not in `PIPELINE_METHODS`.
+    """
+    if pipeline is None:
+        pipeline = DEFAULT_PIPELINE
+    elif isinstance(pipeline, Path) or (isinstance(pipeline, str) and not pipeline.lstrip().startswith('[')):
+        pipeline = Path(pipeline).read_text()
+    if isinstance(pipeline, str):
+        pipeline = json.loads(pipeline)
+
+    steps = []
+    for step in pipeline:
+        if isinstance(step, str):
+            step = {'method': step}
+        if not isinstance(step, dict) or 'method' not in step or set(step) - {'method', 'kwargs'}:
+            raise ValueError(f"Invalid pipeline step {step!r}. A step should be the name of a method or a dict with "
+                             "keys 'method' and (optionally) 'kwargs'.")
+        if step['method'] not in PIPELINE_METHODS:
+            raise ValueError(f"Invalid method {step['method']} in pipeline. Methods should be one of "
+                             f"{', '.join(PIPELINE_METHODS)}.")
+        steps.append((step['method'], dict(step.get('kwargs') or {})))
+    return steps
+
+
+def run_pipeline(df, pipeline=None, timings=None):
+    """
+    Apply the steps of a pipeline to `df` in place.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The samples.
+    pipeline : list, str or pathlib.Path, optional
+        The pipeline, see `parse_pipeline`.
+    timings : dict, optional
+        If given, the time (s) of every step is added to it, with key '<index>:<method name>'.
+
+    Returns
+    -------
+    pandas.DataFrame
+        `df`, for convenience.
+    """
+    for i, (method_name, kwargs) in enumerate(parse_pipeline(pipeline)):
+        start = time.perf_counter()
+        getattr(df.hgc, method_name)(**kwargs)
+        if timings is not None:
+            key = f'{i}:{method_name}'
+            timings[key] = timings.get(key, 0.) + time.perf_counter() - start
+    return df
+
+
+def read_samples(path, **kwargs):
+    """
+    Read a table of samples from a CSV (.csv), Excel (.xlsx, .xls) or Parquet (.parquet) file.
+    The `kwargs` are passed to the pandas read function.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        return pd.read_csv(path, **kwargs)
+    if suffix in ('.xlsx', '.xls'):
+        return pd.read_excel(path, **kwargs)
+    if suffix == '.parquet':
+        return hgc_io.read_parquet(path, **kwargs)
+    raise ValueError(f'Unsupported file type {suffix} of {path}, use a .csv, .xlsx, .xls or .parquet file.')
+
+
+def write_samples(df, path):
+    """ Write a table of samples to a CSV (.csv), Excel (.xlsx) or Parquet (.parquet) file, without the index """
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        df.to_csv(path, index=False)
+    elif suffix == '.xlsx':
+        df.to_excel(path, index=False)
+    elif suffix == '.parquet':
+        hgc_io.to_parquet(df, path, preserve_index=False)
+    else:
+        raise ValueError(f'Unsupported file type {suffix} of {path}, use a .csv, .xlsx or .parquet file.')
+    logging.debug(f'Wrote {len(df)} samples to {path}')
+
+
+def iter_samples(path, chunksize=10000, **kwargs):
+    """
+    Iterate over the samples in a CSV, Excel or Parquet file (see `read_samples`) in DataFrames of
+    `chunksize` rows. CSV and Parquet files are read in chunks, Excel files are read at once.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == '.csv':
+        # the rows of the chunks continue the index, like read_csv without chunksize
+        yield from pd.read_csv(path, chunksize=chunksize, **kwargs)
+    elif suffix == '.parquet':
+        pq = hgc_io._import_pyarrow_parquet()
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, **kwargs):
+            yield batch.to_pandas()
+    else:
+        df = read_samples(path, **kwargs)
+        for start in range(0, len(df), chunksize):
+            yield df.iloc[start:start + chunksize]
+
+
+class SamplesWriter(object):
+    """
+    Writes a table of samples in chunks to a CSV (.csv), Excel (.xlsx) or Parquet (.parquet) file.
+    CSV and Parquet files are written incrementally, an Excel file is written when the writer is closed.
+    The columns of all chunks are those of the first chunk.
+
+    Examples
+    --------
+    ::
+
+        with SamplesWriter('output.csv') as writer:
+            for df in iter_samples('input.csv'):
+                writer.write(df)
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.suffix = self.path.suffix.lower()
+        if self.suffix not in ('.csv', '.xlsx', '.parquet'):
+            raise ValueError(f'Unsupported file type {self.suffix} of {path}, use a .csv, .xlsx or .parquet file.')
+        self.columns = None
+        self.n_rows = 0
+        self._chunks = []
+        self._parquet_writer = None
+
+    def write(self, df):
+        """ Append the samples in `df` to the file """
+        if self.columns is None:
+            self.columns = list(df.columns)
+        df = df.reindex(columns=self.columns)
+        if self.suffix == '.csv':
+            df.to_csv(self.path, index=False, header=self.n_rows == 0, mode='w' if self.n_rows == 0 else 'a')
+        elif self.suffix == '.parquet':
+            pa = hgc_io._import_pyarrow()
+            if self._parquet_writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                self._parquet_writer = hgc_io._import_pyarrow_parquet().ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(df, schema=self._parquet_writer.schema, preserve_index=False)
+            self._parquet_writer.write_table(table)
+        else:
+            self._chunks.append(df)
+        self.n_rows += len(df)
+
+    def close(self):
+        """ Finish the file """
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if self.suffix == '.xlsx' and self._chunks:
+            pd.concat(self._chunks).to_excel(self.path, index=False)
+            self._chunks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def process_file(input, output, pipeline=None, n_jobs=1, chunksize=10000, **kwargs):
+    """
+    Apply a pipeline to the samples in the file `input` in chunks and write the results to `output`
+    while the next chunks are processed.
+
+    Parameters
+    ----------
+    input : str or pathlib.Path
+        File with samples, see `iter_samples`.
+    output : str or pathlib.Path
+        File to write the processed samples to, see `SamplesWriter`.
+    pipeline : list, str or pathlib.Path, optional
+        The pipeline, see `parse_pipeline`.
+    n_jobs : int, default 1
+        Number of processes, see `hgc.parallel.effective_n_jobs`.
+    chunksize : int, default 10000
+        Number of samples per chunk.
+    **kwargs :
+        Passed to the pandas read function.
+
+    Returns
+    -------
+    dict
+        Statistics of the run: 'rows', 'seconds', 'rows_per_second' and 'timings', the total time (s)
+        of reading, writing and each step of the pipeline (summed over the chunks and processes).
+    """
+    steps = [{'method': method, 'kwargs': step_kwargs} for method, step_kwargs in parse_pipeline(pipeline)]
+    n_jobs = parallel.effective_n_jobs(n_jobs)
+    timings = {'read': 0., **{f'{i}:{step["method"]}': 0. for i, step in enumerate(steps)}, 'write': 0.}
+    start = time.perf_counter()
+
+    def write(writer, result):
+        df, chunk_timings = result
+        for key, value in chunk_timings.items():
+            timings[key] += value
+        start_write = time.perf_counter()
+        writer.write(df)
+        timings['write'] += time.perf_counter() - start_write
+        logging.debug(f'Wrote {writer.n_rows} samples to {output}')
+
+    chunks = iter_samples(input, chunksize=chunksize, **kwargs)
+
+    def next_chunk():
+        start_read = time.perf_counter()
+        df = next(chunks, None)
+        timings['read'] += time.perf_counter() - start_read
+        return df
+
+    with SamplesWriter(output) as writer:
+        if n_jobs == 1:
+            while (df := next_chunk()) is not None:
+                write(writer, _process_chunk(df, steps))
+        else:
+            with ProcessPoolExecutor(n_jobs) as executor:
+                # at most two chunks per process are read ahead, the results are written in order
+                futures = deque()
+                while (df := next_chunk()) is not None:
+                    futures.append(executor.submit(_process_chunk, df, steps))
+                    if len(futures) >= 2 * n_jobs:
+                        write(writer, futures.popleft().result())
+                while futures:
+                    write(writer, futures.popleft().result())
+
+    seconds = time.perf_counter() - start
+    return {'rows': writer.n_rows, 'seconds': seconds, 'rows_per_second': writer.n_rows / seconds if seconds else 0.,
+            'timings': timings}
+
+
+def _process_chunk(df, steps):
+    timings = {}
+    run_pipeline(df, steps, timings=timings)
+    return df, timings
+
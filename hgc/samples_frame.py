@@ -6,15 +6,106 @@ for validation of hydrochemical data, calculation of relevant ratios and classif
 .. |HCO3| replace:: HCO\ :sub:`3`\ :sup:`-`
 
 """
+import asyncio
+import copy
+import inspect
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from pathlib import Path
 
 import numpy as np
 import pandas as pd
-from phreeqpython import PhreeqPython
+from phreeqpython import PhreeqPython, Solution
 
+from hgc import analytic, engine, lookup, parallel
+from hgc import io as hgc_io
+from hgc.checkpoint import Checkpoint, hash_rows
+from hgc.columns import hgc_columns, resolve_columns, select_hgc_columns
 from hgc.constants import constants
 from hgc.constants.constants import mw
 
+# a detection limit, e.g. '<0.3' or '> 0.3', with the sign and the value as groups
+_DETECTION_LIMIT_PATTERN = r'^(?P<sign>[<>])\s*(?P<limit>\d+(?:\.\d+)?)'
+# a number, like pandas.to_numeric accepts
+_NUMBER_PATTERN = r'^\s*-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*$'
+
+
+def _is_string_column(values):
+    """ Return whether `values` (a pandas.Series) may contain strings: object, string or Arrow string dtype """
+    return pd.api.types.is_object_dtype(values.dtype) or pd.api.types.is_string_dtype(values.dtype)
+
+
+def _is_arrow_backed(values):
+    """ Return whether the data of `values` (a pandas.Series) is stored in an Arrow array """
+    return (getattr(values.dtype, 'storage', None) == 'pyarrow' or
+            isinstance(values.dtype, getattr(pd, 'ArrowDtype', ())))
+
+
+def _to_float64(values):
+    """ Return `values` as numpy float64 array, with NaN for missing values (pd.NA) """
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _detection_limits(values):
+    """
+    Return boolean arrays of the values below and above the detection limit (e.g. '<0.3' and '> 0.3'),
+    and a float array with the detection limits (NaN for other values). Arrow-backed strings are
+    parsed with Arrow compute kernels, other strings with the pandas string methods.
+    """
+    if _is_arrow_backed(values):
+        pa = hgc_io._import_pyarrow()
+        import pyarrow.compute as pc
+        array = pa.array(values.array)
+        if isinstance(array, pa.ChunkedArray):
+            array = array.combine_chunks()
+        parts = pc.extract_regex(array, _DETECTION_LIMIT_PATTERN)
+        # the fields of rows that do not match are empty strings instead of null, so mask them
+        is_match = pc.is_valid(parts)
+        null = pa.scalar(None, type=pa.string())
+        sign = pc.if_else(is_match, parts.field('sign'), null)
+        limit = pc.if_else(is_match, parts.field('limit'), null)
+        is_below = pc.fill_null(pc.equal(sign, '<'), False).to_numpy(zero_copy_only=False)
+        is_above = pc.fill_null(pc.equal(sign, '>'), False).to_numpy(zero_copy_only=False)
+        limit = pc.cast(limit, pa.float64()).to_numpy(zero_copy_only=False)
+    else:
+        parts = values.str.extract(_DETECTION_LIMIT_PATTERN)
+        is_below = (parts['sign'] == '<').fillna(False).to_numpy(dtype=bool)
+        is_above = (parts['sign'] == '>').fillna(False).to_numpy(dtype=bool)
+        limit = _to_float64(pd.to_numeric(parts['limit'], errors='coerce'))
+    return np.asarray(is_below, dtype=bool), np.asarray(is_above, dtype=bool), np.asarray(limit, dtype=np.float64)
+
+
+def _is_numeric_string(values):
+    """
+    Return a boolean array of the values that are numeric strings (like str.isnumeric), missing
+    values count as numeric. Arrow-backed strings are checked with Arrow compute kernels, since
+    pandas does not provide the str accessor for all Arrow dtypes.
+    """
+    if _is_arrow_backed(values):
+        pa = hgc_io._import_pyarrow()
+        import pyarrow.compute as pc
+        is_numeric = pc.utf8_is_numeric(pa.array(values.array))
+        return np.asarray(pc.fill_null(is_numeric, True).to_numpy(zero_copy_only=False), dtype=bool)
+    return values.str.isnumeric().fillna(True).to_numpy(dtype=bool)
+
+
+def _strings_to_float64(values):
+    """
+    Return the strings in `values` as numpy float64 array, with NaN for values that are not a
+    number (like pandas.to_numeric with errors='coerce'). Arrow-backed strings are parsed with
+    Arrow compute kernels.
+    """
+    if _is_arrow_backed(values):
+        pa = hgc_io._import_pyarrow()
+        import pyarrow.compute as pc
+        array = pa.array(values.array)
+        is_number = pc.match_substring_regex(array, _NUMBER_PATTERN)
+        numbers = pc.if_else(is_number, pc.utf8_trim_whitespace(array), pa.scalar(None, type=array.type))
+        return pc.cast(numbers, pa.float64()).to_numpy(zero_copy_only=False)
+    return _to_float64(pd.to_numeric(values, errors='coerce'))
+
+
 def requires_ph(func):
     """ Decorator function for methods in the SamplesFrame class that require a
     column `ph` with valid values (non-zero and non-NaN). """
@@ -38,6 +129,45 @@ def requires_ph(func):
         return func(self, *args, **kwargs)
     return wrapper
 
+def supports_database(func=None, long_format=None):
+    """ Decorator function for methods in the SamplesFrame class that use phreeqc, which adds the
+    argument `database`: the name or path of a phreeqc database (see `hgc.engine.database_path`),
+    or a list of them. With a list, the method is run for all databases concurrently and the results
+    are combined with an extra (outer) column level `database`, which requires inplace=False.
+    Methods that return a table in long format pass `long_format`, a function of the (bound) arguments
+    of the call that returns whether the result is in long format; those results are stacked, with a
+    column `database`. """
+    if func is None:
+        return lambda func: supports_database(func, long_format=long_format)
+
+    @wraps(func)
+    def wrapper(self, *args, database=None, **kwargs):
+        if database is None:
+            return func(self, *args, **kwargs)
+        if isinstance(database, (str, Path)):
+            with engine.pool.engine(database) as pp:
+                return func(self._with_engine(pp, database), *args, **kwargs)
+
+        arguments = inspect.signature(func).bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        if arguments.arguments.get('inplace'):
+            raise ValueError('A list of databases can only be used with inplace=False')
+
+        def run(database):
+            with engine.pool.engine(database) as pp:
+                # a shallow copy, such that the threads do not modify the same DataFrame
+                return func(self._with_engine(pp, database, self._obj.copy(deep=False)), *args, **kwargs)
+
+        databases = list(database)
+        with ThreadPoolExecutor(len(databases)) as executor:
+            results = list(executor.map(run, databases))
+        keys = [str(database) for database in databases]
+        if long_format is not None and long_format(arguments.arguments):
+            return pd.concat(results, keys=keys, names=['database']).reset_index(level=0).reset_index(drop=True)
+        results = [result.to_frame() if isinstance(result, pd.Series) else result for result in results]
+        return pd.concat(results, axis=1, keys=keys, names=['database'])
+    return wrapper
+
 @pd.api.extensions.register_dataframe_accessor("hgc")
 class SamplesFrame(object):
     """
@@ -65,14 +195,54 @@ class SamplesFrame(object):
 
     """
     __SUM_ANIONS_COLUMN =  'sum_anions'
+    __FILLED_ION_COLUMN = 'filled_ion'
+    # equivalent weights (mg/meq) of the major ions, as used in get_sum_cations and get_sum_anions
+    _MAJOR_CATIONS = {'Na': 22.99, 'K': 39.1, 'Ca': 20.04, 'Mg': 12.156}
+    _MAJOR_ANIONS = {'Cl': mw('Cl'), 'SO4': mw('SO4') / 2, 'alkalinity': mw('HCO3'), 'NO3': mw('NO3')}
+    # the major ions by their name in phreeqc
+    _PHREEQ_MAJOR_IONS = {(constants.atoms[ion].feature if ion in constants.atoms else constants.ions[ion].phreeq_name): ion
+                          for ion in list(_MAJOR_CATIONS) + list(_MAJOR_ANIONS)}
+    # charge of the ions of which the concentration after equilibration with phases is returned
+    _EQUILIBRATED_IONS = {'Ca': 2, 'Mg': 2, 'Na': 1, 'K': 1, 'Fe': 2, 'Mn': 2, 'NH4': 1, 'Cl': -1, 'SO4': -2, 'NO3': -1}
+    # number of perturbed samples that are evaluated together in Monte Carlo simulations
+    _MONTE_CARLO_BATCHSIZE = 10000
+    # methods that only add columns derived from the HGC-columns of the same row
+    _INCREMENTAL_METHODS = ('get_bex', 'get_ratios', 'get_stuyfzand_water_type', 'get_dominant_cations',
+                            'get_dominant_anions', 'get_ion_balance', 'get_sum_anions', 'get_sum_cations',
+                            'get_saturation_index', 'get_partial_pressure', 'get_specific_conductance',
+                            'get_ionic_strength')
 
     def __init__(self, pandas_obj):
         self._obj = pandas_obj
-        self._pp = PhreeqPython() # bind 1 phreeqpython instance to the dataframe
+        self.__pp = None # bind 1 phreeqpython instance to the dataframe, created when it is first used
+        self._columns = None # the columns for which the HGC-columns are cached, see hgc_cols
+        self._hgc_cols = []
+        self._database = None # database of self._pp if it is not the default database
         self._valid_atoms = constants.atoms
         self._valid_ions = constants.ions
         self._valid_properties = constants.properties
 
+    @property
+    def _pp(self):
+        """ The PhreeqPython instance of the dataframe. Loading the database takes some time,
+        so it is only created when a method uses phreeqc. """
+        if self.__pp is None:
+            self.__pp = PhreeqPython()
+        return self.__pp
+
+    @_pp.setter
+    def _pp(self, pp):
+        self.__pp = pp
+
+    def _with_engine(self, pp, database, obj=None):
+        """ Return a copy of the SamplesFrame (of `obj` if given) that uses the PhreeqPython instance `pp` with `database` """
+        samples_frame = copy.copy(self)
+        samples_frame._pp = pp
+        samples_frame._database = None if database is None else str(database)
+        if obj is not None:
+            samples_frame._obj = obj
+        return samples_frame
+
     @staticmethod
     def _clean_up_phreeqpython_solutions(solutions):
         """
@@ -86,7 +256,133 @@ class SamplesFrame(object):
             python list containing of phreeqpython solutions
 
         """
-        _ = [s.forget() for s in solutions]
+        # solutions can be shared by rows (see `dedupe_tolerance`), forget each of them only once
+        unique_solutions = {id(s): s for s in solutions if s is not None}
+        _ = [s.forget() for s in unique_solutions.values()]
+
+    def _run_checkpointed(self, method_name, checkpoint, on_changed='raise', inplace=False, **method_kwargs):
+        """
+        Run the method `method_name` only for the rows that are not yet stored
+        in `checkpoint`. The rows are computed in chunks of
+        `checkpoint.flush_every` rows and each chunk is written to the checkpoint
+        file directly after it is computed.
+
+        Parameters
+        ----------
+        method_name : str
+            Name of the `SamplesFrame` method to run.
+        checkpoint : str, pathlib.Path or hgc.checkpoint.Checkpoint
+            (Path to the) checkpoint file.
+        on_changed : {'raise', 'recompute'}, default 'raise'
+            What to do with rows whose HGC-columns changed since they were
+            stored in the checkpoint: raise a ValueError or recompute them.
+        inplace : bool, default False
+            If False, the results are what the method returns with `inplace=False`.
+            If True, the method is run with `inplace=True` on the HGC-columns of
+            the rows and the results are the columns that the method added.
+        **method_kwargs
+            Arguments passed to the method `method_name`.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Results of the method for every row in the `SamplesFrame`.
+        """
+        if not isinstance(checkpoint, Checkpoint):
+            checkpoint = Checkpoint(checkpoint)
+        if not self._obj.index.is_unique:
+            raise ValueError("Checkpointing requires a DataFrame with a unique index.")
+
+        key_kwargs = dict(method_kwargs, inplace=inplace)
+        if self._database is not None:
+            key_kwargs['database'] = self._database
+        key = f"{method_name}({', '.join(f'{k}={v!r}' for k, v in sorted(key_kwargs.items()))})"
+        row_hashes = hash_rows(self._obj[self.hgc_cols])
+        results, is_missing, is_changed = checkpoint.load(key, self._obj.index, row_hashes)
+
+        if any(is_changed):
+            if on_changed == 'raise':
+                raise ValueError(f"The HGC-columns of row(s) {self._obj.index[is_changed].values} changed since "
+                                 f"they were written to checkpoint {checkpoint.path}. Remove the checkpoint file "
+                                 "or restore the original data.")
+            elif on_changed == 'recompute':
+                is_missing = is_missing | is_changed
+            else:
+                raise ValueError(f"Invalid value for on_changed: {on_changed}. Allowed values are 'raise' and 'recompute'.")
+
+        positions = np.flatnonzero(is_missing)
+        logging.info(f"{len(self._obj) - len(positions)} row(s) of {key} found in checkpoint {checkpoint.path}, "
+                     f"computing the remaining {len(positions)} row(s).")
+        for start in range(0, len(positions), checkpoint.flush_every):
+            chunk = positions[start:start + checkpoint.flush_every]
+            if inplace:
+                input_cols = self.hgc_cols
+                df_chunk = self._obj[input_cols].iloc[chunk].copy()
+            else:
+                df_chunk = self._obj.iloc[chunk].copy()
+            # reuse the phreeqpython instance of this frame
+            df_chunk.hgc._pp = self._pp
+            result_chunk = getattr(df_chunk.hgc, method_name)(inplace=inplace, **method_kwargs)
+            if inplace:
+                result_chunk = df_chunk.drop(columns=input_cols)
+            elif isinstance(result_chunk, pd.Series):
+                result_chunk = result_chunk.to_frame()
+            checkpoint.store(key, result_chunk, row_hashes[chunk])
+
+            for col in result_chunk.columns:
+                if col not in results.columns:
+                    results[col] = pd.Series(index=results.index, dtype=result_chunk[col].dtype)
+                results.loc[result_chunk.index, col] = result_chunk[col]
+
+        return results
+
+    def run_incremental(self, store, method_name, inplace=True, **kwargs):
+        """
+        Run a `SamplesFrame` method only for the rows that are new or modified since a previous run.
+
+        The HGC-columns of every row are hashed and compared with the hashes in `store`. The
+        method is only run on the rows that are not in `store` or whose hash differs. The
+        results of these rows are written to `store` and merged with the results of the
+        unchanged rows that were already in `store`.
+
+        Parameters
+        ----------
+        store : str, pathlib.Path or hgc.checkpoint.Checkpoint
+            (Path to the) SQLite file with the results of previous runs.
+            It is created if it does not exist.
+        method_name : str
+            Name of the method to run, e.g. `'get_stuyfzand_water_type'` or `'get_saturation_index'`.
+        inplace : bool, optional, default True
+            whether the columns added by the method should be added to the `pd.DataFrame` (inplace=True)
+            or returned as a `pd.DataFrame` (inplace=False).
+        **kwargs
+            Arguments passed to the method `method_name`.
+
+        Returns
+        -------
+        pandas.DataFrame or None
+            Returns None if `inplace=True` and `pd.DataFrame` with the columns added by the method for
+            each row in `SamplesFrame` if `inplace=False`.
+
+        Examples
+        --------
+        Update the water type and saturation index of calcite of a growing table of samples::
+
+            df.hgc.run_incremental('results.sqlite', 'get_stuyfzand_water_type')
+            df.hgc.run_incremental('results.sqlite', 'get_saturation_index', mineral_or_gas='Calcite')
+        """
+        if method_name not in self._INCREMENTAL_METHODS:
+            raise ValueError(f"Method {method_name} cannot be run incrementally. Allowed methods are "
+                             f"{', '.join(self._INCREMENTAL_METHODS)}.")
+
+        df_results = self._run_checkpointed(method_name, store, on_changed='recompute', inplace=True, **kwargs)
+
+        if inplace:
+            logging.info(f'Added columns {list(df_results.columns)}')
+            for col in df_results.columns:
+                self._obj[col] = df_results[col]
+        else:
+            return df_results
 
     def _check_validity(self, verbose=True):
         """
@@ -114,11 +410,12 @@ class SamplesFrame(object):
         # Check the columns for (in)valid values
         for col in hgc_cols:
             # check for only numeric values
-            if obj[col].dtype in ('object', 'str'):
-                if not all(obj[col].str.isnumeric()):
+            if _is_string_column(obj[col]):
+                # values that are not strings (e.g. NaN) are ignored
+                if not _is_numeric_string(obj[col]).all():
                     invalid_str_cols.append(col)
-            # check for non-negative concentrations
-            elif (col in allowed_concentration_columns) and (any(obj[col] < 0)):
+            # check for non-negative concentrations, missing values (NA of nullable dtypes) are ignored
+            elif (col in allowed_concentration_columns) and (obj[col] < 0).any():
                 neg_conc_cols.append(col)
 
         is_valid = ((len(hgc_cols) > 0) and (len(neg_conc_cols) == 0) and (len(invalid_str_cols) == 0))
@@ -150,13 +447,42 @@ class SamplesFrame(object):
     @property
     def allowed_hgc_columns(self):
         """  Returns allowed columns of the hgc `SamplesFrame`"""
-        return (list(constants.atoms.keys()) +
-                               list(constants.ions.keys()) +
-                               list(constants.properties.keys()))
+        return list(hgc_columns())
+
     @property
     def hgc_cols(self):
         """ Return the columns that are used by hgc """
-        return [item for item in self.allowed_hgc_columns if item in self._obj.columns]
+        # a pandas.Index is immutable, so the HGC-columns only change with the Index object
+        if self._obj.columns is not self._columns:
+            self._columns = self._obj.columns
+            self._hgc_cols = select_hgc_columns(self._columns)
+        return list(self._hgc_cols)
+
+    def resolve_aliases(self, aliases=None, inplace=True):
+        """
+        Rename columns with an alias of an HGC-column (e.g. 'pH', 'EC', 'HCO3' or 'Calcium (mg/l)')
+        to the HGC-column, see `hgc.columns.resolve_columns`.
+
+        Parameters
+        ----------
+        aliases : dict, optional
+            Aliases {alias: HGC-column} in addition to the alias table, see `hgc.columns.add_aliases`.
+        inplace : bool, default True
+            Rename the columns of the `SamplesFrame` in place or return a renamed copy.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The renamed DataFrame if inplace=False, otherwise None.
+        """
+        renames = {col: feature for col, feature in resolve_columns(self._obj.columns, aliases).items()
+                   if col != feature}
+        if renames:
+            logging.info(f"Renamed columns: {', '.join(f'{col} -> {feature}' for col, feature in renames.items())}")
+        if inplace:
+            self._obj.rename(columns=renames, inplace=True)
+        else:
+            return self._obj.rename(columns=renames)
 
 
     @property
@@ -206,29 +532,38 @@ class SamplesFrame(object):
             Rule "at" replaces detection limit cells with the exact value of the detection limit.
             Rule "zero" replaces below detection limit cells with zero; values above the detection limit set at detection limit.
         """
-        rule = str(rule)
+        rule = str(rule).lower()
+        # factors of the detection limit for values below and above the detection limit
+        factors = {'half': (0.5, 1.5), 'on': (1., 1.), 'zero': (0., 1.), '0': (0., 1.)}
+        if rule not in factors:
+            raise ValueError("Invalid rule. Allowed rules are half, on and zero.")
+        factor_below, factor_above = factors[rule]
+
         for col in self.hgc_cols:
-            if self._obj[col].dtype in ('object', 'str'):
-                is_below_dl = self._obj[col].str.contains(pat=r'^[<]\s*\d').fillna(False)
-                is_above_dl = self._obj[col].str.contains(pat=r'^[>]\s*\d').fillna(False)
-                lower_detection_limit = self._obj.loc[is_below_dl, col].str.extract(r'(\d+)').astype(np.float64).values
-                upper_detection_limit = self._obj.loc[is_above_dl, col].str.extract(r'(\d+)').astype(np.float64).values
-
-                if rule.lower() == 'half':
-                    logging.info("Replace values below detection limit with (detection limit) / 2.")
-                    self._obj.loc[is_below_dl, col] = lower_detection_limit / 2.
-                    logging.info("Replace values above detection limit with 1.5 * (detection limit).")
-                    self._obj.loc[is_above_dl, col] = 1.5 * upper_detection_limit
-                elif rule.lower() == 'on':
-                    logging.info("Replace values above and below detection limit with detection limit.")
-                    self._obj.loc[is_below_dl, col] = lower_detection_limit
-                    self._obj.loc[is_above_dl, col] = upper_detection_limit
-                elif str(rule).lower() in ['zero', '0']:
-                    logging.info("Replace values below detection limit with zero, above detection limit with (upper) detection limit.")
-                    self._obj.loc[is_below_dl, col] = 0
-                    self._obj.loc[is_above_dl, col] = upper_detection_limit
-                else:
-                    raise ValueError("Invalid rule. Allowed rules are half, on and zero.")
+            values = self._obj[col]
+            if not _is_string_column(values):
+                continue
+            is_below_dl, is_above_dl, detection_limit = _detection_limits(values)
+            is_censored = is_below_dl | is_above_dl
+            if not is_censored.any():
+                continue
+
+            logging.info(f"Replace values below and above detection limit in column {col} (rule {rule}).")
+            replacement = np.where(is_below_dl, factor_below, factor_above)[is_censored] * detection_limit[is_censored]
+            if pd.api.types.is_object_dtype(values.dtype):
+                self._obj.loc[is_censored, col] = replacement
+            else:
+                # string columns can only contain strings, the numbers are parsed by _cast_datatypes
+                # (the column is replaced as a whole, .loc cannot set a part of an Arrow-backed column)
+                new_values = values.to_numpy(dtype=object, na_value=None)
+                new_values[is_censored] = replacement.astype(str)
+                self._obj[col] = pd.Series(new_values, index=values.index, dtype=values.dtype)
+
+            # keep track of the censored values by their index labels, such that they remain valid when rows
+            # are selected (pandas keeps the attrs), they are stored in the metadata by to_parquet
+            censoring = self._obj.attrs.setdefault('hgc', {}).setdefault('censoring', {})
+            censoring[col] = {'below': self._obj.index[np.asarray(is_below_dl)],
+                              'above': self._obj.index[np.asarray(is_above_dl)], 'rule': rule}
 
     def _replace_negative_concentrations(self):
         """
@@ -245,8 +580,12 @@ class SamplesFrame(object):
         Convert all HGC-columns to their correct data type.
         """
         for col in self.hgc_cols:
-            if self._obj[col].dtype in ('object', 'str'):
-                self._obj[col] = pd.to_numeric(self._obj[col], errors='coerce')
+            values = self._obj[col]
+            if _is_string_column(values):
+                self._obj[col] = _strings_to_float64(values)
+            elif pd.api.types.is_extension_array_dtype(values.dtype) and pd.api.types.is_numeric_dtype(values.dtype):
+                # nullable (e.g. Float64) and Arrow-backed numbers, the calculations use NaN for missing values
+                self._obj[col] = _to_float64(values)
 
 
     def consolidate(self, use_ph='field', use_ec='lab', use_so4='ic', use_o2='field',
@@ -347,6 +686,12 @@ class SamplesFrame(object):
                                  f"use_{param.lower()}=None to explicitly ignore consolidating " +
                                  f"this column.")
 
+        # keep track of the choices, they are stored in the metadata by to_parquet
+        consolidation = self._obj.attrs.setdefault('hgc', {}).setdefault('consolidation', {})
+        consolidation.update({param: method for param, method in param_mapping.items() if method})
+        if use_alkalinity is not None:
+            consolidation['alkalinity'] = use_alkalinity
+
 
     def get_bex(self, watertype="G", inplace=True):
         """
@@ -741,12 +1086,94 @@ class SamplesFrame(object):
         """
         Calculate missing concentrations based on the charge balance.
 
+        Rows in which exactly one of the major ions (Na, K, Ca, Mg, Cl, SO4, alkalinity
+        and NO3) is NaN get the concentration of that ion that balances
+        the charge of the sample (absent columns count as zero). The name of the filled column is written to the column
+        `filled_ion` (None for rows that are not filled), such that measured and inferred
+        concentrations can be distinguished. Rows with more than one missing major ion,
+        where the imbalance has the wrong sign for the missing ion, or (with 'phreeqc') for
+        which phreeqc does not converge, are left unchanged.
+
         Parameters
         ----------
         how : {'phreeqc', 'analytic'}, default 'phreeqc'
-            Method to compute missing concentrations.
+            Method to compute missing concentrations. 'analytic' computes the concentration
+            from the difference of `get_sum_cations` and `get_sum_anions` for all rows at once.
+            'phreeqc' charge balances the solutions of the affected rows on the missing ion. PHREEQC
+            cannot balance on alkalinity, so rows where alkalinity is missing are not filled with 'phreeqc'.
+        """
+        if how not in ('phreeqc', 'analytic'):
+            raise ValueError(f"Invalid value for how: {how}. Allowed values are 'phreeqc' and 'analytic'.")
+
+        # absent columns are treated as zero, like in get_sum_anions and get_sum_cations
+        major_ions = [ion for ion in list(self._MAJOR_CATIONS) + list(self._MAJOR_ANIONS) if ion in self._obj.columns]
+        is_missing = self._obj[major_ions].isna()
+        is_fillable = is_missing.sum(axis=1) == 1
+        if how == 'phreeqc' and 'alkalinity' in is_missing.columns:
+            is_fillable &= ~is_missing['alkalinity']
+        if not is_fillable.any():
+            logging.info("No rows with a single missing major ion to fill")
+            return
+
+        positions = np.flatnonzero(is_fillable.values)
+        missing_ion = is_missing.iloc[positions].idxmax(axis=1).values
+        df_fill = self._obj.iloc[positions].copy()
+        # meq/L that the missing ion should add to the cations (positive) or anions (negative)
+        imbalance = (df_fill.hgc.get_sum_anions(inplace=False) - df_fill.hgc.get_sum_cations(inplace=False)).values
+        sign = np.where(np.isin(missing_ion, list(self._MAJOR_CATIONS)), 1., -1.)
+        equivalent_weight = pd.Series({**self._MAJOR_CATIONS, **self._MAJOR_ANIONS})[missing_ion].values
+        concentration = sign * imbalance * equivalent_weight
+        if how == 'phreeqc':
+            # one batch of charge balanced solutions per missing ion. Rows where the imbalance has the wrong
+            # sign for the missing ion are left out, phreeqc does not converge for them
+            is_balanceable = concentration > 0
+            concentration = np.full(len(positions), np.nan)
+            for ion in np.unique(missing_ion[is_balanceable]):
+                is_ion = is_balanceable & (missing_ion == ion)
+                concentration[is_ion] = self._balancing_concentration(df_fill.iloc[is_ion], ion)
+
+        is_filled = concentration > 0
+        if not is_filled.all():
+            logging.info(f"The charge imbalance of {(~is_filled).sum()} row(s) cannot be resolved " +
+                         "with the missing ion, these rows are not filled")
+
+        for ion in np.unique(missing_ion[is_filled]):
+            is_ion = is_filled & (missing_ion == ion)
+            self._obj.iloc[positions[is_ion], self._obj.columns.get_loc(ion)] = concentration[is_ion]
+        if self.__FILLED_ION_COLUMN not in self._obj.columns:
+            self._obj[self.__FILLED_ION_COLUMN] = None
+        self._obj.iloc[positions[is_filled], self._obj.columns.get_loc(self.__FILLED_ION_COLUMN)] = missing_ion[is_filled]
+        logging.info(f"Filled {is_filled.sum()} missing concentration(s) based on the charge balance, " +
+                     f"see column {self.__FILLED_ION_COLUMN}")
+
+    def _balancing_concentration(self, df, ion):
         """
-        raise NotImplementedError()
+        Return the concentrations (mg/L) of `ion` that balance the charge of the phreeqc solutions of
+        the rows of `df`, NaN for rows for which phreeqc does not converge.
+        """
+        try:
+            phreeq_name = self._valid_atoms[ion].feature
+        except KeyError:
+            phreeq_name = self._valid_ions[ion].phreeq_name
+        df = df.copy()
+        df.hgc._pp = self._pp
+        try:
+            solutions = list(df.hgc.get_phreeqpython_solutions(equilibrate_with=phreeq_name, inplace=False))
+        except ValueError:
+            # one of the rows did not converge, balance the rows one by one
+            solutions = []
+            for position in range(len(df)):
+                df_row = df.iloc[[position]].copy()
+                df_row.hgc._pp = self._pp
+                try:
+                    solutions.extend(df_row.hgc.get_phreeqpython_solutions(equilibrate_with=phreeq_name,
+                                                                           inplace=False))
+                except ValueError as error:
+                    logging.info(error)
+                    solutions.append(None)
+        concentration = [np.nan if s is None else s.total(ion, units='mol') * mw(ion) * 1000. for s in solutions]
+        self._clean_up_phreeqpython_solutions(solutions)
+        return concentration
 
     def get_ion_balance(self, inplace=True):
         """
@@ -775,17 +1202,36 @@ class SamplesFrame(object):
             return ion_balance
 
 
-    def fillna_ec(self, use_phreeqc=True):
+    def fillna_ec(self, use_phreeqc=True, **kwargs):
         """
         Calculate missing Electrical Conductivity measurements using
-        known anions and cations.
+        known anions and cations. Only the rows where the column `ec` is NaN
+        (or all rows if the column is absent) are calculated, the calculated
+        specific conductance is compensated to 20 °C like the column `ec`.
+
+        Parameters
+        ----------
+        use_phreeqc : bool, optional, default True
+            whether to use phreeqc or the vectorized internal routines to calculate
+            the specific conductance, see `get_specific_conductance`.
+        **kwargs :
+            are passed to the method `get_specific_conductance`.
         """
-        if use_phreeqc:
-            # use get_specific_conductance method on
-            # all N/A rows of EC columns
-            raise NotImplementedError()
+        if 'ec' in self._obj.columns:
+            is_missing = self._obj['ec'].isna()
         else:
-            raise NotImplementedError()
+            is_missing = pd.Series(True, index=self._obj.index)
+
+        if not is_missing.any():
+            logging.info("No missing values in column ec")
+            return
+
+        df_missing = self._obj.loc[is_missing.values].copy()
+        df_missing.hgc._pp = self._pp
+        ec = df_missing.hgc.get_specific_conductance(use_phreeqc=use_phreeqc, inplace=False,
+                                                     reference_temp=20., **kwargs)
+        self._obj.loc[is_missing.values, 'ec'] = ec.values
+        logging.info(f"Filled {is_missing.sum()} missing value(s) in column ec")
 
     def make_valid(self):
         """
@@ -798,6 +1244,22 @@ class SamplesFrame(object):
         self._replace_negative_concentrations()
         self._check_validity(verbose=True)
 
+    def to_parquet(self, path, float_dtype='float32', **kwargs):
+        """
+        Write the samples to a Parquet file, with the units, censoring and consolidation
+        of the HGC-columns in the metadata. Read it with `hgc.read_parquet`.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            The Parquet file.
+        float_dtype : str or None, default 'float32'
+            Dtype of the numeric HGC-columns, None keeps the dtypes.
+        **kwargs :
+            Passed to `hgc.io.to_parquet`.
+        """
+        hgc_io.to_parquet(self._obj, path, float_dtype=float_dtype, **kwargs)
+
 
     @requires_ph
     def get_sum_anions(self, inplace=True):
@@ -962,7 +1424,8 @@ class SamplesFrame(object):
 
         return phreeq_columns
 
-    def get_phreeqpython_solutions(self, equilibrate_with='none', inplace=True):
+    @supports_database
+    def get_phreeqpython_solutions(self, equilibrate_with='none', inplace=True, dedupe_tolerance=None):
         """
         Return a series of `phreeqpython solutions <https://github.com/Vitens/phreeqpython>`_ derived from the (row)data in the `SamplesFrame`.
 
@@ -973,6 +1436,14 @@ class SamplesFrame(object):
         inplace : bool, default True
             Whether the result is returned as a `pd.Series` or is added to the `pd.DataFrame`
             as column `pp_solutions`.
+        dedupe_tolerance : float, optional
+            Relative tolerance (e.g. 0.01 for 1%) within which rows are considered identical.
+            If given, the input columns are quantized to this tolerance and only one solution
+            is calculated for each unique quantized row, with the input of the first of these rows.
+            This solution is shared by all rows that are identical within the tolerance. Can
+            also be passed to the other methods that use phreeqc, e.g. `get_saturation_index`.
+        database : str, pathlib.Path or list, optional
+            Name or path of the phreeqc database, or a list of them. See `get_saturation_index`.
 
         Returns
         -------
@@ -985,12 +1456,38 @@ class SamplesFrame(object):
             equilibrate_with = 'none'
 
         pp = self._pp
+        # select_phreeq_columns sets duplicate N and P columns to 0, so the copy is made afterwards
+        phreeq_cols = self.select_phreeq_columns()
         df = self._obj.copy()
 
-        phreeq_cols = self.select_phreeq_columns()
+        equilibrate_with_lower = equilibrate_with.lower()
+        if dedupe_tolerance is not None:
+            # the charge balance also depends on ions that are not passed to phreeqc
+            dedupe_cols = phreeq_cols if equilibrate_with_lower == 'none' else self.hgc_cols
+            first_rows, inverse = self._quantized_duplicates(dedupe_cols, dedupe_tolerance)
+            df_unique = self._obj.iloc[first_rows].copy()
+            df_unique.hgc._pp = pp
+            unique_solutions = df_unique.hgc.get_phreeqpython_solutions(equilibrate_with, inplace=False)
+            logging.info(f"Calculated {len(first_rows)} phreeqc solution(s) for {len(df)} row(s) " +
+                         f"with dedupe_tolerance={dedupe_tolerance}, {len(df) - len(first_rows)} call(s) saved.")
+            solutions = unique_solutions.values[inverse]
+            return_series = pd.Series(solutions, index=self._obj.index, dtype='object')
+            if inplace:
+                self._obj['pp_solutions'] = return_series
+                return
+            else:
+                return return_series
 
+        if equilibrate_with_lower == 'none':
+            imbalances = np.zeros(len(df))
+        else:
+            # meq/L of cations that is needed to balance the charge (negative if anions are needed),
+            # used for the initial guess of the concentration of the ion that balances the charge
+            imbalances = (self.get_sum_anions(inplace=False) - self.get_sum_cations(inplace=False)).values
+
+        n_retried = 0
         solutions = pd.Series(index=df.index, dtype='object')
-        for index, row in df[phreeq_cols].iterrows():
+        for imbalance, (index, row) in zip(imbalances, df[phreeq_cols].iterrows()):
             _sol = {'units': 'mg/l'}
             for col in row.index:
 
@@ -1028,31 +1525,24 @@ class SamplesFrame(object):
                     phreeq_as = phreeq_as.strip()
                     _sol[phreeq_name] = f"{value} {phreeq_unit} {phreeq_as}"
 
-            if not (equilibrate_with.lower() in ['none', 'auto']):
-                try:
-                    # append the keyword charge to the compound that is used to charge balance
-                    _sol[equilibrate_with] = _sol[equilibrate_with] + ' charge'
-                except KeyError:
-                    logging.info(f'{equilibrate_with} not found in solution while it is selected to balance charge with. Starts initial guess with 20 mg/L to balance charge.')
-                    _sol[equilibrate_with] = '20. mg/L charge'
-            elif equilibrate_with.lower() == 'auto':
-                try:
-                    # append the keyword charge to the compound that is used to charge balance
-                    _sol['Na'] = _sol['Na'] + ' charge'
-                except KeyError:
-                    logging.info(f'Na is not found in solution while it is automatically selected to balance charge with. Starts initial guess with 20 mg/L Na to balance charge.')
-                    _sol[equilibrate_with] = '20. mg/L charge'
+            if equilibrate_with_lower == 'auto':
+                # balance with Na if cations are missing and with Cl if anions are missing
+                balance_with, fallback = ('Na', 'Cl') if imbalance >= 0 else ('Cl', 'Na')
+            else:
+                balance_with, fallback = equilibrate_with, None
 
             try:
-                solutions[index] = pp.add_solution(_sol)
+                if equilibrate_with_lower == 'none':
+                    solutions[index] = pp.add_solution(_sol)
+                else:
+                    solutions[index] = pp.add_solution(self._charge_balanced(_sol, balance_with, imbalance))
             except Exception as error:
-                if equilibrate_with.lower() == 'auto':
-                    _sol['Na'] = _sol['Na'].replace(' charge', '')
-                    _sol['Cl'] = _sol['Cl'] + ' charge'
+                if fallback is not None:
+                    n_retried += 1
                     try:
-                        logging.info(f"initializing solution with charge balancing with Na failed. Now trying to initialize solution by" +
-                                     " charge balancing with Cl.")
-                        solutions[index] = pp.add_solution(_sol)
+                        logging.info(f"initializing solution with charge balancing with {balance_with} failed. Now trying " +
+                                     f"to initialize solution by charge balancing with {fallback}.")
+                        solutions[index] = pp.add_solution(self._charge_balanced(_sol, fallback, imbalance))
                     except Exception as error:
                         logging.info(error)
                         raise ValueError(f'Something went wrong with the phreeqc calculation with index {index} from the DataFrame. PHREEQC returned: {error}. Charge balancing with either Na or Cl failed.')
@@ -1061,6 +1551,9 @@ class SamplesFrame(object):
                     raise ValueError(f'Something went wrong with the phreeqc calculation with index {index} from the DataFrame. PHREEQC returned: {error}. ' +
                                      'Possibly charge balance could (sufficiently) reached.')
 
+        if n_retried:
+            logging.info(f"Charge balancing of {n_retried} solution(s) needed a second attempt with another ion.")
+
         return_series = pd.Series(solutions, index=self._obj.index)
         if inplace:
             self._obj['pp_solutions'] = return_series
@@ -1068,7 +1561,65 @@ class SamplesFrame(object):
             # return the solutions as pandas series with the same index as the source dataframe
             return return_series
 
-    def get_saturation_index(self, mineral_or_gas, use_phreeqc=True, inplace=True, **kwargs):
+    def _quantized_duplicates(self, cols, tolerance):
+        """
+        Find the rows of which the values in `cols` are equal within the relative `tolerance`.
+
+        Returns
+        -------
+        tuple of (numpy.ndarray, numpy.ndarray)
+            The positions of the first row of each group of duplicates and for every row
+            the number of its group.
+        """
+        if not tolerance > 0:
+            raise ValueError(f'dedupe_tolerance should be a positive number, got {tolerance}')
+        values = self._obj[list(cols)].astype(float)
+        # logarithmic bins with a relative width of `tolerance`, zeros, negative values and NaN get their own bin
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bins = np.round(np.log(values.abs()) / np.log1p(tolerance))
+        quantized = pd.DataFrame(np.where(values > 0, bins, np.sign(values) * np.inf), columns=values.columns)
+        groups, _ = pd.factorize(hash_rows(quantized))
+        _, first_rows = np.unique(groups, return_index=True)
+        return first_rows, groups
+
+    def _charge_balanced(self, _sol, phreeq_name, imbalance):
+        """
+        Return a copy of the phreeqpython solution input `_sol` that is charge balanced with
+        `phreeq_name`. The initial guess of its concentration is the concentration that balances
+        `imbalance` (meq/L of cations needed) for the major ions, otherwise the measured
+        concentration or 20 mg/L if it is not measured.
+        """
+        _sol = dict(_sol)
+        measured = float(_sol[phreeq_name].split()[0]) if phreeq_name in _sol else 0.
+        ion = self._PHREEQ_MAJOR_IONS.get(phreeq_name)
+        if ion in self._MAJOR_CATIONS:
+            guess = measured + imbalance * self._MAJOR_CATIONS[ion]
+        elif ion in self._MAJOR_ANIONS:
+            guess = measured - imbalance * self._MAJOR_ANIONS[ion]
+        else:
+            guess = np.nan
+
+        if not guess > 0:
+            if measured > 0:
+                guess = measured
+            else:
+                logging.info(f'{phreeq_name} not found in solution while it is selected to balance charge with. Starts initial guess with 20 mg/L to balance charge.')
+                guess = 20.
+
+        if ion is None:
+            unit_as = _sol[phreeq_name].split(maxsplit=1)[1:] if phreeq_name in _sol else ['mg/L']
+            unit_as = unit_as[0] if unit_as else ''
+        elif ion in self._valid_atoms:
+            unit_as = self._valid_atoms[ion].unit.replace('μ', 'u')
+        else:
+            unit_as = f"{self._valid_ions[ion].unit.replace('μ', 'u')} {self._valid_ions[ion].phreeq_concentration_as or ''}"
+        _sol[phreeq_name] = f"{guess} {unit_as.strip()} charge"
+        return _sol
+
+    @supports_database
+    def get_saturation_index(self, mineral_or_gas, use_phreeqc=True, inplace=True, checkpoint=None, lookup_table=None,
+                             n_samples=None, uncertainty=None, percentiles=(2.5, 50., 97.5), seed=None, n_jobs=1,
+                             **kwargs):
         """ adds or returns the saturation index (SI) of a mineral or the partial pressure of a gas using phreeqc. The
             column name of the result is si_<mineral_name> in lower case (if inplace=True).
 
@@ -1078,28 +1629,96 @@ class SamplesFrame(object):
                            the name of the mineral of which the SI needs to be calculated
            use_phreeqc: bool
                         whether to return use phreeqc as backend or fall back on internal hgc-routines to calculate SI
-                        or partial pressure
+                        or partial pressure. The internal routines (see `hgc.analytic`) are vectorized and much faster,
+                        but only support Calcite, Aragonite, Dolomite, Gypsum, Siderite, Rhodochrosite and CO2(g).
             inplace: bool, optional, default=True
                     whether the saturation index should be added to the `pd.DataFrame` (inplace=True)
                     as column `si_<mineral_name>` or returned as a `pd.Series` (inplace=False).
+            checkpoint: str, pathlib.Path or hgc.checkpoint.Checkpoint, optional
+                    (path to the) SQLite file to which the results are written while computing.
+                    Rows already present in the file are not computed again. Raises a ValueError if the
+                    HGC-columns of a row have changed since it was written to the file.
+            lookup_table: str, pathlib.Path or hgc.lookup.SaturationIndexTable, optional
+                    (path to the) precomputed table of saturation indices. If given, the saturation index is
+                    interpolated in the table, which is orders of magnitude faster than phreeqc but approximate
+                    (see `hgc.lookup`). Rows outside the grid of the table are calculated with phreeqc.
+                    Raises a ValueError if the table is calculated with another database or combined with
+                    `checkpoint`.
+            n_samples: int, optional
+                    number of Monte Carlo samples per row. If given, the columns in `uncertainty` are perturbed
+                    randomly and the percentiles of the saturation index are returned as well, see the Returns section.
+            uncertainty: dict, optional
+                    standard deviation of the (normally distributed) error of columns, relative to the value
+                    for concentrations (e.g. {'Ca': 0.05} for 5%) and absolute for ph and temp.
+            percentiles: sequence of float, default (2.5, 50., 97.5)
+                    percentiles of the saturation index that are returned if `n_samples` is given.
+            seed: int, optional
+                    seed of the random perturbations. The perturbations of a row depend on the seed and the
+                    index label of the row only.
+            n_jobs: int, default 1
+                    number of processes over which the rows are divided if `n_samples` is given, -1 for all CPUs.
+                    See `hgc.parallel.map_chunks`.
+            database: str, pathlib.Path or list, optional
+                    name of a database of phreeqpython (e.g. 'phreeqc.dat') or path of a phreeqc database
+                    file (see `hgc.engine.database_path`). By default the database of phreeqpython (vitens.dat).
+                    For a list of databases, the calculation runs concurrently for all databases and a DataFrame
+                    is returned with an extra column level `database` (this requires inplace=False). Can also be
+                    passed to the other methods that use phreeqc, e.g. `get_specific_conductance`.
 
             Returns
             -------
-            pandas.Series or None
+            pandas.Series, pandas.DataFrame or None
                 Returns None if `inplace=True` and `pd.Series` with the saturation index of the mineral for each row in `SamplesFrame`
-                if `inplace=False`.
-        """
-        if not use_phreeqc:
-            raise NotImplementedError('use_phreeqc=False is not yet implemented.')
+                if `inplace=False`. If `n_samples` is given, a `pd.DataFrame` is returned (or added) with the columns
+                `si_<mineral_name>` and `si_<mineral_name>_p<percentile>`.
 
+            Examples
+            --------
+            95% confidence interval of the saturation index of calcite for a 5% uncertainty of Ca and alkalinity
+            and 0.1 in pH::
 
-        solutions = self.get_phreeqpython_solutions(inplace=False, **kwargs)
-        saturation_index = [s.si(mineral_or_gas) if s is not None else None for s in solutions]
+                df_si = df.hgc.get_saturation_index('Calcite', inplace=False, n_samples=200,
+                                                    uncertainty={'Ca': 0.05, 'alkalinity': 0.05, 'ph': 0.1})
+        """
+        name_series = 'si_'+ mineral_or_gas.lower()
+        if n_samples is not None:
+            if checkpoint is not None:
+                raise ValueError('checkpoint cannot be combined with n_samples')
+            kwargs.update(mineral_or_gas=mineral_or_gas, use_phreeqc=use_phreeqc, lookup_table=lookup_table)
+            if n_jobs != 1:
+                df_si = parallel.map_chunks(self._obj, 'get_saturation_index', n_jobs, inplace=False,
+                                            database=self._database, n_samples=n_samples, uncertainty=uncertainty, percentiles=percentiles,
+                                            seed=seed, **kwargs)
+            else:
+                df_si = pd.concat([
+                    self.get_saturation_index(inplace=False, **kwargs),
+                    self._monte_carlo('get_saturation_index', n_samples, uncertainty, percentiles, seed, **kwargs)],
+                    axis=1)
+            if inplace:
+                logging.info(f"Added columns {', '.join(df_si.columns)}")
+                self._obj[df_si.columns] = df_si
+                return
+            else:
+                return df_si
+
+        if checkpoint is not None and lookup_table is not None:
+            raise ValueError('checkpoint cannot be combined with lookup_table')
+        if checkpoint is not None:
+            saturation_index = self._run_checkpointed('get_saturation_index', checkpoint,
+                                                      mineral_or_gas=mineral_or_gas,
+                                                      use_phreeqc=use_phreeqc, **kwargs)[name_series]
+        elif lookup_table is not None:
+            saturation_index = self._interpolate_saturation_index(mineral_or_gas, lookup_table, **kwargs)
+        elif not use_phreeqc:
+            speciation = self._analytic_speciation(**kwargs)
+            saturation_index = analytic.saturation_index(speciation, mineral_or_gas)
+        else:
+            solutions = self.get_phreeqpython_solutions(inplace=False, **kwargs)
+            saturation_index = [s.si(mineral_or_gas) if s is not None else None for s in solutions]
 
-        self._clean_up_phreeqpython_solutions(solutions)
+            self._clean_up_phreeqpython_solutions(solutions)
 
         # return it as series with the same index as the dataframe
-        name_series = 'si_'+ mineral_or_gas.lower()
         return_series = pd.Series(saturation_index, index=self._obj.index,
                                   name=name_series)
         if inplace:
@@ -1108,6 +1727,90 @@ class SamplesFrame(object):
         else:
             return return_series
 
+    def _monte_carlo(self, method_name, n_samples, uncertainty, percentiles, seed, **method_kwargs):
+        """
+        Percentiles of the result of a method for random perturbations of the columns in `uncertainty`
+        (see `get_saturation_index`). The rows are processed in batches of about `_MONTE_CARLO_BATCHSIZE`
+        perturbed samples, so the memory use does not depend on the number of rows.
+        """
+        uncertainty = uncertainty or {}
+        missing = [col for col in uncertainty if col not in self._obj.columns]
+        if missing:
+            raise ValueError(f"Column(s) {', '.join(missing)} in uncertainty are not in the dataframe.")
+        cols = list(uncertainty)
+        std = np.array([uncertainty[col] for col in cols], dtype=float)
+        is_absolute = np.isin(cols, ['ph', 'temp'])
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        # one random generator per row, such that the result does not depend on the batches or processes
+        row_seeds = pd.util.hash_pandas_object(self._obj.index, index=False).values
+
+        results = np.empty((len(self._obj), len(percentiles)))
+        rows_per_batch = max(self._MONTE_CARLO_BATCHSIZE // n_samples, 1)
+        for start in range(0, len(self._obj), rows_per_batch):
+            positions = np.arange(start, min(start + rows_per_batch, len(self._obj)))
+            noise = np.stack([np.random.default_rng([seed, int(row_seed)]).standard_normal((n_samples, len(cols)))
+                              for row_seed in row_seeds[positions]])
+            df_batch = self._obj.iloc[np.repeat(positions, n_samples)].reset_index(drop=True)
+            if cols:
+                values = df_batch[cols].values.astype(float).reshape(noise.shape)
+                values = np.where(is_absolute, values + std * noise, np.clip(values * (1. + std * noise), 0., None))
+                df_batch[cols] = values.reshape(-1, len(cols))
+            df_batch.hgc._pp = self._pp
+            result = getattr(df_batch.hgc, method_name)(inplace=False, **method_kwargs)
+            results[positions] = np.percentile(result.values.astype(float).reshape(len(positions), n_samples),
+                                               percentiles, axis=1).T
+
+        return pd.DataFrame(results, index=self._obj.index,
+                            columns=[f'{result.name}_p{percentile:g}' for percentile in percentiles])
+
+    @requires_ph
+    def _analytic_speciation(self, **kwargs):
+        """ Speciation of all samples with the vectorized model in `hgc.analytic`. """
+        if kwargs:
+            raise ValueError(f"Argument(s) {', '.join(kwargs)} can only be used in combination with use_phreeqc=True")
+        if 'temp' not in self._obj.columns:
+            raise ValueError('The required column temp is missing in the dataframe. ' +
+                             'Add a column temp manually or consolidate temp_lab or temp_field ' +
+                             'to temp by running the method DataFrame.hgc.consolidate().')
+
+        df_in = self._make_input_df(list(analytic.INPUT_COLUMNS))
+        # like in phreeqc, samples without temperature are assumed to be at 25 °C
+        df_in['temp'] = self._obj['temp'].astype(float).fillna(25.).values
+        return analytic.speciate(df_in)
+
+    @requires_ph
+    def _interpolate_saturation_index(self, mineral_or_gas, lookup_table, **kwargs):
+        """ Saturation index interpolated in `lookup_table`, with phreeqc for rows outside of its grid. """
+        if not isinstance(lookup_table, lookup.SaturationIndexTable):
+            lookup_table = lookup.SaturationIndexTable.load(lookup_table)
+        database = engine.database_path(self._database).name
+        if lookup_table.database != database:
+            raise ValueError(f'The lookup table is calculated with the database {lookup_table.database}, '
+                             f'not with {database}.')
+        if 'temp' not in self._obj.columns:
+            raise ValueError('The required column temp is missing in the dataframe. ' +
+                             'Add a column temp manually or consolidate temp_lab or temp_field ' +
+                             'to temp by running the method DataFrame.hgc.consolidate().')
+
+        df_in = self._make_input_df(list(analytic.INPUT_COLUMNS))
+        df_in['temp'] = self._obj['temp'].astype(float).fillna(25.).values
+        df_in['background_ionic_strength'] = lookup.background_ionic_strength(df_in)
+        saturation_index, is_in_grid = lookup_table.interpolate(df_in, mineral_or_gas)
+
+        error_bound = lookup_table.error_bound.get(next(p for p in lookup_table.phases
+                                                        if p.lower() == mineral_or_gas.lower()))
+        logging.info(f"Interpolated the saturation index of {mineral_or_gas} for {is_in_grid.sum()} row(s) " +
+                     f"(interpolation error bound {error_bound}), {(~is_in_grid).sum()} row(s) outside " +
+                     "the grid are calculated with phreeqc.")
+        if not is_in_grid.all():
+            df_outside = self._obj.iloc[np.flatnonzero(~is_in_grid)].copy()
+            df_outside.hgc._pp = self._pp
+            saturation_index[~is_in_grid] = df_outside.hgc.get_saturation_index(mineral_or_gas, inplace=False,
+                                                                                **kwargs).values
+        return saturation_index
+
+    @supports_database
     def get_partial_pressure(self, gas, use_phreeqc=True, inplace=True, **kwargs):
         """ adds or returns the partial pressure of a gas using phreeqc. It is an alias for `get_saturation_index` so
             look at that method for details. gas column is pp_<gas_name>
@@ -1121,18 +1824,29 @@ class SamplesFrame(object):
         else:
             return pp_gas
 
-    def get_specific_conductance(self, use_phreeqc=True, inplace=True, **kwargs):
+    @supports_database
+    def get_specific_conductance(self, use_phreeqc=True, inplace=True, checkpoint=None, reference_temp=None, **kwargs):
         """ returns the specific conductance (sc) of a water sample using phreeqc. sc is
             also known as electric conductivity (ec) or egv measurements.
 
             Parameters
             ----------
             use_phreeqc: bool, optional
-                    whether to return use phreeqc as backend or fall back on internal hgc-routines to calculate SI
-                    or partial pressure
+                    whether to return use phreeqc as backend or fall back on internal hgc-routines to calculate
+                    the specific conductance. The internal routines (see `hgc.analytic`) use the same model as phreeqc
+                    (diffusion coefficients of the ions corrected for ionic strength and the viscosity of water),
+                    but are vectorized and much faster. They agree with phreeqc within 1% for an ionic strength
+                    below 0.03 and within 4% up to 0.2.
             inplace: bool, optional, default=True
                     whether the specific conductance should be added to the `pd.DataFrame` (inplace=True)
                     as column `sc` or returned as a `pd.Series` (inplace=False).
+            checkpoint: str, pathlib.Path or hgc.checkpoint.Checkpoint, optional
+                    (path to the) SQLite file to which the results are written while computing.
+                    See `get_saturation_index`.
+            reference_temp: float, optional
+                    temperature (°C) to which the specific conductance is compensated, e.g. 20 to compare it
+                    with the column `ec`. If None (default), the specific conductance at the temperature of the
+                    sample is returned.
             **kwargs:
                      are passed to the method `get_phreeqpython_solutions`
 
@@ -1141,22 +1855,442 @@ class SamplesFrame(object):
             pandas.Series or None
                 Returns None if `inplace=True` and `pd.Series` with specific conductance for each row in `SamplesFrame`
                 if `inplace=False`.
-        """
-        if not use_phreeqc:
-            raise NotImplementedError('use_phreeqc=False is not yet implemented.')
 
-        # create phreeqpython solutions
-        solutions = self.get_phreeqpython_solutions(inplace=False, **kwargs)
-        # extract sc from them
-        specific_conductance = [s.sc for s in solutions]
-        # clean up
-        self._clean_up_phreeqpython_solutions(solutions)
+            Examples
+            --------
+            Quick check of the measured EC (at 20 °C) of a large data set::
 
-        # return it as series with the same index as the dataframe
+                sc = df.hgc.get_specific_conductance(use_phreeqc=False, reference_temp=20, inplace=False)
+                suspicious = (sc / df['ec'] - 1).abs() > 0.1
+        """
         series_name = 'sc'
+        if checkpoint is not None:
+            specific_conductance = self._run_checkpointed('get_specific_conductance', checkpoint,
+                                                          use_phreeqc=use_phreeqc, reference_temp=reference_temp,
+                                                          **kwargs)[series_name]
+        elif not use_phreeqc:
+            speciation = self._analytic_speciation(**kwargs)
+            specific_conductance = analytic.specific_conductance(speciation, reference_temp=reference_temp)
+        else:
+            # create phreeqpython solutions
+            solutions = self.get_phreeqpython_solutions(inplace=False, **kwargs)
+            # extract sc from them
+            specific_conductance = [s.sc for s in solutions]
+            if reference_temp is not None:
+                # phreeqc calculates the specific conductance at the temperature of the solution,
+                # its temperature dependence is that of the viscosity of water
+                specific_conductance = (np.array(specific_conductance) *
+                                        analytic.water_viscosity([s.temperature for s in solutions]) /
+                                        analytic.water_viscosity(reference_temp))
+            # clean up
+            self._clean_up_phreeqpython_solutions(solutions)
+
+        # return it as series with the same index as the dataframe
         return_series = pd.Series(specific_conductance, index=self._obj.index,
                                   name=series_name)
         if inplace:
             self._obj[series_name] = return_series
         else:
             return return_series
+
+    @supports_database
+    def get_ionic_strength(self, use_phreeqc=True, inplace=True, **kwargs):
+        """ adds or returns the ionic strength (mol/kgw) of the samples, as column `ionic_strength`.
+
+            Parameters
+            ----------
+            use_phreeqc: bool, optional
+                    whether to use phreeqc or the vectorized model in `hgc.analytic`.
+            inplace: bool, optional, default=True
+                    whether the ionic strength should be added to the `pd.DataFrame` (inplace=True)
+                    or returned as a `pd.Series` (inplace=False).
+            **kwargs:
+                     are passed to the method `get_phreeqpython_solutions`
+
+            Returns
+            -------
+            pandas.Series or None
+                Returns None if `inplace=True` and `pd.Series` with the ionic strength for each row in `SamplesFrame`
+                if `inplace=False`.
+        """
+        series_name = 'ionic_strength'
+        if not use_phreeqc:
+            ionic_strength = self._analytic_speciation(**kwargs).ionic_strength
+        else:
+            solutions = self.get_phreeqpython_solutions(inplace=False, **kwargs)
+            ionic_strength = [s.I for s in solutions]
+            self._clean_up_phreeqpython_solutions(solutions)
+
+        return_series = pd.Series(ionic_strength, index=self._obj.index, name=series_name)
+        if inplace:
+            self._obj[series_name] = return_series
+        else:
+            return return_series
+
+    @supports_database(long_format=lambda arguments: not arguments['wide'])
+    def get_species(self, species=None, wide=False, use_phreeqc=True, batchsize=1000, **kwargs):
+        """
+        Return the molalities and activities of aqueous species (e.g. 'CO3-2', 'HCO3-', 'CaCO3') of all samples.
+
+        Parameters
+        ----------
+        species : list of str, optional
+            Names of the species as in the phreeqc database. By default all species of the samples.
+        wide : bool, default False
+            Whether to return a table in long format with a row per sample and species, or in wide
+            format with a row per sample.
+        use_phreeqc : bool, default True
+            Whether to use phreeqc or the vectorized model in `hgc.analytic`, which only knows
+            the species in `hgc.analytic.SPECIES`.
+        batchsize : int, default 1000
+            Number of phreeqc solutions that exist at the same time. The solutions are removed as soon
+            as the species are read.
+        **kwargs :
+            are passed to the method `get_phreeqpython_solutions`.
+
+        Returns
+        -------
+        pandas.DataFrame
+            In long format, the columns `sample` (index of the `SamplesFrame`), `species` (categorical),
+            `molality` and `activity` (mol/kgw). In wide format, a float32 DataFrame with the same index as the
+            `SamplesFrame` and as columns a MultiIndex with levels `quantity` (molality or activity) and `species`.
+            Species that are not in a sample have molality and activity 0.
+
+        Examples
+        --------
+        Carbonate species of all samples, per sample::
+
+            df_species = df.hgc.get_species(['CO2', 'HCO3-', 'CO3-2', 'CaCO3'], wide=True)
+            df_species['activity', 'CO3-2']
+        """
+        if not use_phreeqc:
+            speciation = self._analytic_speciation(**kwargs)
+            if species is None:
+                species = [name for name in speciation.species if name != 'e-']
+            unknown = [name for name in species if name not in speciation.species]
+            if unknown:
+                raise ValueError(f"Species {', '.join(unknown)} are not in the analytic model, use use_phreeqc=True")
+            names = list(species)
+            molalities = np.array([speciation.molality(name) for name in names]).T
+            activities = 10**np.array([speciation.log_activity(name) for name in names]).T
+        else:
+            molality_batches, activity_batches = [], []
+            for start in range(0, len(self._obj), batchsize):
+                df_batch = self._obj.iloc[start:start + batchsize].copy()
+                df_batch.hgc._pp = self._pp
+                solutions = df_batch.hgc.get_phreeqpython_solutions(inplace=False, **kwargs)
+                if species is None:
+                    molality_batches.append(pd.DataFrame([s.species_molalities for s in solutions]))
+                    activity_batches.append(pd.DataFrame([s.species_activities for s in solutions]))
+                else:
+                    molality_batches.append(pd.DataFrame([[s.molality(name, units='mol') for name in species]
+                                                          for s in solutions], columns=species))
+                    activity_batches.append(pd.DataFrame([[s.activity(name, units='mol') for name in species]
+                                                          for s in solutions], columns=species))
+                self._clean_up_phreeqpython_solutions(solutions)
+            # species that are absent in a batch are NaN after concatenation
+            df_molalities = pd.concat(molality_batches, ignore_index=True).fillna(0.)
+            names = list(df_molalities.columns)
+            molalities = df_molalities.values
+            activities = pd.concat(activity_batches, ignore_index=True).reindex(columns=names).fillna(0.).values
+
+        if wide:
+            columns = pd.MultiIndex.from_product([['molality', 'activity'], names], names=['quantity', 'species'])
+            return pd.DataFrame(np.hstack([molalities, activities]).astype(np.float32),
+                                index=self._obj.index, columns=columns)
+
+        n_species = len(names)
+        return pd.DataFrame({
+            'sample': np.repeat(self._obj.index.values, n_species),
+            'species': pd.Categorical.from_codes(np.tile(np.arange(n_species), len(self._obj)), categories=names),
+            'molality': np.asarray(molalities, dtype=np.float64).ravel(),
+            'activity': np.asarray(activities, dtype=np.float64).ravel(),
+        })
+
+    @supports_database
+    def mix_sweep(self, other, fractions=None, saturation_indices=(), n_jobs=1, chunksize=None, batchsize=500,
+                  **kwargs):
+        """
+        Mix every sample with another water in a range of fractions and calculate the pH,
+        temperature, specific conductance and saturation indices of the mixtures with phreeqc.
+        The solutions of both endmembers are calculated once and mixed for all fractions, the mixtures
+        are calculated in batches of phreeqc runs and equal mixtures only once.
+        Note that phreeqc brings the mixtures in redox equilibrium, so for samples that are not
+        (e.g. with both O2 and CH4) the mixture with fraction 0 can differ from the sample itself.
+
+        Parameters
+        ----------
+        other : pandas.Series or pandas.DataFrame
+            The other endmember (with HGC-columns): a single sample, as `pd.Series` or as
+            `pd.DataFrame` with one row, that is mixed with all samples, or a `pd.DataFrame`
+            with the same index as the `SamplesFrame` of which every row is mixed with the
+            sample with the same index.
+        fractions : array-like of float, default 0, 0.05, ..., 1
+            Fractions of `other` in the mixtures.
+        saturation_indices : list of str, optional
+            Minerals and gases of which the saturation index is calculated, as columns `si_<name>`.
+        n_jobs : int, default 1
+            Number of processes over which the samples are divided, -1 for all CPUs.
+            See `hgc.parallel.map_chunks`.
+        chunksize : int, optional
+            Number of samples per process if `n_jobs` is not 1.
+        batchsize : int, default 500
+            Number of mixtures that are calculated in one phreeqc run.
+        **kwargs :
+            are passed to the method `get_phreeqpython_solutions` for both endmembers.
+
+        Returns
+        -------
+        pandas.DataFrame
+            DataFrame in long format with a row per sample and fraction (MultiIndex with levels `sample`
+            and `fraction`) and columns `ph`, `temp`, `sc` and `si_<name>`. Rows for which phreeqc does
+            not converge are NaN.
+
+        Examples
+        --------
+        Saturation index of calcite along the mixing lines of groundwater samples with infiltrating river water::
+
+            df_mix = df.hgc.mix_sweep(df_river.iloc[0], fractions=np.linspace(0, 1, 21),
+                                      saturation_indices=['Calcite'])
+            df_mix['si_calcite'].unstack('fraction')
+        """
+        fractions = np.linspace(0., 1., 21) if fractions is None else np.asarray(fractions, dtype=float)
+        if ((fractions < 0) | (fractions > 1)).any():
+            raise ValueError('The fractions of the mixtures should be between 0 and 1.')
+
+        if isinstance(other, pd.Series):
+            other = other.to_frame().T
+        is_single = len(other) == 1 and not other.index.equals(self._obj.index)
+        if not is_single and not other.index.equals(self._obj.index):
+            raise ValueError('other should be a single sample or a DataFrame with the same index as the SamplesFrame.')
+        other = other.copy()
+        other[other.hgc.hgc_cols] = other[other.hgc.hgc_cols].astype(float)
+
+        if n_jobs != 1:
+            return parallel.map_chunks(self._obj, 'mix_sweep', n_jobs, chunksize,
+                                       aligned={} if is_single else {'other': other}, database=self._database,
+                                       **({'other': other} if is_single else {}),
+                                       fractions=fractions, saturation_indices=saturation_indices,
+                                       batchsize=batchsize, **kwargs)
+
+        other.hgc._pp = self._pp
+        solutions = self.get_phreeqpython_solutions(inplace=False, **kwargs).values
+        solutions_other = other.hgc.get_phreeqpython_solutions(inplace=False, **kwargs).values
+        if is_single:
+            solutions_other = np.repeat(solutions_other, len(solutions))
+
+        columns = ['ph', 'temp', 'sc'] + ['si_' + name.lower() for name in saturation_indices]
+        # the mixtures of all samples and fractions, like PhreeqPython.mix_solutions but with many MIX blocks per run.
+        # Endmembers with a zero fraction are left out, such that equal mixtures (e.g. fraction 1 with a single
+        # other sample, or solutions shared by rows) are calculated only once
+        mixtures = {}
+        rows = [mixtures.setdefault(tuple((number, weight) for number, weight in
+                                          [(solution.number, 1. - fraction), (solution_other.number, fraction)]
+                                          if weight > 0), len(mixtures))
+                for solution, solution_other in zip(solutions, solutions_other) for fraction in fractions]
+        mixtures = list(mixtures)
+        results = np.full((len(mixtures), len(columns)), np.nan)
+        n_failed = 0
+        for start in range(0, len(mixtures), batchsize):
+            batch = mixtures[start:start + batchsize]
+            numbers = range(self._pp.solution_counter + 1, self._pp.solution_counter + 1 + len(batch))
+            self._pp.solution_counter += len(batch)
+            inputs = ["MIX 1\n" + ''.join(f"{number} {weight}\n" for number, weight in mixture) +
+                      f"SAVE SOLUTION {mixture_number}\nEND\n"
+                      for mixture, mixture_number in zip(batch, numbers)]
+            is_converged = np.ones(len(inputs), dtype=bool)
+            try:
+                self._pp.ip.run_string(''.join(inputs))
+            except Exception:
+                # find the mixture(s) for which phreeqc did not converge
+                for i, input_ in enumerate(inputs):
+                    try:
+                        self._pp.ip.run_string(input_)
+                    except Exception as error:
+                        logging.info(error)
+                        is_converged[i] = False
+            n_failed += (~is_converged).sum()
+
+            for i, number in enumerate(numbers):
+                if is_converged[i]:
+                    mixture = Solution(self._pp, number)
+                    results[start + i] = ([mixture.pH, mixture.temperature, mixture.sc] +
+                                          [mixture.si(name) for name in saturation_indices])
+            self._pp.remove_solutions(numbers)
+
+        if n_failed:
+            logging.warning(f"Mixing did not converge for {n_failed} mixture(s), the results of these rows are NaN")
+
+        self._clean_up_phreeqpython_solutions(solutions)
+        self._clean_up_phreeqpython_solutions(solutions_other)
+
+        index = pd.MultiIndex.from_product([self._obj.index, fractions], names=['sample', 'fraction'])
+        return pd.DataFrame(results[rows], index=index, columns=columns)
+
+    @supports_database
+    def equilibrate_phases(self, phases, amount=10., n_jobs=1, chunksize=None, batchsize=500, **kwargs):
+        """
+        Equilibrate all samples with minerals and gases with phreeqc and return the composition of the water
+        after equilibration.
+
+        Parameters
+        ----------
+        phases : str, list of str or dict
+            Minerals and gases to equilibrate with, as dict with the target saturation index of each phase
+            (e.g. ``{'Calcite': 0, 'CO2(g)': -3.5}`` for calcite saturation at a CO2 partial pressure of
+            10^-3.5 atm) or as list of phases that are brought to saturation (saturation index 0).
+        amount : float, default 10.
+            Amount (mol) of each phase that is available for dissolution.
+        n_jobs : int, default 1
+            Number of processes over which the samples are divided, -1 for all CPUs.
+            See `hgc.parallel.map_chunks`.
+        chunksize : int, optional
+            Number of samples per process if `n_jobs` is not 1.
+        batchsize : int, default 500
+            Number of solutions that are equilibrated in one phreeqc run.
+        **kwargs :
+            are passed to the method `get_phreeqpython_solutions`.
+
+        Returns
+        -------
+        pandas.DataFrame
+            DataFrame with the same index as the `SamplesFrame` and as columns the concentrations (mg/L) after
+            equilibration of the ions Ca, Mg, Na, K, Fe, Mn, NH4, Cl, SO4 and NO3 and of alkalinity (those that
+            are in the `SamplesFrame`), the pH and the saturation index of the phases (si_<phase>).
+            The alkalinity follows from the change in charge of the other ions. Rows for which phreeqc does
+            not converge are NaN.
+
+        Examples
+        --------
+        The water after equilibration with calcite at a CO2 partial pressure of 10^-2 atm::
+
+            df_eq = df.hgc.equilibrate_phases({'Calcite': 0., 'CO2(g)': -2.})
+        """
+        if isinstance(phases, str):
+            phases = [phases]
+        if not isinstance(phases, dict):
+            phases = {phase: 0. for phase in phases}
+
+        if n_jobs != 1:
+            return parallel.map_chunks(self._obj, 'equilibrate_phases', n_jobs, chunksize, database=self._database,
+                                       phases=phases, amount=amount, batchsize=batchsize, **kwargs)
+
+        solutions = self.get_phreeqpython_solutions(inplace=False, **kwargs).values
+        ions = [ion for ion in self._EQUILIBRATED_IONS if ion in self._obj.columns]
+        # solutions are shared by rows if dedupe_tolerance is passed, equilibrate them only once
+        unique_solutions = list({s.number: s for s in solutions}.values())
+        totals_before = np.array([[s.total(ion, units='mmol') for ion in ions] for s in unique_solutions])
+
+        phases_input = ''.join(f"{phase} {si} {amount}\n" for phase, si in phases.items())
+        is_converged = np.ones(len(unique_solutions), dtype=bool)
+        for start in range(0, len(unique_solutions), batchsize):
+            batch = unique_solutions[start:start + batchsize]
+            inputs = [f"USE SOLUTION {s.number}\nEQUILIBRIUM_PHASES 1\n{phases_input}SAVE SOLUTION {s.number}\nEND\n"
+                      for s in batch]
+            try:
+                self._pp.ip.run_string(''.join(inputs))
+            except Exception:
+                # find the solution(s) for which phreeqc did not converge, equilibrating twice
+                # gives the same result for the others
+                for i, input_ in enumerate(inputs):
+                    try:
+                        self._pp.ip.run_string(input_)
+                    except Exception as error:
+                        logging.info(error)
+                        is_converged[start + i] = False
+
+        if not is_converged.all():
+            logging.warning(f"Equilibration with {', '.join(phases)} did not converge for " +
+                            f"{(~is_converged).sum()} solution(s), the results of these rows are NaN")
+
+        columns = ions + (['alkalinity'] if 'alkalinity' in self._obj.columns else []) + \
+            ['ph'] + ['si_' + phase.lower() for phase in phases]
+        results = np.full((len(unique_solutions), len(columns)), np.nan)
+        for i, s in enumerate(unique_solutions):
+            if is_converged[i]:
+                results[i, len(ions):] = (([np.nan] if 'alkalinity' in columns else []) +
+                                          [s.pH] + [s.si(phase) for phase in phases])
+                results[i, :len(ions)] = [s.total(ion, units='mmol') for ion in ions]
+        totals_after = results[:, :len(ions)].copy()
+        results[:, :len(ions)] *= [analytic.INPUT_COLUMNS[ion][1] for ion in ions]
+
+        rows = pd.Series(range(len(unique_solutions)), index=[s.number for s in unique_solutions])[
+            [s.number for s in solutions]].values
+        df_equilibrated = pd.DataFrame(results[rows], index=self._obj.index, columns=columns)
+        if 'alkalinity' in columns:
+            # dissolution of the phases is electroneutral, with carbonate as the only weak acid
+            charges = np.array([self._EQUILIBRATED_IONS[ion] for ion in ions])
+            delta_charge = ((totals_after - totals_before) @ charges)[rows]
+            df_equilibrated['alkalinity'] = self._obj['alkalinity'].astype(float).fillna(0.).values + \
+                delta_charge * mw('HCO3')
+
+        self._clean_up_phreeqpython_solutions(solutions)
+        return df_equilibrated
+
+    async def aget_phreeqpython_solutions(self, inplace=True, chunksize=100, **kwargs):
+        """
+        Asynchronous version of `get_phreeqpython_solutions`: the solutions are calculated in chunks of
+        `chunksize` rows in the thread pool of `hgc.engine.executor`, without blocking the event loop.
+        The solutions belong to the PhreeqPython instance of this `SamplesFrame`, which should not be
+        used by other calculations until the solutions are returned.
+
+        If the task is cancelled, the chunk that is being calculated is finished, but the next chunks
+        are not started.
+        """
+        return_series = await self._arun('get_phreeqpython_solutions', chunksize, use_pool=False, **kwargs)
+        if inplace:
+            self._obj['pp_solutions'] = return_series
+        else:
+            return return_series
+
+    async def aget_saturation_index(self, mineral_or_gas, inplace=True, chunksize=100, **kwargs):
+        """
+        Asynchronous version of `get_saturation_index`: the rows are calculated in chunks of `chunksize`
+        rows in the thread pool of `hgc.engine.executor`, with PhreeqPython instances from `hgc.engine.pool`.
+        Concurrent calls share the thread pool fairly, since every call submits one chunk at a time.
+
+        If the task is cancelled, the chunk that is being calculated is finished, but the next chunks
+        are not started.
+
+        Examples
+        --------
+        ::
+
+            si_calcite = await df.hgc.aget_saturation_index('Calcite', inplace=False)
+        """
+        return_series = await self._arun('get_saturation_index', chunksize, mineral_or_gas=mineral_or_gas, **kwargs)
+        if inplace:
+            logging.info(f'Added column {return_series.name}')
+            self._obj[return_series.name] = return_series
+        else:
+            return return_series
+
+    async def aget_specific_conductance(self, inplace=True, chunksize=100, **kwargs):
+        """
+        Asynchronous version of `get_specific_conductance`, see `aget_saturation_index`.
+        """
+        return_series = await self._arun('get_specific_conductance', chunksize, **kwargs)
+        if inplace:
+            self._obj[return_series.name] = return_series
+        else:
+            return return_series
+
+    async def _arun(self, method_name, chunksize, use_pool=True, **kwargs):
+        """ Run `method_name` with inplace=False for chunks of rows in `hgc.engine.executor` and concatenate the results """
+        loop = asyncio.get_running_loop()
+        results = []
+        # an empty frame is run as one (empty) chunk
+        for start in range(0, max(len(self._obj), 1), chunksize):
+            chunk = self._obj.iloc[start:start + chunksize].copy()
+            results.append(await loop.run_in_executor(engine.executor(), self._run_chunk, method_name, chunk,
+                                                      use_pool, kwargs))
+        return pd.concat(results)
+
+    def _run_chunk(self, method_name, chunk, use_pool, kwargs):
+        """ Run `method_name` for the rows in `chunk`, with an engine from the pool if `use_pool` """
+        database = kwargs.get('database')
+        if not use_pool or not (database is None or isinstance(database, (str, Path))):
+            return getattr(self._with_engine(self._pp, self._database, chunk), method_name)(inplace=False, **kwargs)
+        kwargs = {key: value for key, value in kwargs.items() if key != 'database'}
+        with engine.pool.engine(database) as pp:
+            return getattr(self._with_engine(pp, database, chunk), method_name)(inplace=False, **kwargs)
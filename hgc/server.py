@@ -0,0 +1,248 @@
+"""
+Local compute server for HGC. The server keeps PhreeqPython instances with loaded databases
+(see `hgc.engine`) and combines the samples of concurrent requests for the same calculation
+into one DataFrame ("micro-batching"), such that many small clients do not each have to start
+Python, import hgc and load phreeqc. Start it with::
+
+    python -m hgc.server --port 8765
+    python -m hgc.server --socket /tmp/hgc.sock
+
+and send requests with `hgc.client.Client`. The protocol is JSON over HTTP: a POST to
+/<method name> with ``{"samples": [...], "kwargs": {...}}``, where the samples are dicts of
+HGC-columns, returns ``{"result": ...}`` (see `encode_result`) or ``{"error": ...}``. Only the
+keyword arguments in `ALLOWED_KWARGS` are accepted.
+"""
+import argparse
+import json
+import logging
+import queue
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pandas as pd
+
+import hgc  # noqa: F401, registers the hgc accessor
+from hgc import engine
+
+# methods of the SamplesFrame that the server runs
+METHODS = ('get_saturation_index', 'get_partial_pressure', 'get_specific_conductance', 'get_ionic_strength',
+           'equilibrate_phases')
+# keyword arguments that clients can pass per method. Arguments that access files (checkpoint, lookup_table),
+# start processes (n_jobs) or multiply the work (n_samples) are not accepted
+_SOLUTION_KWARGS = ('database', 'equilibrate_with', 'dedupe_tolerance')
+ALLOWED_KWARGS = {
+    'get_saturation_index': ('mineral_or_gas', 'use_phreeqc') + _SOLUTION_KWARGS,
+    'get_partial_pressure': ('gas', 'use_phreeqc') + _SOLUTION_KWARGS,
+    'get_specific_conductance': ('use_phreeqc', 'reference_temp') + _SOLUTION_KWARGS,
+    'get_ionic_strength': ('use_phreeqc',) + _SOLUTION_KWARGS,
+    'equilibrate_phases': ('phases', 'amount') + _SOLUTION_KWARGS,
+}
+# methods that add columns to the DataFrame by default, they are called with inplace=False
+_INPLACE_METHODS = ('get_saturation_index', 'get_partial_pressure', 'get_specific_conductance', 'get_ionic_strength')
+
+
+def encode_result(result):
+    """ Return a JSON serializable dict of a pandas.Series or pandas.DataFrame (without the index) """
+    if isinstance(result, pd.Series):
+        return {'name': result.name, 'data': result.tolist()}
+    return {'columns': list(result.columns), 'data': result.values.tolist()}
+
+
+def decode_result(result, index):
+    """ Return the pandas.Series or pandas.DataFrame of `encode_result` with `index` """
+    if 'columns' in result:
+        return pd.DataFrame(result['data'], index=index, columns=result['columns'], dtype=float)
+    return pd.Series(result['data'], index=index, name=result['name'], dtype=float)
+
+
+class MicroBatcher(object):
+    """
+    Runs requests for `SamplesFrame` methods in a background thread. Requests for the same method
+    with the same arguments that arrive within `max_delay` seconds of the first one are combined
+    into a single calculation of at most `max_batch` samples.
+
+    Parameters
+    ----------
+    max_batch : int, default 1000
+        Maximum number of samples of a batch. A single request with more samples is not split.
+    max_delay : float, default 0.005
+        Time (s) to wait for other requests after the first request of a batch arrived.
+    """
+    def __init__(self, max_batch=1000, max_delay=0.005):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.n_batches = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='hgc-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, method_name, samples, kwargs=None):
+        """
+        Calculate `method_name` for `samples` (list of dicts with HGC-columns) and wait for the result.
+
+        Returns
+        -------
+        pandas.Series or pandas.DataFrame
+            The result of the method for the samples, with a RangeIndex.
+        """
+        if method_name not in METHODS:
+            raise ValueError(f"Method {method_name} is not supported by the server, use one of {', '.join(METHODS)}.")
+        kwargs = _validated_kwargs(method_name, kwargs or {})
+        key = (method_name, json.dumps(kwargs, sort_keys=True))
+        future = Future()
+        self._queue.put((key, samples, kwargs, future))
+        return future.result()
+
+    def _run(self):
+        pending = []
+        while True:
+            if not pending:
+                pending.append(self._queue.get())
+            key = pending[0][0]
+            batch = [request for request in pending if request[0] == key]
+            pending = [request for request in pending if request[0] != key]
+            n_samples = sum(len(request[1]) for request in batch)
+            deadline = time.monotonic() + self.max_delay
+            while n_samples < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request[0] == key:
+                    batch.append(request)
+                    n_samples += len(request[1])
+                else:
+                    pending.append(request)
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        self.n_batches += 1
+        (method_name, _), _, kwargs, _ = batch[0]
+        try:
+            results = _calculate(method_name, [request[1] for request in batch], kwargs)
+        except Exception as error:
+            if len(batch) == 1:
+                batch[0][3].set_exception(error)
+            else:
+                # calculate the requests one by one, such that only the request with the invalid sample fails
+                for request in batch:
+                    self._run_batch([request])
+            return
+        logging.debug(f'Calculated {method_name} for {len(batch)} request(s) in one batch')
+        for request, result in zip(batch, results):
+            request[3].set_result(result)
+
+
+def _validated_kwargs(method_name, kwargs):
+    """ Return `kwargs` as dict, or raise a ValueError if they contain arguments that are not in `ALLOWED_KWARGS` """
+    if not isinstance(kwargs, dict):
+        raise ValueError('kwargs should be a JSON object.')
+    invalid = [key for key in kwargs if key not in ALLOWED_KWARGS[method_name]]
+    if invalid:
+        raise ValueError(f"Argument(s) {', '.join(map(str, invalid))} are not supported by the server for "
+                         f"{method_name}, use {', '.join(ALLOWED_KWARGS[method_name])}.")
+    database = kwargs.get('database')
+    if database is not None and (not isinstance(database, str) or Path(database).name != database):
+        raise ValueError('database should be the name of a database of phreeqpython, not a path.')
+    return dict(kwargs)
+
+
+def _calculate(method_name, sample_lists, kwargs):
+    """ Run `method_name` for all samples in `sample_lists` at once and return the results per list """
+    df = pd.DataFrame([sample for samples in sample_lists for sample in samples])
+    df[df.hgc.hgc_cols] = df[df.hgc.hgc_cols].astype(float)
+    kwargs = dict(kwargs)
+    database = kwargs.pop('database', None)
+    if method_name in _INPLACE_METHODS:
+        kwargs['inplace'] = False
+    with engine.pool.engine(database) as pp:
+        result = getattr(df.hgc._with_engine(pp, database), method_name)(**kwargs)
+    results, start = [], 0
+    for samples in sample_lists:
+        results.append(result.iloc[start:start + len(samples)].reset_index(drop=True))
+        start += len(samples)
+    return results
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    # set by make_server
+    batcher = None
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._send(200, {'status': 'ok', 'batches': self.batcher.n_batches})
+        else:
+            self._send(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        method_name = self.path.strip('/')
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            result = self.batcher.submit(method_name, body['samples'], body.get('kwargs'))
+        except Exception as error:
+            self._send(400, {'error': f'{type(error).__name__}: {error}'})
+        else:
+            self._send(200, {'result': encode_result(result)})
+
+    def _send(self, status, content):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # the client address of a Unix socket is empty
+        return str(self.client_address[0]) if self.client_address else 'unix socket'
+
+    def log_message(self, format, *args):
+        logging.debug(f'{self.address_string()} {format % args}')
+
+
+class _UnixThreadingHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(host='127.0.0.1', port=8765, socket_path=None, max_batch=1000, max_delay=0.005):
+    """
+    Return the HTTP server, listening on `host` and `port` or on the Unix socket `socket_path`.
+    Call its method `serve_forever` to handle requests.
+    """
+    handler = type('RequestHandler', (_RequestHandler,), {'batcher': MicroBatcher(max_batch, max_delay)})
+    if socket_path is not None:
+        return _UnixThreadingHTTPServer(str(socket_path), handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m hgc.server', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1', help='host to listen on (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='port to listen on (default 8765)')
+    parser.add_argument('--socket', help='path of a Unix socket to listen on instead of host and port')
+    parser.add_argument('--max-batch', type=int, default=1000, help='maximum number of samples per batch')
+    parser.add_argument('--max-delay', type=float, default=5., help='time (ms) to wait for requests to batch')
+    args = parser.parse_args(args)
+
+    server = make_server(args.host, args.port, args.socket, args.max_batch, args.max_delay / 1000.)
+    # load the default database before the first request
+    with engine.pool.engine():
+        pass
+    logging.info(f'hgc server listening on {args.socket or f"http://{args.host}:{args.port}"}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
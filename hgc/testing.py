@@ -0,0 +1,186 @@
+"""
+Synthetic samples for benchmarks and load tests. `generate_samples` returns any number of
+samples that look like a lab export: realistic and (nearly) electroneutral concentrations of
+the major ions and trace elements, redox-dependent concentrations (oxic and anoxic samples),
+values below the detection limit as strings like '<0.01', missing values and total nitrogen
+and phosphorus next to the nitrogen and phosphate ions.
+
+The concentrations are drawn from log-normal distributions per profile, see `PROFILES`.
+"""
+import numpy as np
+import pandas as pd
+
+from hgc.constants.constants import mw
+
+# concentrations per profile as {column: (median oxic, median anoxic, sigma, detection limit)} in the
+# unit of the column (see `hgc.constants.constants.units`), sigma is the standard deviation of the logarithm.
+# Na is not drawn, it balances the charge of the other ions.
+_GROUNDWATER = {
+    'Ca': (60., 80., 0.5, 0.5),
+    'Mg': (8., 10., 0.5, 0.1),
+    'K': (3., 2.5, 0.6, 0.1),
+    'NH4': (0.03, 1.2, 0.9, 0.02),
+    'Fe': (0.05, 6., 0.9, 0.01),
+    'Mn': (0.02, 0.3, 0.9, 0.01),
+    'alkalinity': (180., 250., 0.4, 5.),
+    'Cl': (30., 30., 0.6, 1.),
+    'SO4': (50., 25., 0.7, 1.),
+    'NO3': (15., 0.2, 1., 0.1),
+    'NO2': (0.02, 0.01, 0.8, 0.01),
+    'PO4': (0.1, 0.5, 0.9, 0.03),
+    'F': (0.15, 0.2, 0.5, 0.05),
+    'SiO2': (15., 25., 0.4, 0.5),
+    'O2_field': (6., 0.1, 0.6, 0.1),
+    'CH4': (0.01, 2., 1.2, 0.01),
+    'doc': (2., 5., 0.6, 0.1),
+    # μg/L
+    'Li': (3., 5., 0.6, 1.),
+    'B': (30., 50., 0.6, 5.),
+    'Al': (10., 5., 1., 5.),
+    'Br': (100., 150., 0.6, 10.),
+    'Sr': (300., 400., 0.6, 5.),
+    'Ba': (50., 80., 0.6, 2.),
+    'Zn': (20., 10., 1., 5.),
+    'Cu': (3., 1., 1., 1.),
+    'Ni': (3., 2., 1., 1.),
+    'Co': (0.5, 0.5, 1., 0.2),
+    'Pb': (0.5, 0.3, 1., 0.2),
+    'As': (1., 5., 1., 0.5),
+}
+
+PROFILES = {
+    # fresh groundwater of mixed redox state
+    'groundwater': {'anoxic': 0.5, 'ph': (7., 0.5), 'temp': (11., 1.5), 'concentrations': _GROUNDWATER},
+    # groundwater with seawater intrusion
+    'brackish': {'anoxic': 0.8, 'ph': (7.3, 0.3), 'temp': (11., 1.5), 'concentrations': {
+        **_GROUNDWATER,
+        'Ca': (150., 200., 0.4, 0.5),
+        'Mg': (100., 120., 0.5, 0.1),
+        'K': (30., 30., 0.5, 0.1),
+        'Cl': (2000., 2000., 0.7, 1.),
+        'SO4': (300., 150., 0.6, 1.),
+        'Br': (7000., 7000., 0.7, 10.),
+        'B': (1000., 1000., 0.6, 5.),
+        'Sr': (5000., 5000., 0.6, 5.),
+    }},
+}
+
+# cations and anions of the charge balance as {column: mg per meq}
+_CATIONS = {'Ca': mw('Ca') / 2, 'Mg': mw('Mg') / 2, 'K': mw('K'), 'NH4': mw('N') + 4 * mw('H'),
+            'Fe': mw('Fe') / 2, 'Mn': mw('Mn') / 2}
+_ANIONS = {'alkalinity': mw('HCO3'), 'Cl': mw('Cl'), 'SO4': mw('SO4') / 2, 'NO3': mw('NO3'), 'NO2': mw('NO2'),
+           'F': mw('F')}
+
+# the minimum concentration of Na (mg/L), Cl is added if the other cations exceed the anions
+_MIN_NA = 2.
+
+# columns that are never missing: the major ions are always analysed and consolidate requires O2 to be complete
+_COMPLETE_COLUMNS = ('Na', 'K', 'Ca', 'Mg', 'alkalinity', 'Cl', 'SO4', 'O2_field')
+
+
+def generate_samples(n, profile='groundwater', seed=None, censored=True, missing=0.02, duplicates=0.1,
+                     imbalance=0.02):
+    """
+    Return `n` synthetic samples as they are read from a lab export (use `SamplesFrame.make_valid`
+    to validate them).
+
+    Parameters
+    ----------
+    n : int
+        Number of samples.
+    profile : str, default 'groundwater'
+        Type of water, one of the keys of `PROFILES`.
+    seed : int or numpy.random.Generator, optional
+        Seed of the random numbers. The same seed returns the same samples.
+    censored : bool, default True
+        Replace concentrations below the detection limit by strings like '<0.01'.
+    missing : float, default 0.02
+        Fraction of the concentrations that is missing (NaN). The major ions, O2, pH, EC and
+        temperature are complete, such that the samples can be consolidated.
+    duplicates : float, default 0.1
+        Fraction of the samples in which total nitrogen (N) and total phosphorus (P) are measured in
+        addition to NH4, NO2, NO3 and PO4. The columns N and P are left out if 0.
+    imbalance : float, default 0.02
+        Standard deviation of the relative ion balance (anions - cations) / (anions + cations).
+
+    Returns
+    -------
+    pandas.DataFrame
+        The samples, with the columns pH, EC and temperature measured in the lab and the field,
+        and the concentrations of `profile` and Na.
+
+    Examples
+    --------
+    ::
+
+        df = hgc.testing.generate_samples(1000000, seed=0)
+        df.hgc.make_valid()
+        df.hgc.consolidate(use_so4=None)
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Invalid profile {profile}. Profile should be one of {', '.join(PROFILES)}.")
+    profile = PROFILES[profile]
+    rng = np.random.default_rng(seed)
+
+    ph = np.clip(rng.normal(*profile['ph'], n), 4.5, 9.)
+    anoxic = rng.random(n) < profile['anoxic']
+    values = {}
+    for col, (median_oxic, median_anoxic, sigma, _) in profile['concentrations'].items():
+        median = np.where(anoxic, median_anoxic, median_oxic)
+        values[col] = median * rng.lognormal(0., sigma, n)
+    # acid water has little alkalinity
+    values['alkalinity'] *= np.minimum(10 ** (0.6 * (ph - 7.)), 1.5)
+
+    # Na balances the charge, up to the imbalance
+    cations = sum(values[col] / meq for col, meq in _CATIONS.items())
+    anions = sum(values[col] / meq for col, meq in _ANIONS.items())
+    ratio = np.clip(rng.normal(0., imbalance, n), -0.5, 0.5)
+    # (anions - cations) / (anions + cations) = ratio
+    na = (anions * (1 - ratio) / (1 + ratio) - cations) * mw('Na')
+    chloride = np.maximum(_MIN_NA - na, 0.)
+    values = {'Na': np.maximum(na, _MIN_NA), **values}
+    values['Cl'] += chloride / mw('Na') * (1 + ratio) / (1 - ratio) * mw('Cl')
+    cations += values['Na'] / mw('Na')
+
+    # rule of thumb: EC (μS/cm at 25 °C) is 100 times the sum of cations (meq/L), 2 % less per °C below 25 °C
+    temp = rng.normal(*profile['temp'], n)
+    ec = 100. * cations * (1 + 0.02 * (temp - 25.)) * rng.lognormal(0., 0.05, n)
+    df = pd.DataFrame({
+        'ph_field': ph.round(2),
+        'ph_lab': (ph + rng.normal(0., 0.1, n)).round(2),
+        'ec_field': (ec * rng.lognormal(0., 0.05, n)).round(0),
+        'ec_lab': ec.round(0),
+        'temp_field': temp.round(1),
+    })
+
+    detection_limits = {col: dl for col, (_, _, _, dl) in profile['concentrations'].items()}
+    detection_limits['Na'] = 0.5
+    if duplicates:
+        measured = rng.random(n) < duplicates
+        n_total = values['NH4'] / _CATIONS['NH4'] + values['NO3'] / mw('NO3') + values['NO2'] / mw('NO2')
+        # organic nitrogen and phosphorus are included in the totals
+        values['N'] = np.where(measured, n_total * mw('N') + 0.05 * values['doc'], np.nan)
+        values['P'] = np.where(measured, values['PO4'] * mw('P') / mw('PO4') * rng.lognormal(0.1, 0.1, n), np.nan)
+        detection_limits.update(N=0.1, P=0.01)
+
+    for col in values:
+        df[col] = _lab_values(values[col], detection_limits[col] if censored else None,
+                              0. if col in _COMPLETE_COLUMNS else missing, rng)
+    return df
+
+
+def _lab_values(values, detection_limit, missing, rng):
+    """ Return `values` rounded to 3 significant digits, with strings '<x' below the detection limit and NaN """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = 10. ** (np.floor(np.log10(values)) - 2)
+        values = np.where(values > 0, np.round(values / scale) * scale, values)
+    if missing:
+        values = np.where(rng.random(len(values)) < missing, np.nan, values)
+    if detection_limit is None:
+        return values
+    below = values < detection_limit
+    if not below.any():
+        return values
+    values = values.astype(object)
+    values[below] = f'<{detection_limit:g}'
+    return values
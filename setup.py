@@ -40,6 +40,12 @@ setup(
         # 'fuzzywuzzy>=1.0',
 
         ],
+    extras_require={
+        'parquet': ['pyarrow>=7'],
+    },
+    entry_points={
+        'console_scripts': ['hgc=hgc.cli:main'],
+    },
     include_package_data=True,
     url='https://github.com/KWR-Water/hgc',
     author='KWR Water Research Institute',
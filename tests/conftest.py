@@ -0,0 +1,18 @@
+''' Fixtures shared by the test modules '''
+import pandas as pd
+import pytest
+
+import hgc
+from . import test_directory
+
+
+@pytest.fixture(name='consolidated_data')
+def fixture_consolidated_data():
+    ''' fixture that loads the test data into a dataframe, makes it valid
+        and consolidates it. the dataframe is returned '''
+    df = pd.read_csv(test_directory / 'data' / 'dataset_basic.csv',
+                     skiprows=[1], index_col=None)
+    df[df.hgc.hgc_cols] = df[df.hgc.hgc_cols].astype(float)
+    df.hgc.make_valid()
+    df.hgc.consolidate(inplace=True, use_so4=None, use_ph='lab')
+    return df
@@ -0,0 +1,112 @@
+'''
+Tests of the vectorized speciation model in hgc.analytic
+'''
+import numpy as np
+import pandas as pd
+import pytest
+
+import hgc
+from hgc import analytic
+
+
+@pytest.mark.parametrize('phase', list(analytic.PHASES))
+def test_saturation_index_equals_phreeqc(consolidated_data, phase):
+    ''' Assert the saturation indices of the analytic model are close to the ones of phreeqc '''
+    df = consolidated_data
+    si_phreeqc = df.hgc.get_saturation_index(phase, inplace=False)
+    si_analytic = df.hgc.get_saturation_index(phase, use_phreeqc=False, inplace=False)
+
+    assert si_analytic.name == si_phreeqc.name
+    # absent elements give the same value as phreeqc
+    is_absent = si_phreeqc < -900
+    assert all(si_analytic[is_absent] == analytic.SI_ABSENT)
+    np.testing.assert_allclose(si_analytic[~is_absent], si_phreeqc[~is_absent], atol=0.02)
+
+
+def test_partial_pressure_analytic(consolidated_data):
+    ''' Assert get_partial_pressure passes use_phreeqc to get_saturation_index '''
+    df = consolidated_data
+    df.hgc.get_partial_pressure('CO2(g)', use_phreeqc=False, inplace=True)
+    pd.testing.assert_series_equal(df['pp_co2(g)'],
+                                   df.hgc.get_saturation_index('CO2(g)', use_phreeqc=False, inplace=False),
+                                   check_names=False)
+
+
+def test_saturation_index_analytic_unsupported(consolidated_data):
+    ''' Assert a ValueError is raised for phases or arguments that are not supported '''
+    df = consolidated_data
+    with pytest.raises(ValueError) as exc_info:
+        df.hgc.get_saturation_index('Halite', use_phreeqc=False)
+    assert 'use_phreeqc=True' in str(exc_info.value)
+
+    with pytest.raises(ValueError) as exc_info:
+        df.hgc.get_saturation_index('Calcite', use_phreeqc=False, equilibrate_with='Na')
+    assert 'equilibrate_with' in str(exc_info.value)
+
+
+def test_speciate_chunks(consolidated_data):
+    ''' Assert the result does not depend on the number of samples solved together '''
+    df_in = consolidated_data.hgc._make_input_df(list(analytic.INPUT_COLUMNS))
+    speciation = analytic.speciate(df_in)
+    speciation_chunked = analytic.speciate(df_in, chunksize=4)
+
+    np.testing.assert_allclose(speciation_chunked.molalities, speciation.molalities, rtol=1e-5)
+    np.testing.assert_allclose(analytic.saturation_index(speciation_chunked, 'calcite'),
+                               analytic.saturation_index(speciation, 'Calcite'), atol=1e-5)
+
+
+def test_specific_conductance_equals_phreeqc(consolidated_data):
+    ''' Assert the specific conductance of the analytic model is close to the one of phreeqc '''
+    df = consolidated_data
+    sc_phreeqc = df.hgc.get_specific_conductance(inplace=False)
+    sc_analytic = df.hgc.get_specific_conductance(use_phreeqc=False, inplace=False)
+
+    assert sc_analytic.name == 'sc'
+    np.testing.assert_allclose(sc_analytic, sc_phreeqc, rtol=0.04)
+    is_fresh = df.hgc._analytic_speciation().ionic_strength < 0.03
+    np.testing.assert_allclose(sc_analytic[is_fresh], sc_phreeqc[is_fresh], rtol=0.01)
+
+
+def test_specific_conductance_reference_temp(consolidated_data):
+    ''' Assert the temperature compensation agrees with phreeqc and the measured ec at 20 °C '''
+    df = consolidated_data
+    df_20 = df.copy()
+    df_20['temp'] = 20.
+    sc_20 = df_20.hgc.get_specific_conductance(inplace=False)
+    sc_compensated = df.hgc.get_specific_conductance(inplace=False, reference_temp=20)
+    np.testing.assert_allclose(sc_compensated, sc_20, rtol=0.02)
+
+    sc_analytic = df.hgc.get_specific_conductance(use_phreeqc=False, inplace=False, reference_temp=20)
+    np.testing.assert_allclose(sc_analytic, sc_compensated, rtol=0.04)
+    # the calculated ec is usable as a check on the measured ec
+    assert abs((sc_analytic / df['ec']).median() - 1) < 0.05
+
+
+def test_saturation_index_monte_carlo(consolidated_data, monkeypatch):
+    ''' Assert the percentiles of Monte Carlo simulations are reproducible, independent of the
+        batches and agree between the analytic model and phreeqc '''
+    df = consolidated_data.iloc[3:].copy()
+    uncertainty = {'Ca': 0.05, 'alkalinity': 0.05, 'ph': 0.1}
+    df_si = df.hgc.get_saturation_index('Calcite', use_phreeqc=False, inplace=False, n_samples=50,
+                                        uncertainty=uncertainty, seed=1)
+
+    assert list(df_si.columns) == ['si_calcite', 'si_calcite_p2.5', 'si_calcite_p50', 'si_calcite_p97.5']
+    assert (df_si['si_calcite_p2.5'] < df_si['si_calcite_p50']).all()
+    assert (df_si['si_calcite_p50'] < df_si['si_calcite_p97.5']).all()
+
+    monkeypatch.setattr(hgc.SamplesFrame, '_MONTE_CARLO_BATCHSIZE', 120)
+    df_batched = df.hgc.get_saturation_index('Calcite', use_phreeqc=False, inplace=False, n_samples=50,
+                                             uncertainty=uncertainty, seed=1)
+    pd.testing.assert_frame_equal(df_batched, df_si)
+
+    df_phreeqc = df.iloc[:4].hgc.get_saturation_index('Calcite', inplace=False, n_samples=50,
+                                                      uncertainty=uncertainty, seed=1)
+    np.testing.assert_allclose(df_phreeqc, df_si.iloc[:4], atol=0.02)
+
+    # without uncertainty all percentiles equal the saturation index
+    df.hgc.get_saturation_index('Calcite', use_phreeqc=False, n_samples=5, percentiles=[5, 95])
+    np.testing.assert_allclose(df['si_calcite_p5'], df['si_calcite'])
+    np.testing.assert_allclose(df['si_calcite_p95'], df['si_calcite'])
+
+    with pytest.raises(ValueError):
+        df.hgc.get_saturation_index('Calcite', use_phreeqc=False, n_samples=5, uncertainty={'Sr': 0.1})
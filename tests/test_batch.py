@@ -0,0 +1,121 @@
+''' Testing of the pipelines, the file-based batch processing and the command line interface '''
+import json
+import logging
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import hgc
+from hgc import batch, cli
+from hgc.pipeline import parse_pipeline, process_file, run_pipeline
+from . import test_directory
+
+PIPELINE = [
+    'make_valid',
+    {'method': 'consolidate', 'kwargs': {'use_so4': None, 'use_ph': 'lab'}},
+    {'method': 'get_saturation_index', 'kwargs': {'mineral_or_gas': 'Calcite'}},
+    'get_stuyfzand_water_type',
+]
+
+
+@pytest.fixture(name='raw_data')
+def fixture_raw_data():
+    return pd.read_csv(test_directory / 'data' / 'dataset_basic.csv', skiprows=[1], index_col=None)
+
+
+def test_parse_pipeline(tmp_path):
+    steps = parse_pipeline(PIPELINE)
+    assert steps[0] == ('make_valid', {})
+    assert steps[2] == ('get_saturation_index', {'mineral_or_gas': 'Calcite'})
+    assert parse_pipeline(json.dumps(PIPELINE)) == steps
+    (tmp_path / 'pipeline.json').write_text(json.dumps(PIPELINE))
+    assert parse_pipeline(tmp_path / 'pipeline.json') == steps
+
+    with pytest.raises(ValueError, match='Invalid method'):
+        parse_pipeline(['get_phreeqpython_solutions'])
+    with pytest.raises(ValueError, match='Invalid pipeline step'):
+        parse_pipeline([{'method': 'make_valid', 'inplace': True}])
+
+
+def test_run_pipeline(raw_data):
+    timings = {}
+    df = run_pipeline(raw_data.copy(), PIPELINE, timings=timings)
+    assert 'si_calcite' in df.columns
+    assert 'water_type' in df.columns
+    assert list(timings) == ['0:make_valid', '1:consolidate', '2:get_saturation_index', '3:get_stuyfzand_water_type']
+
+
+def _run_worker(directory):
+    return batch.run(directory)
+
+
+def test_batch(raw_data, tmp_path):
+    directory = tmp_path / 'job'
+    assert batch.split(raw_data, directory, chunksize=5, pipeline=PIPELINE) == 4
+    with pytest.raises(ValueError, match='already contains a job'):
+        batch.split(raw_data, directory)
+    with pytest.raises(ValueError, match='not been processed'):
+        batch.merge(directory)
+
+    # independent workers claim every chunk exactly once
+    with Pool(2) as pool:
+        processed = pool.map(_run_worker, [directory] * 3)
+    assert sorted(sum(processed, [])) == [0, 1, 2, 3]
+    assert batch.status(directory) == {'total': 4, 'claimed': 4, 'done': 4}
+
+    df = batch.merge(directory, tmp_path / 'result.csv')
+    expected = run_pipeline(raw_data.copy(), PIPELINE)
+    pd.testing.assert_series_equal(df['si_calcite'], expected['si_calcite'].reset_index(drop=True))
+    pd.testing.assert_series_equal(df['water_type'], expected['water_type'].reset_index(drop=True), check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'result.csv'), df)
+
+
+def test_batch_stale_lock(raw_data, tmp_path):
+    directory = tmp_path / 'job'
+    batch.split(raw_data, directory, chunksize=10, pipeline=PIPELINE)
+    # a worker that crashed while processing the first chunk
+    lock = directory / 'locks' / 'chunk_00000.lock'
+    lock.write_text('crashed')
+    assert batch.run(directory) == [1]
+    assert batch.run(directory, stale_after=3600) == []
+    os.utime(lock, (time.time() - 7200, time.time() - 7200))
+    assert batch.run(directory, stale_after=3600) == [0]
+
+
+def test_cli_batch(tmp_path):
+    directory = tmp_path / 'job'
+    (tmp_path / 'pipeline.json').write_text(json.dumps(PIPELINE))
+    assert cli.main(['batch', 'split', str(test_directory / 'data' / 'dataset_basic.csv'), str(directory),
+                     '--chunksize', '5', '--skiprows', '1', '--pipeline', str(tmp_path / 'pipeline.json')]) == 0
+    assert cli.main(['batch', 'merge', str(directory), str(tmp_path / 'result.csv')]) == 1
+    assert cli.main(['batch', 'run', str(directory)]) == 0
+    assert cli.main(['batch', 'merge', str(directory), str(tmp_path / 'result.csv')]) == 0
+    assert 'si_calcite' in pd.read_csv(tmp_path / 'result.csv').columns
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_process_file(tmp_path, n_jobs):
+    output = tmp_path / 'result.csv'
+    stats = process_file(test_directory / 'data' / 'dataset_basic.csv', output, pipeline=PIPELINE, n_jobs=n_jobs,
+                         chunksize=5, skiprows=[1])
+    assert stats['rows'] == 17
+    assert list(stats['timings']) == ['read', '0:make_valid', '1:consolidate', '2:get_saturation_index',
+                                      '3:get_stuyfzand_water_type', 'write']
+
+    raw_data = pd.read_csv(test_directory / 'data' / 'dataset_basic.csv', skiprows=[1])
+    expected = run_pipeline(raw_data, PIPELINE)
+    df = pd.read_csv(output)
+    assert len(df) == 17
+    np.testing.assert_allclose(df['si_calcite'], expected['si_calcite'])
+
+
+def test_cli_run(tmp_path, caplog):
+    with caplog.at_level(logging.INFO):
+        assert cli.main(['run', str(test_directory / 'data' / 'dataset_basic.csv'), str(tmp_path / 'result.xlsx'),
+                         '--pipeline', json.dumps(PIPELINE), '--chunksize', '4', '--skiprows', '1']) == 0
+    assert 'rows/s' in caplog.text
+    assert len(pd.read_excel(tmp_path / 'result.xlsx')) == 17
@@ -0,0 +1,59 @@
+''' Testing of the resolution of columns to HGC-columns '''
+import pandas as pd
+import pytest
+
+import hgc
+from hgc import columns
+from hgc.columns import resolve_columns
+
+
+@pytest.fixture(name='aliases')
+def fixture_aliases():
+    yield
+    columns.reset_aliases()
+
+
+def test_hgc_columns():
+    hgc_columns = columns.hgc_columns()
+    # N, P and S are both atoms and ions
+    assert len(hgc_columns) == len(set(hgc_columns))
+    assert hgc_columns.index('Ca') < hgc_columns.index('alkalinity') < hgc_columns.index('ph')
+    assert all(col in hgc_columns for col in columns.DEFAULT_ALIASES.values())
+
+
+def test_hgc_cols_cache():
+    df = pd.DataFrame({'ph': [7.], 'remark': ['x'], 'Ca': [40.], 'N': [1.]})
+    # in the order of the atoms, ions and properties
+    assert df.hgc.hgc_cols == ['N', 'Ca', 'ph']
+    # the cache is invalidated when the columns change
+    df['Na'] = 10.
+    assert df.hgc.hgc_cols == ['N', 'Na', 'Ca', 'ph']
+    df.drop(columns=['Ca'], inplace=True)
+    assert df.hgc.hgc_cols == ['N', 'Na', 'ph']
+    df.hgc.hgc_cols.append('Mg')
+    assert df.hgc.hgc_cols == ['N', 'Na', 'ph']
+
+
+def test_resolve_columns(aliases):
+    headers = ['Sample', 'pH', 'EC (uS/cm)', 'HCO3', 'Calcium [mg/l]', 'Ca', 'Temperatuur', 'Bicarbonate']
+    assert resolve_columns(headers) == {'Ca': 'Ca', 'pH': 'ph', 'EC (uS/cm)': 'ec', 'HCO3': 'alkalinity',
+                                        'Temperatuur': 'temp'}
+    assert resolve_columns(['Ca2+'], aliases={'Ca2+': 'Ca'}) == {'Ca2+': 'Ca'}
+    assert resolve_columns(['Ca2+']) == {}
+
+    columns.add_aliases({'Ca2+': 'Ca'})
+    assert resolve_columns(['Ca2+']) == {'Ca2+': 'Ca'}
+    with pytest.raises(ValueError, match='Invalid HGC-column'):
+        columns.add_aliases({'Calcium': 'calcium'})
+
+
+def test_resolve_aliases():
+    df = pd.DataFrame({'Sample': ['a'], 'pH': ['7.2'], 'Calcium (mg/l)': ['<1'], 'HCO3': [120.]})
+    df_renamed = df.hgc.resolve_aliases(inplace=False)
+    assert list(df_renamed.columns) == ['Sample', 'ph', 'Ca', 'alkalinity']
+    assert list(df.columns) == ['Sample', 'pH', 'Calcium (mg/l)', 'HCO3']
+
+    df.hgc.resolve_aliases()
+    df.hgc.make_valid()
+    assert df.hgc.hgc_cols == ['Ca', 'alkalinity', 'ph']
+    assert df.hgc.is_valid
@@ -0,0 +1,45 @@
+'''
+Tests of the evaluation of single samples in hgc.evaluate
+'''
+import numpy as np
+import pytest
+
+import hgc
+
+
+def test_evaluate_sample_equals_samples_frame(consolidated_data):
+    ''' Assert a single sample gives the same results as the SamplesFrame '''
+    df = consolidated_data
+    results = [hgc.evaluate_sample(sample, outputs=['si_Calcite', 'pp_CO2(g)', 'sc', 'ionic_strength'])
+               for sample in df.to_dict('records')]
+
+    np.testing.assert_allclose([r['si_Calcite'] for r in results],
+                               df.hgc.get_saturation_index('Calcite', inplace=False))
+    np.testing.assert_allclose([r['pp_CO2(g)'] for r in results],
+                               df.hgc.get_partial_pressure('CO2(g)', inplace=False))
+    np.testing.assert_allclose([r['sc'] for r in results],
+                               df.hgc.get_specific_conductance(inplace=False))
+    np.testing.assert_allclose([r['ionic_strength'] for r in results],
+                               df.hgc.get_ionic_strength(inplace=False))
+
+    sample = df.to_dict('records')[10]
+    result = hgc.evaluate_sample(sample, outputs=['si_Calcite'], database='phreeqc.dat', equilibrate_with='Na')
+    si_calcite = df.iloc[[10]].hgc.get_saturation_index('Calcite', inplace=False, database='phreeqc.dat',
+                                                        equilibrate_with='Na')
+    assert result['si_Calcite'] == pytest.approx(si_calcite.iloc[0], abs=1e-6)
+
+
+def test_evaluate_sample_invalid():
+    ''' Assert invalid samples and outputs raise a ValueError '''
+    sample = {'ph': 7.6, 'temp': 11., 'Ca': 48., 'alkalinity': 156.}
+    with pytest.raises(ValueError):
+        hgc.evaluate_sample(sample, outputs=['calcite'])
+    with pytest.raises(ValueError):
+        hgc.evaluate_sample(dict(sample, Ca=-1.))
+    with pytest.raises(ValueError):
+        hgc.evaluate_sample(dict(sample, Ca='<1'))
+    with pytest.raises(ValueError):
+        hgc.evaluate_sample(dict(sample, ph=None))
+    for temp in [None, float('nan')]:
+        with pytest.raises(ValueError, match='temp'):
+            hgc.evaluate_sample(dict(sample, temp=temp))
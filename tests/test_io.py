@@ -0,0 +1,105 @@
+''' Testing of the Parquet I/O with HGC metadata '''
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+import hgc
+from hgc.io import hgc_metadata
+from . import test_directory
+
+
+def test_hgc_metadata(consolidated_data):
+    metadata = hgc_metadata(consolidated_data)
+    assert metadata['units']['Ca'] == 'mg/L'
+    assert metadata['units']['ph'] == '-'
+    assert metadata['consolidation'] == {'ph': 'lab', 'ec': 'lab', 'O2': 'field', 'temp': 'field',
+                                         'alkalinity': 'alkalinity'}
+
+
+def test_censoring():
+    df = pd.DataFrame({'ph': [7., 7.5, 8.], 'Ca': ['<2', '40', '> 100'], 'Na': ['10', '<1', '12']})
+    df.hgc.make_valid()
+    censoring = hgc_metadata(df)['censoring']
+    assert censoring == {'Ca': {'below': [0], 'above': [2], 'rule': 'half'},
+                         'Na': {'below': [1], 'above': [], 'rule': 'half'}}
+    np.testing.assert_allclose(df['Ca'], [1., 40., 150.])
+
+    # the censoring follows the rows when they are selected or reordered
+    censoring = hgc_metadata(df[df['ph'] > 7.2])['censoring']
+    assert censoring == {'Ca': {'below': [], 'above': [1], 'rule': 'half'},
+                         'Na': {'below': [0], 'above': [], 'rule': 'half'}}
+    censoring = hgc_metadata(df.iloc[::-1])['censoring']
+    assert censoring['Na'] == {'below': [1], 'above': [], 'rule': 'half'}
+
+    # the rows cannot be identified with duplicate index labels
+    assert hgc_metadata(pd.concat([df, df]))['censoring'] == {}
+
+
+def test_parquet(consolidated_data, tmp_path):
+    pytest.importorskip('pyarrow')
+    df = consolidated_data
+    df.hgc.to_parquet(tmp_path / 'samples.parquet')
+
+    df_read = hgc.read_parquet(tmp_path / 'samples.parquet')
+    assert df_read['Ca'].dtype == np.float32
+    pd.testing.assert_frame_equal(df_read, df, check_dtype=False, rtol=1e-6)
+    assert df_read.attrs['hgc']['units']['Ca'] == 'mg/L'
+    assert df_read.attrs['hgc']['consolidation']['ph'] == 'lab'
+    for col, censoring in df.attrs['hgc'].get('censoring', {}).items():
+        np.testing.assert_array_equal(df_read.attrs['hgc']['censoring'][col]['below'], censoring['below'])
+
+    df_ca = hgc.read_parquet(tmp_path / 'samples.parquet', columns=['Ca'], filters=[('ph', '>', 7.)])
+    assert list(df_ca.columns) == ['Ca']
+    assert len(df_ca) == (df['ph'] > 7.).sum()
+    assert df_ca.attrs['hgc']['censoring'] == {}
+
+    df_hgc = hgc.read_parquet(tmp_path / 'samples.parquet', hgc_columns=True)
+    assert list(df_hgc.columns) == df.hgc.hgc_cols
+
+
+def test_read_lab_workbook_xls():
+    mapping = {'labcode': 'labcode', 'pH': 'ph', 'EC': 'ec', 'HCO3': 'alkalinity', 'Ca': 'Ca',
+               'Mn': ('Mn', 'ug/L'), 'P': ('PO4', 'μg/l')}
+    df = hgc.read_lab_workbook(test_directory / 'data' / 'analyse_bas.xls', mapping=mapping, sheet_name='labab',
+                               skiprows=[0, 1, 3], index_col='labcode')
+
+    # the same as the pandas route of test_hupsel
+    expected = pd.read_excel(test_directory / 'data' / 'analyse_bas.xls', sheet_name='labab', skiprows=[0, 1, 3],
+                             usecols=['labcode', 'pH', 'EC', 'HCO3', 'Ca', 'Mn', 'P'])
+    expected = expected.dropna(how='all').set_index('labcode')
+    expected.Mn = expected.Mn / 1000
+    expected.P = expected.P / 1000
+    expected = expected.rename(columns={'HCO3': 'alkalinity', 'pH': 'ph', 'EC': 'ec', 'P': 'PO4'})
+    pd.testing.assert_frame_equal(df, expected[df.columns], check_dtype=False)
+
+
+def test_read_lab_workbook_xlsx(tmp_path):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'results'
+    sheet.append(['Lab export 2020'])
+    sheet.append(['Sample', 'Calcium', 'pH', 'Iron', 'EC', 'Remark'])
+    sheet.append(['', 'mg/l', '', 'ug/l', 'mS/m', ''])
+    sheet.append(['A', 40, 7.1, '<5', 45, 'ok'])
+    sheet.append(['B', '<0.5', 6.8, 120, None, 'not ok'])
+    sheet.append([None, None, None, None, None, None])
+    workbook.save(tmp_path / 'lab.xlsx')
+
+    df = hgc.read_lab_workbook(tmp_path / 'lab.xlsx', sheet_name='results', skiprows=[0, 2], index_col='id',
+                               mapping={'Sample': 'id', 'Calcium': 'Ca', 'pH': 'ph', 'Iron': ('Fe', 'ug/l'),
+                                        'EC': ('ec', 'mS/m')})
+    assert list(df.columns) == ['Ca', 'ph', 'Fe', 'ec']
+    assert list(df.index) == ['A', 'B']
+    assert df.loc['A', 'Fe'] == '<0.005'
+    assert df.loc['B', 'Fe'] == pytest.approx(0.12)
+    assert df.loc['A', 'ec'] == 450.
+
+    df.hgc.make_valid()
+    assert df.hgc.is_valid
+    np.testing.assert_allclose(df['Ca'], [40., 0.25])
+
+    with pytest.raises(ValueError, match='not found'):
+        hgc.read_lab_workbook(tmp_path / 'lab.xlsx', mapping={'Magnesium': 'Mg'}, skiprows=[0, 2])
+    with pytest.raises(ValueError, match='cannot be converted'):
+        hgc.read_lab_workbook(tmp_path / 'lab.xlsx', mapping={'Iron': ('Fe', 'mmol/l')}, skiprows=[0, 2])
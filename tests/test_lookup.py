@@ -0,0 +1,84 @@
+'''
+Tests of the precomputed saturation index tables in hgc.lookup
+'''
+import numpy as np
+import pandas as pd
+import pytest
+
+import hgc
+from hgc import lookup
+
+# coarse grid that covers most samples of dataset_basic.csv and is quick to build
+GRID = {
+    'temp': [5., 15.],
+    'ph': np.linspace(4., 9., 6),
+    'Ca': np.logspace(0., 2.5, 4),
+    'alkalinity': np.logspace(0., 3.5, 5),
+    'SO4': np.logspace(-1., 3., 3),
+    'background_ionic_strength': np.linspace(0., 0.5, 4)**2,
+}
+
+
+@pytest.fixture(name='table', scope='module')
+def fixture_table():
+    ''' fixture that builds a small lookup table '''
+    return lookup.SaturationIndexTable.build(phases=['Calcite', 'Gypsum'], grid=GRID, n_validation=50)
+
+
+def test_save_load(table, tmp_path):
+    ''' Assert a saved table is memory mapped when loaded and interpolates the same '''
+    table.save(tmp_path / 'si_table')
+    table_loaded = lookup.SaturationIndexTable.load(tmp_path / 'si_table.npy')
+
+    assert isinstance(table_loaded.values, np.memmap)
+    assert table_loaded.phases == table.phases
+    assert table_loaded.error_bound == table.error_bound
+    assert table_loaded.database == table.database == 'vitens.dat'
+    np.testing.assert_array_equal(table_loaded.values, table.values)
+
+
+def test_interpolate_grid_points(table):
+    ''' Assert the interpolation returns the table values at the grid points and NaN outside the grid '''
+    points = pd.DataFrame({var: [axis[1], axis[-1], axis[-1] * 2] for var, axis in table.grid.items()})
+    si, is_in_grid = table.interpolate(points, 'calcite')
+
+    np.testing.assert_allclose(si[:2], [table.values[0][(1,) * 6], table.values[0][(-1,) * 6]], rtol=1e-6)
+    assert list(is_in_grid) == [True, True, False]
+    assert np.isnan(si[2])
+
+    with pytest.raises(ValueError):
+        table.interpolate(points, 'Halite')
+
+
+def test_saturation_index_lookup_table(consolidated_data, table):
+    ''' Assert the interpolated saturation indices are close to phreeqc and rows outside the grid equal phreeqc '''
+    df = consolidated_data
+    for phase in table.phases:
+        si_phreeqc = df.hgc.get_saturation_index(phase, inplace=False)
+        si_table = df.hgc.get_saturation_index(phase, inplace=False, lookup_table=table)
+
+        assert si_table.name == si_phreeqc.name
+        np.testing.assert_allclose(si_table, si_phreeqc, atol=table.error_bound[phase] + 0.05)
+
+    # no SO4 is outside the grid (log scale)
+    is_outside = df['SO4'].fillna(0) == 0
+    assert is_outside.any()
+    np.testing.assert_array_equal(si_table[is_outside], si_phreeqc[is_outside])
+
+
+def test_saturation_index_lookup_table_database(consolidated_data, table, tmp_path):
+    ''' Assert a table is only used with the database it is calculated with '''
+    df = consolidated_data
+    with pytest.raises(ValueError, match='database vitens.dat'):
+        df.hgc.get_saturation_index('Calcite', inplace=False, lookup_table=table, database='phreeqc.dat')
+    with pytest.raises(ValueError, match='checkpoint'):
+        df.hgc.get_saturation_index('Calcite', inplace=False, lookup_table=table,
+                                    checkpoint=tmp_path / 'checkpoint.sqlite')
+
+    table_phreeqc = lookup.SaturationIndexTable.build(phases=['Calcite'], grid=GRID, n_validation=0,
+                                                      database='phreeqc.dat')
+    assert table_phreeqc.database == 'phreeqc.dat'
+    si_table = df.hgc.get_saturation_index('Calcite', inplace=False, lookup_table=table_phreeqc,
+                                           database='phreeqc.dat')
+    si_phreeqc = df.hgc.get_saturation_index('Calcite', inplace=False, database='phreeqc.dat')
+    np.testing.assert_allclose(si_table, si_phreeqc, atol=0.2)
@@ -1,5 +1,7 @@
 ''' Testing of the integration of phreeqpython in hgc '''
+import asyncio
 import logging
+import sqlite3
 
 import numpy as np
 import pandas as pd
@@ -7,6 +9,7 @@ import pytest
 from phreeqpython import PhreeqPython, Solution
 
 import hgc
+from hgc.checkpoint import Checkpoint
 from hgc.constants.constants import mw
 from . import test_directory
 
@@ -23,19 +26,6 @@ def fixture_mineral_data():
     return df
 
 
-@pytest.fixture(name='consolidated_data')
-def fixture_consolidated_data():
-    ''' same as fixture mineral_data, but now
-        including consolidate before returning
-        df '''
-    df = pd.read_csv(test_directory / 'data' / 'dataset_basic.csv',
-                     skiprows=[1], index_col=None)
-    df[df.hgc.hgc_cols] = df[df.hgc.hgc_cols].astype(float)
-    df.hgc.make_valid()
-    df.hgc.consolidate(inplace=True, use_so4=None, use_ph='lab')
-    return df
-
-
 @pytest.fixture(name='phreeqpython_solutions_excel')
 def fixture_phreeqpython_solutions_excel():
     ''' Add the solutions of the excel file manually to test
@@ -234,6 +224,20 @@ def test_get_phreeqpython_solutions(consolidated_data, phreeqpython_solutions_ex
         # assert sol.species_molalities == pytest.approx(sol_pp.species_molalities, abs=1.e-4, rel=1e-1), f'species molalities are not equal for solution #{_i}'
 
 
+def test_get_phreeqpython_solutions_duplicate_nitrogen(consolidated_data):
+    # total N next to NO3: N is used and NO3 is set to 0, otherwise phreeqc gets nitrogen twice
+    df_no3 = consolidated_data.iloc[:3].copy()
+    df_no3['NO2'] = 0.
+    expected = df_no3.hgc.get_phreeqpython_solutions(inplace=False)
+    df = df_no3.copy()
+    df['N'] = df['NO3'] * mw('N') / mw('NO3')
+    solutions = df.hgc.get_phreeqpython_solutions(inplace=False)
+    assert (df['NO3'] == 0.).all()
+    # total nitrogen (in any redox state) is the same
+    def n_total(solutions):
+        return [sum(mol for element, mol in s.elements.items() if element.startswith('N(')) for s in solutions]
+    np.testing.assert_allclose(n_total(solutions), n_total(expected), rtol=1e-3)
+
 def test_solution_auto_equilibrate(consolidated_data):
     """ assert that solutions are equilibrated with Na or Cl depending
         on what their concentrations are """
@@ -258,6 +262,26 @@ def test_solution_auto_equilibrate(consolidated_data):
         Cl_in_sol[1:], df.loc[1:, 'Cl'].values, rtol=1.e-1)
 
 
+def test_solution_equilibrate_warm_start(consolidated_data, caplog):
+    """ assert that the ion to balance with is chosen up front from the
+        charge imbalance, such that no solution needs a second attempt """
+    df = consolidated_data
+    df.loc[0, 'Fe'] = 2*df.loc[0, 'Na']
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        solutions = df.hgc.get_phreeqpython_solutions(equilibrate_with='auto', inplace=False)
+    assert 'second attempt' not in caplog.text
+    assert 'Now trying' not in caplog.text
+
+    # the initial guess for an absent ion is based on the charge imbalance as well
+    df_no_na = df.iloc[1:].drop(columns='Na')
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        solutions_no_na = df_no_na.hgc.get_phreeqpython_solutions(equilibrate_with='Na', inplace=False)
+    assert all(s.total_element('Na') > 0 for s in solutions_no_na)
+    assert 'Starts initial guess with 20 mg/L' not in caplog.text
+
+
 def test_solution_equilibrate_with(consolidated_data):
     ''' Assert phreeqpython solutions are returned as series'''
     df = consolidated_data
@@ -331,6 +355,73 @@ def test_get_specific_conductance(consolidated_data, phreeqpython_solutions_exce
     pd.testing.assert_series_equal(sc_hgc, sc_pp)
 
 
+def test_fillna_ec(consolidated_data, caplog):
+    ''' Assert only the missing values of ec are filled with the specific conductance at 20 °C '''
+    df = consolidated_data
+    sc_20 = df.hgc.get_specific_conductance(inplace=False, reference_temp=20)
+    ec_original = df['ec'].copy()
+    df.loc[[3, 10], 'ec'] = np.nan
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        df.hgc.fillna_ec()
+    assert 'Filled 2 missing value(s)' in caplog.text
+    pd.testing.assert_series_equal(df.loc[[3, 10], 'ec'], sc_20.loc[[3, 10]], check_names=False)
+    pd.testing.assert_series_equal(df['ec'].drop([3, 10]), ec_original.drop([3, 10]))
+
+    df.loc[[3, 10], 'ec'] = np.nan
+    df.hgc.fillna_ec(use_phreeqc=False)
+    np.testing.assert_allclose(df.loc[[3, 10], 'ec'], sc_20.loc[[3, 10]], rtol=0.01)
+
+    df = df.drop(columns='ec')
+    df.hgc.fillna_ec(use_phreeqc=False)
+    assert df['ec'].notna().all()
+
+
+def test_fillna_concentrations_phreeqc(consolidated_data):
+    ''' Assert the missing ion is filled by charge balancing the solutions of the affected rows '''
+    df = consolidated_data
+    df.loc[[5, 6], 'Na'] = np.nan
+    df.loc[8, 'Cl'] = np.nan
+    df.loc[12, 'alkalinity'] = np.nan
+    # a cation excess that a missing cation cannot balance
+    df.loc[14, 'Ca'] *= 5.
+    df.loc[14, 'K'] = np.nan
+
+    df.hgc.fillna_concentrations(how='phreeqc')
+    assert list(df.loc[[5, 6, 8, 12, 14], 'filled_ion']) == ['Na', 'Na', 'Cl', None, None]
+    assert df['filled_ion'].notna().sum() == 3
+    # phreeqc cannot charge balance on alkalinity
+    assert np.isnan(df.loc[12, 'alkalinity'])
+    assert np.isnan(df.loc[14, 'K'])
+
+    # the filled concentrations are close to the original ones (24, 29 and 45 mg/L)
+    np.testing.assert_allclose([df.loc[5, 'Na'], df.loc[6, 'Na'], df.loc[8, 'Cl']], [24.8, 29.8, 47.1], atol=0.1)
+
+
+def test_get_saturation_index_dedupe_tolerance(consolidated_data, caplog):
+    ''' Assert replicates that differ less than the tolerance share one phreeqc solution '''
+    df = consolidated_data
+    df_replicates = pd.concat([df, df.assign(Ca=df['Ca'] * (1 + 1e-6))], ignore_index=True)
+    si_calcite = df.hgc.get_saturation_index('Calcite', inplace=False)
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        si_deduped = df_replicates.hgc.get_saturation_index('Calcite', inplace=False, dedupe_tolerance=0.01)
+    assert f'Calculated {len(df)} phreeqc solution(s) for {2 * len(df)} row(s)' in caplog.text
+    assert f'{len(df)} call(s) saved' in caplog.text
+    np.testing.assert_allclose(si_deduped[:len(df)], si_calcite)
+    np.testing.assert_allclose(si_deduped[len(df):], si_calcite)
+
+    # without tolerance all rows are calculated
+    si_replicates = df_replicates.hgc.get_saturation_index('Calcite', inplace=False)
+    np.testing.assert_allclose(si_deduped, si_replicates, atol=1e-3)
+    assert any(si_replicates[len(df):].values != si_calcite.values)
+
+    with pytest.raises(ValueError):
+        df.hgc.get_specific_conductance(dedupe_tolerance=0)
+
+
 def test_get_saturation_index_unknown_mineral(consolidated_data, phreeqpython_solutions_excel, caplog):
     """ Assert if saturation of unkown mineral is -Inf (i.e. <-900)"""
     df = consolidated_data
@@ -385,4 +476,240 @@ def test_get_saturation_index_calcite(consolidated_data, phreeqpython_solutions_
     assert len(caplog.records) == 1
     column_name = 'si_calcite'
     assert column_name in caplog.text.lower()
-    assert f'{column_name}' in set(df.columns)
\ No newline at end of file
+    assert f'{column_name}' in set(df.columns)
+
+def test_get_saturation_index_checkpoint(consolidated_data, tmp_path, caplog):
+    ''' Assert results are written to the checkpoint file and that only
+        missing rows are computed when resuming from a checkpoint '''
+    df = consolidated_data
+    si_calcite = df.hgc.get_saturation_index('Calcite', inplace=False)
+
+    checkpoint = Checkpoint(tmp_path / 'checkpoint.sqlite', flush_every=2)
+    # compute part of the frame, like an interrupted run would have done
+    df_part = df.iloc[:5].copy()
+    si_part = df_part.hgc.get_saturation_index('Calcite', inplace=False, checkpoint=checkpoint)
+    pd.testing.assert_series_equal(si_part, si_calcite.iloc[:5])
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        si_resumed = df.hgc.get_saturation_index('Calcite', inplace=False, checkpoint=checkpoint)
+    assert '5 row(s) of' in caplog.text
+    assert f'remaining {len(df) - 5} row(s)' in caplog.text
+    pd.testing.assert_series_equal(si_resumed, si_calcite)
+
+    # everything is stored now
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        sc = df.hgc.get_specific_conductance(inplace=False, checkpoint=checkpoint)
+        sc_checkpointed = df.hgc.get_specific_conductance(inplace=False, checkpoint=checkpoint)
+    assert 'remaining 0 row(s)' in caplog.text
+    pd.testing.assert_series_equal(sc, sc_checkpointed)
+
+    # changed input is detected
+    df.loc[0, 'Ca'] = df.loc[0, 'Ca'] + 1.
+    with pytest.raises(ValueError) as exc_info:
+        df.hgc.get_saturation_index('Calcite', inplace=False, checkpoint=checkpoint)
+    assert 'changed since' in str(exc_info)
+
+
+def test_checkpoint_index_types(tmp_path):
+    ''' Assert index labels that only differ in type (1, 1.0 and '1') are stored as different rows '''
+    checkpoint = Checkpoint(tmp_path / 'checkpoint.sqlite')
+    indexes = [pd.Index([1, 2]), pd.Index([1., 2.]), pd.Index(['1', '2'])]
+    for i, index in enumerate(indexes):
+        results, is_missing, _ = checkpoint.load('key', index, np.array([i, i]))
+        assert is_missing.all()
+        checkpoint.store('key', pd.DataFrame({'x': [float(i)] * 2}, index=index), np.array([i, i]))
+
+    for i, index in enumerate(indexes):
+        results, is_missing, is_changed = checkpoint.load('key', index, np.array([i, i]))
+        assert not is_missing.any() and not is_changed.any()
+        pd.testing.assert_frame_equal(results, pd.DataFrame({'x': [float(i)] * 2}, index=index))
+
+
+def test_checkpoint_closes_connections(tmp_path, monkeypatch):
+    ''' Assert the connections to the checkpoint file are closed after every load and store '''
+    connections = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda *args: connections.append(connect(*args)) or connections[-1])
+
+    checkpoint = Checkpoint(tmp_path / 'checkpoint.sqlite')
+    checkpoint.store('key', pd.DataFrame({'x': [1.]}), np.array([0]))
+    checkpoint.load('key', pd.RangeIndex(1), np.array([0]))
+    assert len(connections) == 3
+    for con in connections:
+        with pytest.raises(sqlite3.ProgrammingError, match='closed'):
+            con.execute('SELECT 1')
+
+
+def test_mix_sweep(consolidated_data):
+    ''' test mixing all samples with one sample and with themselves, in one and in two processes '''
+    df = consolidated_data
+    other = df.iloc[10]
+    fractions = [0., 0.25, 0.5, 1.]
+    df_mix = df.hgc.mix_sweep(other, fractions=fractions, saturation_indices=['Calcite'])
+
+    assert list(df_mix.index.names) == ['sample', 'fraction']
+    assert list(df_mix.columns) == ['ph', 'temp', 'sc', 'si_calcite']
+    assert len(df_mix) == len(df) * len(fractions)
+    # the temperature of the mixture is the weighted mean
+    temp_mix = df_mix['temp'].unstack('fraction')
+    np.testing.assert_allclose(temp_mix[0.25], 0.75 * df['temp'] + 0.25 * other['temp'])
+    # all samples mixed with only the other sample are the same
+    assert df_mix.xs(1., level='fraction')['sc'].nunique() == 1
+
+    # mixing with itself does not change a sample
+    df_self = df.hgc.mix_sweep(df, fractions=fractions, saturation_indices=['Calcite'])
+    for fraction in fractions[1:]:
+        pd.testing.assert_frame_equal(df_self.xs(fraction, level='fraction'),
+                                      df_self.xs(0., level='fraction'), rtol=1e-6)
+
+    df_parallel = df.hgc.mix_sweep(other, fractions=fractions, saturation_indices=['Calcite'], n_jobs=2)
+    pd.testing.assert_frame_equal(df_parallel, df_mix)
+    # the mixtures do not depend on how they are divided over the phreeqc runs
+    df_batched = df.hgc.mix_sweep(other, fractions=fractions, saturation_indices=['Calcite'], batchsize=7)
+    pd.testing.assert_frame_equal(df_batched, df_mix)
+
+    with pytest.raises(ValueError):
+        df.hgc.mix_sweep(df.iloc[:2], fractions=fractions)
+
+
+def test_equilibrate_phases(consolidated_data):
+    ''' test equilibration with calcite at a fixed CO2 partial pressure agrees with
+        phreeqpython and with the saturation index of the returned composition '''
+    df = consolidated_data
+    df_original = df.copy()
+    df_eq = df.hgc.equilibrate_phases({'Calcite': 0., 'CO2(g)': -2.})
+
+    pd.testing.assert_frame_equal(df, df_original)
+    pd.testing.assert_index_equal(df_eq.index, df.index)
+    assert {'Ca', 'Na', 'alkalinity', 'ph', 'si_calcite', 'si_co2(g)'} <= set(df_eq.columns)
+    np.testing.assert_allclose(df_eq['si_calcite'], 0., atol=1e-6)
+    np.testing.assert_allclose(df_eq['si_co2(g)'], -2., atol=1e-3)
+
+    solution = df.iloc[[8]].hgc.get_phreeqpython_solutions(inplace=False).iloc[0]
+    solution.equalize(['Calcite', 'CO2(g)'], [0., -2.])
+    np.testing.assert_allclose(df_eq['ph'].iloc[8], solution.pH)
+    np.testing.assert_allclose(df_eq['Ca'].iloc[8], solution.total('Ca', units='mmol') * mw('Ca'))
+
+    # the returned water is in equilibrium with calcite
+    df_new = df.copy()
+    df_new[['Ca', 'alkalinity', 'ph']] = df_eq[['Ca', 'alkalinity', 'ph']]
+    np.testing.assert_allclose(df_new.hgc.get_saturation_index('Calcite', inplace=False), 0., atol=0.01)
+
+    df_gypsum = df.hgc.equilibrate_phases('Gypsum')
+    np.testing.assert_allclose(df_gypsum['si_gypsum'], 0., atol=0.01)
+    assert (df_gypsum['SO4'] > df['SO4'].fillna(0)).all()
+
+
+def test_get_species(consolidated_data):
+    ''' test the extraction of species in long and wide format, with phreeqc and the analytic model '''
+    df = consolidated_data
+    species = ['CO2', 'HCO3-', 'CO3-2', 'CaCO3']
+    df_long = df.hgc.get_species(species)
+
+    assert list(df_long.columns) == ['sample', 'species', 'molality', 'activity']
+    assert df_long['species'].dtype == 'category'
+    assert len(df_long) == len(df) * len(species)
+
+    df_wide = df.hgc.get_species(species, wide=True, batchsize=5)
+    assert (df_wide.dtypes == np.float32).all()
+    pd.testing.assert_frame_equal(
+        df_wide['activity'],
+        df_long.pivot(index='sample', columns='species', values='activity')[species].astype(np.float32),
+        check_names=False, check_index_type=False, check_column_type=False, check_categorical=False)
+
+    solution = df.iloc[[10]].hgc.get_phreeqpython_solutions(inplace=False).iloc[0]
+    assert df_wide.loc[10, ('molality', 'CO3-2')] == pytest.approx(solution.molality('CO3-2', units='mol'), rel=1e-6)
+
+    df_analytic = df.hgc.get_species(species, wide=True, use_phreeqc=False)
+    np.testing.assert_allclose(df_analytic, df_wide, rtol=0.02, atol=1e-9)
+
+    # all species of the samples
+    df_all = df.hgc.get_species()
+    assert {'Ca+2', 'CaHCO3+', 'Cl-'} <= set(df_all['species'].cat.categories)
+
+    ionic_strength = df.hgc.get_ionic_strength(inplace=False)
+    assert ionic_strength.iloc[10] == pytest.approx(solution.I)
+    np.testing.assert_allclose(df.hgc.get_ionic_strength(use_phreeqc=False, inplace=False), ionic_strength, rtol=0.02)
+
+
+def test_get_saturation_index_database(consolidated_data, tmp_path):
+    ''' test calculations with other databases, one at a time and concurrently '''
+    df = consolidated_data
+    si_vitens = df.hgc.get_saturation_index('Calcite', inplace=False)
+    si_phreeqc = df.hgc.get_saturation_index('Calcite', inplace=False, database='phreeqc.dat')
+    assert not np.allclose(si_phreeqc, si_vitens)
+    np.testing.assert_allclose(si_phreeqc, si_vitens, atol=0.05)
+
+    df_si = df.hgc.get_saturation_index('Calcite', inplace=False, database=['vitens.dat', 'phreeqc.dat'])
+    assert list(df_si.columns) == [('vitens.dat', 'si_calcite'), ('phreeqc.dat', 'si_calcite')]
+    assert df_si.columns.names == ['database', None]
+    pd.testing.assert_series_equal(df_si['vitens.dat', 'si_calcite'], si_vitens, check_names=False)
+    pd.testing.assert_series_equal(df_si['phreeqc.dat', 'si_calcite'], si_phreeqc, check_names=False)
+
+    df_species = df.hgc.get_species(['CO3-2'], database=['vitens.dat', 'phreeqc.dat'])
+    assert list(df_species.columns) == ['database', 'sample', 'species', 'molality', 'activity']
+    assert len(df_species) == 2 * len(df)
+    df_species_wide = df.hgc.get_species(['CO3-2'], wide=True, database=['vitens.dat', 'phreeqc.dat'])
+    assert df_species_wide.columns.names[0] == 'database'
+    assert df_species_wide.index.equals(df.index)
+
+    # the database is part of the key of a checkpoint
+    checkpoint = Checkpoint(tmp_path / 'checkpoint.sqlite')
+    df.hgc.get_saturation_index('Calcite', inplace=False, checkpoint=checkpoint)
+    si_checkpointed = df.hgc.get_saturation_index('Calcite', inplace=False, checkpoint=checkpoint,
+                                                  database='phreeqc.dat')
+    pd.testing.assert_series_equal(si_checkpointed, si_phreeqc)
+
+    with pytest.raises(ValueError):
+        df.hgc.get_saturation_index('Calcite', database=['vitens.dat', 'phreeqc.dat'])
+    with pytest.raises(FileNotFoundError):
+        df.hgc.get_saturation_index('Calcite', database='not_a_database.dat')
+
+
+def test_n_jobs_database(consolidated_data):
+    ''' test the processes of n_jobs use the database of the call '''
+    df = consolidated_data
+    df_eq = df.hgc.equilibrate_phases({'Calcite': 0.}, database='phreeqc.dat')
+    assert not np.allclose(df_eq['Ca'], df.hgc.equilibrate_phases({'Calcite': 0.})['Ca'])
+    pd.testing.assert_frame_equal(df.hgc.equilibrate_phases({'Calcite': 0.}, database='phreeqc.dat', n_jobs=2), df_eq)
+
+    kwargs = dict(fractions=[0., 0.5, 1.], saturation_indices=['Calcite'], database='phreeqc.dat')
+    pd.testing.assert_frame_equal(df.hgc.mix_sweep(df.iloc[0], n_jobs=2, **kwargs),
+                                  df.hgc.mix_sweep(df.iloc[0], **kwargs))
+
+    kwargs = dict(inplace=False, n_samples=5, uncertainty={'ph': 0.1}, seed=1, database='phreeqc.dat')
+    pd.testing.assert_frame_equal(df.hgc.get_saturation_index('Calcite', n_jobs=2, **kwargs),
+                                  df.hgc.get_saturation_index('Calcite', **kwargs))
+
+def test_async_methods(consolidated_data):
+    ''' test the asynchronous methods give the same results as the synchronous ones, also
+        when they run concurrently, and can be cancelled '''
+    df = consolidated_data
+    si_calcite = df.hgc.get_saturation_index('Calcite', inplace=False)
+    sc = df.hgc.get_specific_conductance(inplace=False, database='phreeqc.dat')
+
+    async def run_concurrently():
+        return await asyncio.gather(
+            df.hgc.aget_saturation_index('Calcite', inplace=False, chunksize=4),
+            df.hgc.aget_specific_conductance(inplace=False, chunksize=3, database='phreeqc.dat'),
+            df.hgc.aget_phreeqpython_solutions(inplace=False, chunksize=5))
+
+    si_async, sc_async, solutions = asyncio.run(run_concurrently())
+    pd.testing.assert_series_equal(si_async, si_calcite)
+    pd.testing.assert_series_equal(sc_async, sc)
+    np.testing.assert_allclose([s.si('Calcite') for s in solutions], si_calcite)
+
+    asyncio.run(df.hgc.aget_saturation_index('Calcite'))
+    pd.testing.assert_series_equal(df['si_calcite'], si_calcite)
+
+    async def cancel():
+        task = asyncio.ensure_future(df.hgc.aget_specific_conductance(chunksize=1))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await task
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancel())
+    assert 'sc' not in df.columns
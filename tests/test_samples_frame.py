@@ -298,6 +298,26 @@ def test_get_ion_balance(test_data_bas_vdg_consolidated):
     assert test_data_bas_vdg_consolidated.ion_balance.to_numpy() == expected_value
 
 
+def test_fillna_concentrations_analytic(test_data_bas_vdg_consolidated, caplog):
+    df = test_data_bas_vdg_consolidated
+    df.loc[0, 'Na'] = np.nan
+    df.loc[1, ['Ca', 'Cl']] = np.nan
+    df.loc[2, 'Cl'] = np.nan
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        df.hgc.fillna_concentrations(how='analytic')
+    assert 'Filled 2 missing concentration(s)' in caplog.text
+    assert list(df['filled_ion']) == ['Na', None, 'Cl']
+    # the filled concentrations close the ion balance
+    assert df.hgc.get_ion_balance(inplace=False)[[0, 2]].to_numpy() == pytest.approx([0, 0], abs=1e-10)
+    # rows with more than one missing major ion are not filled
+    assert df.loc[1, ['Ca', 'Cl']].isna().all()
+
+    with pytest.raises(ValueError):
+        df.hgc.fillna_concentrations(how='unknown')
+
+
 def test_get_stuyfzand_water_type():
     """ Testcase matches row 12, sheet 6 of HGC Excel """
     testdata = {
@@ -524,3 +544,64 @@ def test_add_temp_ph_later():
 
 
 
+
+def test_run_incremental(test_data_bas_vdg_consolidated, tmp_path, caplog):
+    """ Test that only new or modified rows are computed and that the results are
+    merged with the results of the previous run """
+    df = test_data_bas_vdg_consolidated.copy()
+    df['Mg'] = 0.
+    store = tmp_path / 'results.sqlite'
+    expected = df.hgc.get_stuyfzand_water_type(inplace=False)
+
+    df_first = df.iloc[:2].copy()
+    df_first.hgc.run_incremental(store, 'get_stuyfzand_water_type')
+    assert df_first.water_type.to_list() == expected.iloc[:2].to_list()
+
+    # one new row and one modified row
+    df.loc[0, 'Cl'] = 400.
+    expected = df.hgc.get_stuyfzand_water_type(inplace=False)
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        df.hgc.run_incremental(store, 'get_stuyfzand_water_type')
+    assert 'computing the remaining 2 row(s)' in caplog.text
+    assert df.water_type.to_list() == expected.to_list()
+
+    # nothing changed
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        df_results = df.hgc.run_incremental(store, 'get_stuyfzand_water_type', inplace=False)
+    assert 'computing the remaining 0 row(s)' in caplog.text
+    assert df_results.water_type.to_list() == expected.to_list()
+
+    # PHREEQC-backed methods and methods that add more than one column
+    si_calcite = df.hgc.get_saturation_index('Calcite', inplace=False)
+    df.hgc.run_incremental(store, 'get_saturation_index', mineral_or_gas='Calcite')
+    pd.testing.assert_series_equal(df.si_calcite, si_calcite)
+    df_ratios = df.hgc.run_incremental(store, 'get_ratios', inplace=False)
+    assert {'cl_to_na', 'sum_anions'}.issubset(df_ratios.columns)
+
+    with pytest.raises(ValueError):
+        df.hgc.run_incremental(store, 'consolidate')
+
+
+@pytest.mark.parametrize('dtype', ['object', 'string', 'string[pyarrow]', 'ArrowDtype'])
+def test_make_valid_string_dtypes(dtype):
+    if 'pyarrow' in dtype or dtype == 'ArrowDtype':
+        pa = pytest.importorskip('pyarrow')
+    if dtype == 'ArrowDtype':
+        dtype = pd.ArrowDtype(pa.string())
+    df = pd.DataFrame({
+        'ph': pd.Series(['7.1', '6.5', None], dtype=dtype),
+        'Ca': pd.Series(['<0.5', '40', '> 100'], dtype=dtype),
+        'Na': pd.Series([10., None, -1.], dtype='Float64'),
+        'Cl': pd.Series(['12', 'error', ' 3.5 '], dtype=dtype),
+    })
+    assert not df.hgc.is_valid
+    df.hgc.make_valid()
+
+    assert df.hgc.is_valid
+    assert all(df[col].dtype == np.float64 for col in ['ph', 'Ca', 'Na', 'Cl'])
+    np.testing.assert_array_equal(df['ph'], [7.1, 6.5, np.nan])
+    np.testing.assert_array_equal(df['Ca'], [0.25, 40., 150.])
+    np.testing.assert_array_equal(df['Na'], [10., np.nan, 0.])
+    np.testing.assert_array_equal(df['Cl'], [12., np.nan, 3.5])
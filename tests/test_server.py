@@ -0,0 +1,76 @@
+''' Testing of the local compute server and its client '''
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+import hgc
+from hgc.client import Client
+from hgc.server import make_server
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture(name='server')
+def fixture_server():
+    # a long delay, such that concurrent requests end up in the same batch
+    server = _serve(make_server(port=0, max_delay=0.2))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_client(consolidated_data, server, tmp_path):
+    df = consolidated_data
+    client = Client(f'http://127.0.0.1:{server.server_address[1]}')
+
+    si_calcite = client.get_saturation_index(df, 'Calcite')
+    pd.testing.assert_series_equal(si_calcite, df.hgc.get_saturation_index('Calcite', inplace=False))
+    sc = client.get_specific_conductance(df)
+    pd.testing.assert_series_equal(sc, df.hgc.get_specific_conductance(inplace=False))
+    df_eq = client.equilibrate_phases(df, {'Calcite': 0.})
+    pd.testing.assert_frame_equal(df_eq, df.hgc.equilibrate_phases({'Calcite': 0.}), check_dtype=False)
+
+    with pytest.raises(ValueError, match='not supported'):
+        client._call('get_phreeqpython_solutions', df)
+    with pytest.raises(ValueError, match='could not handle'):
+        client.get_saturation_index(df, 'Calcite', database='unknown.dat')
+    # arguments that access files or start processes are rejected
+    for kwargs in [{'checkpoint': str(tmp_path / 'checkpoint.sqlite')}, {'lookup_table': str(tmp_path / 'table')},
+                   {'n_jobs': 2}, {'n_samples': 10 ** 6}, {'inplace': True}, {'database': str(tmp_path / 'x.dat')}]:
+        with pytest.raises(ValueError, match='not supported|not a path'):
+            client.get_saturation_index(df, 'Calcite', **kwargs)
+    assert not (tmp_path / 'checkpoint.sqlite').exists()
+
+
+def test_micro_batching(consolidated_data, server):
+    df = consolidated_data
+    client = Client(f'http://127.0.0.1:{server.server_address[1]}')
+    expected = df.hgc.get_saturation_index('Calcite', inplace=False)
+
+    n_batches = client.health()['batches']
+    rows = [df.iloc[[i]] for i in range(len(df))]
+    with ThreadPoolExecutor(len(rows)) as executor:
+        results = list(executor.map(lambda row: client.get_saturation_index(row, 'Calcite'), rows))
+
+    pd.testing.assert_series_equal(pd.concat(results), expected)
+    assert client.health()['batches'] - n_batches < len(rows)
+
+
+def test_unix_socket(consolidated_data, tmp_path):
+    df = consolidated_data
+    socket_path = tmp_path / 'hgc.sock'
+    server = _serve(make_server(socket_path=socket_path))
+    try:
+        client = Client(socket_path=socket_path)
+        assert client.health()['status'] == 'ok'
+        ionic_strength = client.get_ionic_strength(df)
+        pd.testing.assert_series_equal(ionic_strength, df.hgc.get_ionic_strength(inplace=False))
+    finally:
+        server.shutdown()
+        server.server_close()
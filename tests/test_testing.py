@@ -0,0 +1,51 @@
+''' Testing of the generation of synthetic samples '''
+import numpy as np
+import pandas as pd
+import pytest
+
+import hgc
+from hgc.columns import select_hgc_columns
+from hgc.testing import generate_samples
+
+
+def test_generate_samples():
+    df = generate_samples(1000, seed=0)
+    assert len(df) == 1000
+    assert len(select_hgc_columns(df.columns)) == len(df.columns)
+    pd.testing.assert_frame_equal(generate_samples(1000, seed=0), df)
+    assert not generate_samples(1000, seed=1).equals(df)
+
+    # values below the detection limit, missing values and total N and P in some of the samples
+    assert (df['Fe'] == '<0.01').any()
+    assert df['NO2'].isna().any()
+    assert not df[['Na', 'Cl', 'ph_field', 'ec_lab', 'O2_field']].isna().any().any()
+    assert 0 < df['N'].notna().sum() < 200
+
+    df = generate_samples(100, seed=0, censored=False, missing=0., duplicates=0.)
+    assert all(pd.api.types.is_float_dtype(dtype) for dtype in df.dtypes)
+    assert not df.isna().any().any()
+    assert 'N' not in df.columns
+
+    with pytest.raises(ValueError, match='Invalid profile'):
+        generate_samples(10, profile='seawater')
+
+
+@pytest.mark.parametrize('profile', ['groundwater', 'brackish'])
+def test_generate_samples_valid(profile):
+    df = generate_samples(1000, profile=profile, seed=0)
+    df.hgc.make_valid()
+    assert df.hgc.is_valid
+    df.hgc.consolidate(use_so4=None)
+    df.hgc.get_ion_balance()
+    assert df['ion_balance'].abs().median() < 3.
+    df.hgc.get_stuyfzand_water_type()
+    assert df['water_type'].notna().all()
+
+
+def test_generate_samples_phreeqc():
+    # every sample has total N and P next to NO3 and PO4
+    df = generate_samples(20, seed=0, duplicates=1.)
+    df.hgc.make_valid()
+    df.hgc.consolidate(use_so4=None)
+    df.hgc.get_saturation_index('Calcite')
+    assert np.isfinite(df['si_calcite']).all()